@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Contrôle d'admission de /predict selon la latence
+
+Plutôt que de laisser les requêtes s'accumuler jusqu'au timeout gunicorn
+(120 s), chaque requête est évaluée à son arrivée. La latence prévue
+combine trois termes :
+  - l'attente déjà subie avant le worker (en-tête X-Request-Start posé par
+    le proxy, s'il existe) ;
+  - le travail restant des requêtes en cours dans ce processus ;
+  - le coût estimé de la requête, d'après les latences récentes (moyennes
+    mobiles exponentielles par requête interactive et par ligne de lot).
+
+Le travail en cours n'est visible que si le processus sert plusieurs
+requêtes à la fois : le Procfile et render.yaml lancent gunicorn en workers
+gthread (--threads 8). Avec des workers sync, chaque processus n'a qu'une
+requête en cours et seule l'attente X-Request-Start compte. Désactivé par
+défaut : ADMISSION_ENABLED=1 pour l'activer.
+
+Deux classes de priorité :
+  - interactive (au plus ADMISSION_BATCH_ROWS lignes) : au-delà du budget
+    ADMISSION_LATENCY_BUDGET_MS, la requête est dégradée (résultat en cache
+    pour une transaction déjà scorée, sinon modèle réduit aux premiers
+    arbres) ; si même l'attente seule dépasse le budget, elle est rejetée (503) ;
+  - lot : budget propre (ADMISSION_BATCH_BUDGET_MS) et nombre limité de lots
+    simultanés ; un lot hors budget est rejeté tout de suite (429), avec
+    Retry-After, pour être réessayé ou soumis à /jobs.
+"""
+
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+
+# Configuration (surchargeable par variables d'environnement)
+ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', '0') == '1'
+ADMISSION_LATENCY_BUDGET_MS = float(os.environ.get('ADMISSION_LATENCY_BUDGET_MS', 1000))
+ADMISSION_BATCH_BUDGET_MS = float(os.environ.get('ADMISSION_BATCH_BUDGET_MS', 10000))
+ADMISSION_BATCH_ROWS = int(os.environ.get('ADMISSION_BATCH_ROWS', 50))
+ADMISSION_MAX_BATCHES = int(os.environ.get('ADMISSION_MAX_BATCHES', 1))
+ADMISSION_CACHE_SIZE = int(os.environ.get('ADMISSION_CACHE_SIZE', 10000))
+# Arbres évalués par le modèle dégradé (forêt réduite)
+ADMISSION_CHEAP_TREES = int(os.environ.get('ADMISSION_CHEAP_TREES', 10))
+EWMA_ALPHA = 0.2
+
+ACCEPT = "accept"
+DEGRADE = "degrade"
+SHED = "shed"
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+
+def queued_seconds(header, now=None):
+    """Attente avant le worker d'après X-Request-Start ("t=<horodatage>")
+
+    L'horodatage peut être en secondes, millisecondes ou microsecondes
+    selon le proxy ; 0 si l'en-tête est absent ou illisible.
+    """
+    if not header:
+        return 0.0
+    try:
+        value = float(header.strip().removeprefix("t="))
+    except ValueError:
+        return 0.0
+    while value > 1e11:
+        value /= 1000
+    now = time.time() if now is None else now
+    return max(0.0, now - value)
+
+
+def record_key(record):
+    return json.dumps(record, sort_keys=True, default=str)
+
+
+class ResultCache:
+    """Derniers résultats complets par transaction (LRU)"""
+
+    def __init__(self, size=ADMISSION_CACHE_SIZE):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, records, results):
+        if not self.size:
+            return
+        with self._lock:
+            for record, result in zip(records, results):
+                key = record_key(record)
+                self._items[key] = result
+                self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def get(self, record):
+        with self._lock:
+            return self._items.get(record_key(record))
+
+    def __len__(self):
+        return len(self._items)
+
+
+class Ticket:
+    """Requête admise (ou rejetée) et sa décision"""
+
+    def __init__(self, kind, rows, decision, estimate, retry_after=None):
+        self.kind = kind
+        self.rows = rows
+        self.decision = decision
+        self.estimate = estimate
+        self.retry_after = retry_after
+        self.started = time.perf_counter()
+
+
+class AdmissionController:
+    """Suivi du travail en cours et des latences récentes d'un processus"""
+
+    def __init__(self, latency_budget_ms=ADMISSION_LATENCY_BUDGET_MS,
+                 batch_budget_ms=ADMISSION_BATCH_BUDGET_MS, batch_rows=ADMISSION_BATCH_ROWS,
+                 max_batches=ADMISSION_MAX_BATCHES, cache_size=ADMISSION_CACHE_SIZE):
+        self.latency_budget = latency_budget_ms / 1000
+        self.batch_budget = batch_budget_ms / 1000
+        self.batch_rows = batch_rows
+        self.max_batches = max_batches
+        self.cache = ResultCache(cache_size)
+
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        # Ordres de grandeur mesurés (forêt de 100 arbres), remplacés dès les premières requêtes
+        self.interactive_seconds = 0.01
+        self.row_seconds = 0.00002
+        self.counters = {
+            "accepted": 0, "degraded": 0, "degraded_rows_cache": 0, "degraded_rows_cheap_model": 0,
+            "shed_interactive": 0, "shed_batch": 0
+        }
+
+    def estimate(self, rows):
+        if rows <= self.batch_rows:
+            return self.interactive_seconds
+        return self.interactive_seconds + self.row_seconds * rows
+
+    def _pending_seconds(self, now):
+        return sum(max(0.0, ticket.estimate - (now - ticket.started)) for ticket in self._in_flight)
+
+    def admit(self, rows, queued=0.0):
+        """Ticket d'une requête de `rows` lignes ; decision : accept, degrade ou shed"""
+        kind = BATCH if rows > self.batch_rows else INTERACTIVE
+        own = self.estimate(rows)
+        with self._lock:
+            wait = queued + self._pending_seconds(time.perf_counter())
+            if kind == BATCH:
+                batches = sum(1 for ticket in self._in_flight if ticket.kind == BATCH)
+                if batches >= self.max_batches or wait + own > self.batch_budget:
+                    self.counters["shed_batch"] += 1
+                    return Ticket(kind, rows, SHED, own, retry_after=max(1, round(wait + own)))
+                decision = ACCEPT
+            elif wait >= self.latency_budget:
+                self.counters["shed_interactive"] += 1
+                return Ticket(kind, rows, SHED, own, retry_after=max(1, round(wait)))
+            else:
+                decision = ACCEPT if wait + own <= self.latency_budget else DEGRADE
+
+            ticket = Ticket(kind, rows, decision, own)
+            self._in_flight.add(ticket)
+            if decision == ACCEPT:
+                self.counters["accepted"] += 1
+            return ticket
+
+    def release(self, ticket, degraded_rows=None):
+        """Fin de traitement : met à jour les estimations (scoring complet seulement)
+
+        degraded_rows : lignes servies en mode dégradé, par source (cache, cheap_model).
+        """
+        seconds = time.perf_counter() - ticket.started
+        with self._lock:
+            self._in_flight.discard(ticket)
+            if ticket.decision == ACCEPT:
+                if ticket.kind == INTERACTIVE:
+                    self.interactive_seconds += EWMA_ALPHA * (seconds - self.interactive_seconds)
+                else:
+                    row_seconds = max(0.0, seconds - self.interactive_seconds) / ticket.rows
+                    self.row_seconds += EWMA_ALPHA * (row_seconds - self.row_seconds)
+            elif ticket.decision == SHED:
+                # Dégradation impossible après admission (ni cache ni modèle dégradé)
+                self.counters[f"shed_{ticket.kind}"] += 1
+            elif degraded_rows:
+                self.counters["degraded"] += 1
+                for source, count in degraded_rows.items():
+                    self.counters[f"degraded_rows_{source}"] += count
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": True,
+                "latency_budget_ms": self.latency_budget * 1000,
+                "batch_budget_ms": self.batch_budget * 1000,
+                "batch_rows": self.batch_rows,
+                "in_flight": len(self._in_flight),
+                "estimated_interactive_ms": round(self.interactive_seconds * 1000, 3),
+                "estimated_row_ms": round(self.row_seconds * 1000, 4),
+                "cached_results": len(self.cache),
+                **self.counters
+            }
+
+
+def cheap_model(model, threshold, segments=None):
+    """Forêt réduite à ses premiers arbres (None si le modèle n'est pas une forêt)
+
+    segments : table des seuils par segment, pour décider chaque ligne à son seuil.
+    """
+    import early_exit
+
+    if not early_exit.supports(model):
+        return None
+    # Marge nulle : toutes les lignes sortent après le premier paquet d'arbres
+    return early_exit.EarlyExitForest(model, threshold, margin=0.0, chunk_trees=ADMISSION_CHEAP_TREES,
+                                      segments=segments)
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_controller():
+    """Contrôleur partagé du processus (None si l'admission est désactivée)"""
+    global _controller
+    if not ADMISSION_ENABLED:
+        return None
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController()
+    return _controller
+
+
+def stats():
+    controller = get_controller()
+    return controller.stats() if controller is not None else {"enabled": False}
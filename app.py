@@ -4,86 +4,203 @@ API Flask pour la Détection de Fraude Bancaire
 Version optimisée et simplifiée
 """
 
-from flask import Flask, request, jsonify, render_template
-import joblib
-import pandas as pd
-import numpy as np
-import json
+from flask import Flask, request, jsonify, abort
 import os
+import time
+import threading
 from datetime import datetime
 
-# Initialisation de l'application Flask
-app = Flask(__name__)
+import admission
+import audit_log
+import history_store
+import jobs
+import model_registry
+import model_store
+import profiling
+import request_log
+import scoring
+import static_assets
+import traffic_capture
 
-# Variables globales
-model = None
-model_info = None
+# Initialisation de l'application Flask (static/ est servi par static_assets)
+app = Flask(__name__, static_folder=None)
+started_at = time.time()
+
+# Journal JSON structuré : identifiant de trace et durées par requête
+request_log.install(app)
+
+# Interface web : fichiers précompressés et page d'accueil rendue une seule fois
+ui_assets = static_assets.AssetCache(os.path.join(app.root_path, "static"))
+ui_assets.add_page("index.html", app.jinja_env.get_template("index.html"))
+
+class ServingState:
+    """Modèle servi et tout ce qui en dépend (seuils, table par segment, enveloppes)
+
+    load_model construit l'ensemble puis le publie d'une seule affectation de
+    `serving` : une requête lit `serving` une fois et voit un état cohérent,
+    jamais un modèle avec les seuils par défaut d'un chargement en cours.
+    """
+
+    def __init__(self, model, model_info, model_version, decision_thresholds, model_features,
+                 pooled_forest=None, degraded_model=None, segment_registry=None, model_path=None):
+        self.model = model
+        self.model_info = model_info
+        self.model_version = model_version
+        self.model_path = model_path
+        self.decision_thresholds = decision_thresholds
+        self.model_features = model_features
+        self.pooled_forest = pooled_forest
+        self.degraded_model = degraded_model
+        self.segment_registry = segment_registry
+
+
+# État servi (None tant que le modèle n'est pas entièrement chargé)
+serving = None
+
+# Chargement du modèle en arrière-plan : pandas/sklearn (via le désérialiseur)
+# ne sont importés qu'ici, hors du chemin critique de démarrage
+_model_loader = None
+_model_loader_lock = threading.Lock()
+model_load_seconds = None
+model_load_error = None
 
 def load_model():
     """Charger le meilleur modèle sauvegardé"""
-    global model, model_info
+    global serving
     
+    # Tout est construit en variables locales, puis publié d'un bloc à la fin
+    model_info = None
+    pooled_forest = degraded_model = segment_registry = None
     try:
-        # Utiliser le chemin absolu basé sur le répertoire du script
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        model_dir = os.path.join(script_dir, "saved_models")
+        model_dir = model_store.MODEL_DIR
         
         # Vérifier que le dossier existe
         if not os.path.exists(model_dir):
-            raise FileNotFoundError(f"Dossier 'saved_models' introuvable dans: {script_dir}")
+            raise FileNotFoundError(f"Dossier 'saved_models' introuvable dans: {model_store.BASE_DIR}")
         
-        print(f"  Recherche dans: {model_dir}")
+        request_log.info(f"Recherche dans: {model_dir}", event="model_load")
         
         # Lister tous les fichiers dans le dossier
         all_files = os.listdir(model_dir)
-        print(f"  Fichiers trouvés: {len(all_files)}")
+        request_log.info(f"Fichiers trouvés: {len(all_files)}", event="model_load")
         
         # Trouver le modèle le plus récent
-        model_files = [f for f in all_files 
-                      if f.startswith("best_model_") and f.endswith(".joblib")]
+        model_path = model_store.latest_model_path(model_dir)
         
-        if not model_files:
-            print(f"   Aucun fichier .joblib trouvé dans {model_dir}")
-            print(f" 📂 Fichiers présents: {', '.join(all_files[:10])}")
+        if model_path is None:
+            request_log.warning(f"Aucun fichier .joblib trouvé dans {model_dir}", event="model_load",
+                                files=all_files[:10])
             raise FileNotFoundError("Aucun modèle trouvé")
         
-        print(f" {len(model_files)} modèle(s) trouvé(s)")
-        
-        # Prendre le plus récent
-        latest_model = sorted(model_files)[-1]
-        model_path = os.path.join(model_dir, latest_model)
-        
-        print(f"  Chargement du modèle: {latest_model}")
+        latest_model = os.path.basename(model_path)
+        request_log.info(f"Chargement du modèle: {latest_model}", event="model_load")
         
         # Charger le modèle
-        model = joblib.load(model_path)
-        print(f" ✅ Modèle chargé avec succès: {latest_model}")
+        model = model_store.load_model(model_path)
+        model_version = latest_model
+        model_features = list(getattr(model, 'feature_names_in_', []))
+        request_log.info(f"Modèle chargé avec succès: {latest_model}", event="model_load",
+                         model_version=latest_model)
         
         # Charger les métadonnées si disponibles
-        metadata_files = [f for f in all_files 
-                         if f.startswith("model_metadata_") and f.endswith(".json")]
-        if metadata_files:
-            latest_metadata = sorted(metadata_files)[-1]
-            metadata_path = os.path.join(model_dir, latest_metadata)
-            
-            with open(metadata_path, 'r') as f:
-                model_info = json.load(f)
-            print(f" ✅ Métadonnées chargées: {latest_metadata}")
+        metadata_path = model_store.latest_metadata_path(model_dir)
+        if metadata_path:
+            model_info = model_store.load_metadata(metadata_path)
+            request_log.info(f"Métadonnées chargées: {os.path.basename(metadata_path)}", event="model_load")
         else:
-            print(f" ⚠️  Aucune métadonnée trouvée")
+            request_log.warning("Aucune métadonnée trouvée", event="model_load")
+        
+        # Seuils de décision calibrés (threshold_optimizer.py), sinon défauts
+        decision_thresholds = scoring.resolve_thresholds(model_info)
+        request_log.info(f"Seuils de décision: fraude > {decision_thresholds['fraud']:.3f}, "
+                         f"revue > {decision_thresholds['review']:.3f}", event="model_load",
+                         thresholds=decision_thresholds)
+        if decision_thresholds.segments is not None:
+            request_log.info(f"Seuils par segment ({', '.join(decision_thresholds.segments.columns)}): "
+                             f"table de {len(decision_thresholds.segments)} cases", event="model_load")
+        
+        # Gros lots scorés sur un pool de processus (parallel_inference.py)
+        if int(os.environ.get('PARALLEL_INFERENCE_WORKERS', 0)) > 0:
+            import parallel_inference
+            pooled_forest = parallel_inference.PooledForest(model, model_path)
+            model = pooled_forest
+            request_log.info(f"Pool d'inférence: {pooled_forest.workers} processus "
+                             f"pour les lots de {pooled_forest.min_rows:,}+ lignes", event="model_load")
         
+        # Cascade optionnelle : pré-filtre léger, forêt pour la bande incertaine
+        if os.environ.get('CASCADE_ENABLED', '0') == '1':
+            import cascade
+            cascade_model = cascade.load_cascade(model, model_path, model_info)
+            if cascade_model is not None:
+                model = cascade_model
+                request_log.info(f"Cascade activée: forêt pour ]{model.low:.3f}, {model.high:.3f}]",
+                                 event="model_load")
+            else:
+                request_log.warning("CASCADE_ENABLED=1 mais aucune cascade calibrée (python cascade.py)",
+                                    event="model_load")
+        
+        # Modèle dégradé servi en surcharge (admission.py) : premiers arbres de la forêt
+        if admission.ADMISSION_ENABLED:
+            degraded_model = admission.cheap_model(model, decision_thresholds["fraud"],
+                                                   decision_thresholds.segments)
+        
+        # Modèles par segment (model_registry.py), chargés à la demande
+        if model_registry.SEGMENT_COLUMN:
+            segment_registry = model_registry.ModelRegistry(model, decision_thresholds)
+            segments = segment_registry.segment_paths()
+            request_log.info(f"Modèles par segment ({model_registry.SEGMENT_COLUMN}): "
+                             f"{', '.join(segments) if segments else 'aucun, modèle global'}", event="model_load")
+        
+        # Publication atomique : modèle, seuils et table par segment ensemble
+        serving = ServingState(model, model_info, model_version, decision_thresholds, model_features,
+                               pooled_forest=pooled_forest, degraded_model=degraded_model,
+                               segment_registry=segment_registry, model_path=model_path)
         return True
         
     except Exception as e:
-        print(f" ❌ Erreur chargement modèle: {e}")
-        import traceback
-        traceback.print_exc()
+        request_log.exception(f"Erreur chargement modèle: {e}", event="model_load")
         return False
 
+def _load_model_in_background():
+    global model_load_seconds, model_load_error
+    start = time.perf_counter()
+    if load_model():
+        model_load_seconds = time.perf_counter() - start
+        request_log.info(f"API prête (modèle chargé en {model_load_seconds:.2f}s)", event="ready",
+                         model_version=serving.model_version, load_seconds=round(model_load_seconds, 3))
+        # Reprendre les lots interrompus par un redémarrage, sans attendre un appel à /jobs
+        # (gunicorn n'exécute pas le bloc __main__), avec le modèle que l'API sert
+        jobs.start_dispatcher(serving.model_path)
+    else:
+        model_load_error = "Impossible de charger le modèle"
+
+def start_model_loading():
+    """Démarrer le chargement du modèle en arrière-plan (une fois par processus)"""
+    global _model_loader
+    with _model_loader_lock:
+        if _model_loader is None:
+            _model_loader = threading.Thread(target=_load_model_in_background,
+                                             name="model-loader", daemon=True)
+            _model_loader.start()
+    return _model_loader
+
+def wait_until_ready(timeout=None):
+    """Attendre la fin du chargement du modèle ; True si le modèle est prêt"""
+    start_model_loading().join(timeout)
+    return serving is not None
+
 @app.route('/', methods=['GET'])
 def home():
     """Page d'accueil avec interface web"""
-    return render_template('index.html')
+    return ui_assets.respond(ui_assets.pages["index.html"], request)
+
+@app.route('/static/<path:filename>', endpoint='static', methods=['GET'])
+def static_file(filename):
+    """Fichiers de static/ (URL empreintes : cache immuable)"""
+    asset, cache_control = ui_assets.lookup(filename)
+    if asset is None:
+        abort(404)
+    return ui_assets.respond(asset, request, cache_control)
 
 @app.route('/api', methods=['GET'])
 def api_info():
@@ -92,113 +209,316 @@ def api_info():
         "message": "API de Détection de Fraude Bancaire",
         "version": "1.0.0",
         "status": "active",
-        "model_loaded": model is not None,
+        "model_loaded": serving is not None,
         "endpoints": {
             "/": "Interface web",
             "/api": "Informations sur l'API",
             "/health": "Vérification de santé",
-            "/predict": "Prédiction de fraude (POST)"
+            "/livez": "Liveness (processus actif)",
+            "/readyz": "Readiness (modèle chargé)",
+            "/predict": "Prédiction de fraude (POST)",
+            "/jobs": "Lot de prédictions asynchrone (POST)",
+            "/jobs/<job_id>": "Progression et résultats d'un lot",
+            "/admission/stats": "Compteurs du contrôle d'admission",
+            "/logs/stats": "Compteurs du journal structuré",
+            "/audit/stats": "Compteurs du journal d'audit",
+            "/history": "Historique paginé des analyses"
         },
         "timestamp": datetime.now().isoformat()
     })
 
+@app.route('/livez', methods=['GET'])
+def livez():
+    """Liveness : le processus répond, même pendant le chargement du modèle"""
+    return jsonify({
+        "status": "alive",
+        "uptime_seconds": round(time.time() - started_at, 3)
+    })
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness : le modèle est chargé et l'API peut scorer"""
+    state = serving
+    if state is not None:
+        return jsonify({
+            "status": "ready",
+            "model_version": state.model_version,
+            "model_load_seconds": round(model_load_seconds, 3) if model_load_seconds else None
+        })
+    
+    status = "failed" if model_load_error else "loading"
+    return jsonify({"status": status, "error": model_load_error}), 503
+
 @app.route('/health', methods=['GET'])
 def health():
     """Vérification de santé du service"""
     return jsonify({
-        "status": "healthy" if model is not None else "unhealthy",
-        "model_loaded": model is not None,
+        "status": "healthy" if serving is not None else "unhealthy",
+        "model_loaded": serving is not None,
         "timestamp": datetime.now().isoformat()
     })
 
 @app.route('/predict', methods=['POST'])
+@profiling.profiled
 def predict():
     """Prédiction de fraude"""
     try:
-        if model is None:
+        state = serving
+        if state is None:
+            if model_load_error is None:
+                return jsonify({"error": "Modèle en cours de chargement"}), 503
             return jsonify({"error": "Modèle non chargé"}), 500
         
-        # Récupérer les données
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "Aucune donnée fournie"}), 400
-        
-        # Convertir en DataFrame
-        if isinstance(data, dict):
-            df = pd.DataFrame([data])
-        elif isinstance(data, list):
-            df = pd.DataFrame(data)
-        else:
-            return jsonify({"error": "Format de données invalide"}), 400
-        
-        # Faire la prédiction
-        predictions = model.predict(df)
-        
-        # Obtenir les probabilités si disponibles
-        probabilities = None
-        if hasattr(model, 'predict_proba'):
-            probabilities = model.predict_proba(df).tolist()
-        
-        # Préparer la réponse
-        results = []
-        for i, pred in enumerate(predictions):
-            result = {
-                "transaction_id": i,
-                "prediction": int(pred),
-                "prediction_label": "fraud" if pred == 1 else "no_fraud",
-                "timestamp": datetime.now().isoformat()
-            }
-            
-            if probabilities:
-                result["confidence"] = {
-                    "no_fraud": float(probabilities[i][0]),
-                    "fraud": float(probabilities[i][1])
-                }
+        # Récupérer les données et les convertir en DataFrame
+        with request_log.stage("parse"):
+            data = request.get_json()
+            if not data:
+                return jsonify({"error": "Aucune donnée fournie"}), 400
             
-            results.append(result)
+            try:
+                df = scoring.to_dataframe(data)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
         
-        return jsonify({
+        records = [data] if isinstance(data, dict) else data
+        request_log.annotate(rows=len(df), model_version=state.model_version)
+        
+        # Contrôle d'admission : rejeter ou dégrader tout de suite plutôt
+        # que de laisser la requête attendre le timeout
+        controller = admission.get_controller()
+        ticket = None
+        if controller is not None:
+            ticket = controller.admit(len(df), admission.queued_seconds(request.headers.get("X-Request-Start")))
+            request_log.annotate(admission=ticket.decision)
+            if ticket.decision == admission.SHED:
+                return _shed_response(ticket)
+        
+        degraded = None
+        try:
+            if ticket is not None and ticket.decision == admission.DEGRADE:
+                with request_log.stage("score"):
+                    results, degraded = _degraded_results(state, controller, records, df)
+                if results is None:
+                    ticket.decision = admission.SHED
+                    return _shed_response(ticket)
+                request_log.annotate(degraded=degraded)
+            else:
+                # Faire la prédiction (chaque segment par son modèle s'il en a un)
+                with request_log.stage("score"):
+                    if state.segment_registry is not None:
+                        results = state.segment_registry.score_frame(df, thresholds=state.decision_thresholds)
+                    else:
+                        results = scoring.score_frame(state.model, df, thresholds=state.decision_thresholds)
+                if ticket is not None and ticket.kind == admission.INTERACTIVE:
+                    controller.cache.put(records, results)
+        finally:
+            if ticket is not None:
+                controller.release(ticket, degraded)
+        
+        # Journal d'audit : simple dépôt dans une file, l'écriture est asynchrone
+        with request_log.stage("record"):
+            audit_log.record(records, results, state.model_version)
+            history_store.record(records, results, state.model_version)
+            # Capture échantillonnée pour le rejeu (traffic_replay.py), si activée
+            if state.model_features:
+                traffic_capture.record(records, results, state.model_features, state.model_version)
+        
+        response = {
             "predictions": results,
             "model_info": {
-                "name": model_info.get('model_name', 'Unknown') if model_info else 'Unknown',
-                "f1_score": model_info.get('f1_score', 0) if model_info else 0
+                "name": state.model_info.get('model_name', 'Unknown') if state.model_info else 'Unknown',
+                "f1_score": state.model_info.get('f1_score', 0) if state.model_info else 0,
+                "thresholds": state.decision_thresholds
             },
             "timestamp": datetime.now().isoformat()
-        })
+        }
+        if degraded:
+            response["degraded"] = True
+        return jsonify(response)
         
     except Exception as e:
+        request_log.exception(f"Erreur lors de la prédiction: {e}")
         return jsonify({"error": f"Erreur lors de la prédiction: {str(e)}"}), 500
 
+def _shed_response(ticket):
+    """Rejet immédiat : 429 pour un lot (à réessayer ou soumettre à /jobs), 503 sinon"""
+    if ticket.kind == admission.BATCH:
+        message = "Capacité de lot saturée : réessayer plus tard ou utiliser /jobs"
+        status = 429
+    else:
+        message = "Service surchargé : réessayer plus tard"
+        status = 503
+    return jsonify({"error": message, "retry_after": ticket.retry_after}), status, \
+        {"Retry-After": str(ticket.retry_after)}
+
+def _degraded_results(state, controller, records, df):
+    """Résultats en surcharge : en cache si la transaction a déjà été scorée,
+    sinon modèle dégradé ; (None, None) si aucun des deux n'est disponible"""
+    results = [controller.cache.get(record) for record in records]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing and state.degraded_model is None:
+        return None, None
+    
+    for i, result in enumerate(results):
+        if result is not None:
+            results[i] = dict(result, transaction_id=i, degraded="cache")
+    if missing:
+        cheap_results = scoring.score_frame(state.degraded_model, df.iloc[missing],
+                                            thresholds=state.decision_thresholds)
+        for i, result in zip(missing, cheap_results):
+            results[i] = dict(result, transaction_id=i, degraded="cheap_model")
+    return results, {"cache": len(records) - len(missing), "cheap_model": len(missing)}
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """Soumettre un lot de prédictions traité en arrière-plan"""
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "Aucune donnée fournie"}), 400
+    
+    # Nouvelle tentative d'un client (même Idempotency-Key) : renvoyer le job déjà créé
+    idempotency_key = request.headers.get("Idempotency-Key")
+    try:
+        # Référence à un fichier déposé dans le dossier d'entrée des jobs
+        if isinstance(data, dict) and "file" in data:
+            job = jobs.submit_file(data["file"], exact=bool(data.get("exact", False)),
+                                   idempotency_key=idempotency_key)
+        else:
+            exact = False
+            records = data
+            if isinstance(data, dict) and "transactions" in data:
+                records = data["transactions"]
+                exact = bool(data.get("exact", False))
+            if isinstance(records, dict):
+                records = [records]
+            job = jobs.submit_records(records, exact=exact, idempotency_key=idempotency_key)
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    jobs.start_dispatcher()
+    job["status_url"] = f"/jobs/{job['job_id']}"
+    return jsonify(job), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Progression d'un lot, et ses résultats une fois terminé"""
+    # Reprendre les jobs en attente si ce worker vient de redémarrer
+    jobs.start_dispatcher()
+    
+    job = jobs.get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job introuvable"}), 404
+    
+    if job["status"] == "completed":
+        offset = request.args.get("offset", 0, type=int)
+        limit = request.args.get("limit", type=int)
+        job["results"] = jobs.get_results(job_id, offset=max(offset, 0), limit=limit)
+    
+    return jsonify(job)
+
+@app.route('/history', methods=['GET'])
+def history():
+    """Historique paginé et filtrable des transactions analysées"""
+    try:
+        page = history_store.query(
+            start=request.args.get("start"),
+            end=request.args.get("end"),
+            risk_band=request.args.get("risk_band") or None,
+            country=request.args.get("country", type=int),
+            cursor=request.args.get("cursor"),
+            limit=request.args.get("limit", history_store.DEFAULT_PAGE_SIZE, type=int)
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(page)
+
+@app.route('/admin/profile', methods=['GET', 'DELETE'])
+def admin_profile():
+    """Profils CPU agrégés de /predict (voir profiling.py)"""
+    if not profiling.ENABLED:
+        return jsonify({"error": "Profilage désactivé (PROFILE_SAMPLE_RATE / PROFILE_ADMIN_TOKEN)"}), 404
+    # Piles d'appels internes : jamais servies sans jeton, même si l'échantillonnage est actif
+    if not profiling.PROFILE_ADMIN_TOKEN:
+        return jsonify({"error": "Endpoint désactivé sans PROFILE_ADMIN_TOKEN"}), 403
+    if not profiling.is_admin():
+        return jsonify({"error": "Accès refusé"}), 403
+    
+    if request.method == 'DELETE':
+        profiling.aggregator.reset()
+        return jsonify({"status": "reset"})
+    
+    top = request.args.get("top", 20, type=int)
+    sort = request.args.get("sort", "tottime")
+    return jsonify(profiling.aggregator.summary(top=top, sort=sort))
+
+@app.route('/admission/stats', methods=['GET'])
+def admission_stats():
+    """Compteurs du contrôle d'admission (acceptées, dégradées, rejetées)"""
+    return jsonify(admission.stats())
+
+@app.route('/logs/stats', methods=['GET'])
+def logs_stats():
+    """Compteurs du journal structuré (file, pertes, coût par événement)"""
+    return jsonify(request_log.stats())
+
+@app.route('/audit/stats', methods=['GET'])
+def audit_stats():
+    """Compteurs du journal d'audit (file, lots écrits, pertes, overhead)"""
+    return jsonify(audit_log.stats())
+
 @app.route('/model-info', methods=['GET'])
 def model_info_endpoint():
     """Informations sur le modèle"""
-    if model_info:
-        return jsonify(model_info)
+    state = serving
+    if state is not None and state.model_info:
+        info = dict(state.model_info)
+        if hasattr(state.model, 'stats'):
+            info["cascade_stats"] = state.model.stats()
+        if state.segment_registry is not None:
+            info["segments"] = state.segment_registry.stats()
+        if state.pooled_forest is not None:
+            info["parallel_inference"] = state.pooled_forest.pool_stats()
+        return jsonify(info)
     else:
         return jsonify({"error": "Informations du modèle non disponibles"}), 404
 
+# Démarrer le chargement dès l'import (gunicorn importe app:app dans chaque worker)
+if os.environ.get('MODEL_BACKGROUND_LOAD', '1') == '1':
+    start_model_loading()
+
 if __name__ == '__main__':
-    print("🚀 Démarrage de l'API de Détection de Fraude...")
+    request_log.info("Démarrage de l'API de Détection de Fraude...", event="startup")
     
-    # Charger le modèle au démarrage
-    if load_model():
-        print(" ✅ Modèle chargé avec succès")
-        
-        # Récupérer le port depuis l'environnement (pour déploiement public)
-        port = int(os.environ.get('PORT', 8080))
-        host = os.environ.get('HOST', '0.0.0.0')
-        
-        print(f"  API disponible sur: http://{host}:{port}")
-        print("  Endpoints:")
-        print("   GET  /           - Interface web")
-        print("   GET  /api        - Informations sur l'API")
-        print("   GET  /health     - Vérification de santé")
-        print("   GET  /model-info - Informations du modèle")
-        print("   POST /predict    - Prédiction de fraude")
-        
-        # Démarrer l'API
-        app.run(host=host, port=port, debug=False)
-    else:
-        print("  Impossible de charger le modèle")
-        print("Vérifiez que le dossier 'saved_models' contient des modèles valides")
-
+    # Le modèle se charge en arrière-plan : l'API répond immédiatement sur
+    # /livez, et /readyz passe à "ready" une fois le modèle chargé
+    start_model_loading()
+    
+    # Récupérer le port depuis l'environnement (pour déploiement public)
+    port = int(os.environ.get('PORT', 8080))
+    host = os.environ.get('HOST', '0.0.0.0')
+    
+    request_log.info("\n".join([
+        f"API disponible sur: http://{host}:{port}",
+        "  Endpoints:",
+        "   GET  /           - Interface web",
+        "   GET  /api        - Informations sur l'API",
+        "   GET  /health     - Vérification de santé",
+        "   GET  /livez      - Liveness (processus actif)",
+        "   GET  /readyz     - Readiness (modèle chargé)",
+        "   GET  /model-info - Informations du modèle",
+        "   POST /predict    - Prédiction de fraude",
+        "   POST /jobs       - Lot de prédictions asynchrone",
+        "   GET  /jobs/<id>  - Progression d'un lot",
+        "   GET  /admission/stats - Compteurs du contrôle d'admission",
+        "   GET  /logs/stats - Compteurs du journal structuré",
+        "   GET  /audit/stats - Compteurs du journal d'audit",
+        "   GET  /history    - Historique paginé des analyses"
+    ]), event="startup", host=host, port=port, log_file=request_log.log_file())
+    
+    # Reprendre les lots interrompus par un redémarrage
+    jobs.start_dispatcher()
+    
+    # Démarrer l'API
+    app.run(host=host, port=port, debug=False)
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Journal d'audit des transactions scorées
+
+Chaque transaction scorée est persistée (features, probabilité, prédiction,
+version du modèle, horodatage) dans une base SQLite en mode WAL, en ajout
+seul. Le chemin de requête se contente de déposer le lot dans une file
+mémoire bornée ; un thread d'arrière-plan vide la file par lots. Si la file
+est pleine, les enregistrements sont comptés comme perdus plutôt que de
+bloquer /predict.
+"""
+
+import os
+import json
+import time
+import queue
+import atexit
+import sqlite3
+import threading
+from collections import deque
+from datetime import datetime
+
+import model_store
+import request_log
+
+# Configuration (surchargeable par variables d'environnement)
+AUDIT_ENABLED = os.environ.get('AUDIT_LOG_ENABLED', '1') == '1'
+AUDIT_DB_PATH = os.environ.get('AUDIT_DB_PATH', os.path.join(model_store.BASE_DIR, "audit", "audit.db"))
+AUDIT_QUEUE_SIZE = int(os.environ.get('AUDIT_QUEUE_SIZE', 10000))
+AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', 500))
+AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL', 0.5))
+AUDIT_ENQUEUE_TIMEOUT = float(os.environ.get('AUDIT_ENQUEUE_TIMEOUT', 0))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    scored_at TEXT NOT NULL,
+    model_version TEXT,
+    prediction INTEGER NOT NULL,
+    probability REAL,
+    features TEXT NOT NULL
+);
+"""
+
+
+class AuditSink:
+    """File mémoire + thread d'écriture par lots vers SQLite (WAL)"""
+
+    thread_name = "audit-writer"
+    schema = _SCHEMA
+    insert_sql = (
+        "INSERT INTO audit_log (scored_at, model_version, prediction, probability, features) "
+        "VALUES (?, ?, ?, ?, ?)"
+    )
+
+    def __init__(self, db_path=AUDIT_DB_PATH, queue_size=AUDIT_QUEUE_SIZE,
+                 batch_size=AUDIT_BATCH_SIZE, flush_interval=AUDIT_FLUSH_INTERVAL,
+                 enqueue_timeout=AUDIT_ENQUEUE_TIMEOUT):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # Compteurs (en transactions, pas en requêtes)
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.write_errors = 0
+        self.last_flush_ms = 0.0
+        # Coût d'enqueue côté requête, pour mesurer l'overhead sur /predict
+        self._enqueue_us = deque(maxlen=10000)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        """Arrêter le thread après avoir vidé la file"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def record(self, records, results, model_version=None):
+        """Déposer un lot scoré dans la file (non bloquant par défaut)"""
+        start = time.perf_counter()
+        count = len(results)
+        item = (datetime.now().isoformat(), model_version, records, results)
+        try:
+            if self.enqueue_timeout > 0:
+                self._queue.put(item, timeout=self.enqueue_timeout)
+            else:
+                self._queue.put_nowait(item)
+            accepted = True
+        except queue.Full:
+            accepted = False
+
+        with self._lock:
+            if accepted:
+                self.enqueued += count
+            else:
+                self.dropped += count
+            self._enqueue_us.append((time.perf_counter() - start) * 1e6)
+        return accepted
+
+    def stats(self):
+        with self._lock:
+            samples = sorted(self._enqueue_us)
+            return {
+                "enabled": True,
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "dropped": self.dropped,
+                "batches": self.batches,
+                "write_errors": self.write_errors,
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "last_flush_ms": round(self.last_flush_ms, 3),
+                "enqueue_overhead_us": {
+                    "p50": round(_percentile(samples, 50), 2),
+                    "p99": round(_percentile(samples, 99), 2),
+                    "max": round(samples[-1], 2) if samples else 0.0
+                }
+            }
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # En WAL, NORMAL reste durable face à un crash de l'application
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(self.schema)
+        return conn
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            while True:
+                batch = self._drain()
+                if batch:
+                    self._write(conn, batch)
+                elif self._stop.is_set():
+                    break
+        finally:
+            conn.close()
+
+    def _drain(self):
+        """Récupérer jusqu'à batch_size transactions ou attendre flush_interval"""
+        batch = []
+        rows = 0
+        deadline = time.monotonic() + self.flush_interval
+        while rows < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item[3])
+        return batch
+
+    def _rows(self, batch):
+        """Convertir les lots de la file en lignes SQL"""
+        rows = []
+        for scored_at, model_version, records, results in batch:
+            for record, result in zip(records, results):
+                confidence = result.get("confidence")
+                rows.append((
+                    scored_at,
+                    model_version,
+                    result["prediction"],
+                    confidence["fraud"] if confidence else None,
+                    json.dumps(record, separators=(",", ":"))
+                ))
+        return rows
+
+    def _write(self, conn, batch):
+        start = time.perf_counter()
+        count = sum(len(item[3]) for item in batch)
+
+        try:
+            rows = self._rows(batch)
+            with conn:
+                conn.executemany(self.insert_sql, rows)
+        except Exception as e:
+            # Ne jamais laisser mourir le thread d'écriture sur un lot invalide
+            request_log.exception(f"Erreur écriture {self.thread_name}: {e}", event="background_error",
+                                  stage=self.thread_name, rows=count)
+            with self._lock:
+                self.write_errors += 1
+                self.dropped += count
+            return
+
+        with self._lock:
+            self.written += count
+            self.batches += 1
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_sink():
+    """Sink partagé du processus (None si l'audit est désactivé)"""
+    global _sink
+    if not AUDIT_ENABLED:
+        return None
+    with _sink_lock:
+        if _sink is None:
+            _sink = AuditSink().start()
+            atexit.register(_sink.stop)
+    return _sink
+
+
+def record(records, results, model_version=None):
+    """Raccourci : journaliser un lot scoré si l'audit est activé"""
+    sink = get_sink()
+    if sink is not None:
+        sink.record(records, results, model_version)
+
+
+def stats():
+    sink = get_sink()
+    return sink.stats() if sink is not None else {"enabled": False}
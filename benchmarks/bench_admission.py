@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark : /predict en surcharge, sans et avec contrôle d'admission
+
+Lance l'API sous gunicorn (1 worker gthread) et envoie, depuis N_CLIENTS
+threads, des transactions individuelles en continu pendant DURATION
+secondes, plus un lot de 5 000 lignes toutes les secondes. Compare la
+latence des requêtes interactives (médiane, p99) et leur répartition :
+complètes, dégradées, rejetées, en erreur.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import subprocess
+import urllib.request
+import urllib.error
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import model_store
+from bench_startup import free_port, wait_for
+
+N_CLIENTS = 24
+DURATION = 10
+BATCH_ROWS = 5000
+LATENCY_BUDGET_MS = 100
+
+
+def start_server(port, admission):
+    env = {**os.environ, "AUDIT_LOG_ENABLED": "0", "HISTORY_ENABLED": "0", "PYTHONWARNINGS": "ignore",
+           "ADMISSION_ENABLED": "1" if admission else "0",
+           "ADMISSION_LATENCY_BUDGET_MS": str(LATENCY_BUDGET_MS)}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:app", "--bind", f"127.0.0.1:{port}",
+         "--workers", "1", "--worker-class", "gthread", "--threads", "32", "--timeout", "120"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    wait_for(f"http://127.0.0.1:{port}/readyz", time.perf_counter() + 120)
+    return process
+
+
+def post(url, payload, timeout=30):
+    request = urllib.request.Request(f"{url}/predict", data=json.dumps(payload).encode(),
+                                     headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            body = json.loads(response.read())
+            outcome = "degraded" if body.get("degraded") else "full"
+    except urllib.error.HTTPError as e:
+        outcome = "shed" if e.code in (429, 503) else "error"
+    except OSError:
+        outcome = "error"
+    return outcome, time.perf_counter() - start
+
+
+def run(url, records):
+    stop = time.perf_counter() + DURATION
+    interactive, batches = [], []
+
+    def client(seed):
+        rng = np.random.default_rng(seed)
+        while time.perf_counter() < stop:
+            interactive.append(post(url, records[rng.integers(len(records))]))
+
+    def batch_sender():
+        batch = [records[i % len(records)] for i in range(BATCH_ROWS)]
+        while time.perf_counter() < stop:
+            batches.append(post(url, batch))
+            time.sleep(1)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(N_CLIENTS)]
+    threads.append(threading.Thread(target=batch_sender))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return interactive, batches
+
+
+def summarize(label, interactive, batches):
+    latencies = np.array([seconds for _, seconds in interactive]) * 1000
+    outcomes = [outcome for outcome, _ in interactive]
+    counts = {name: outcomes.count(name) for name in ("full", "degraded", "shed", "error")}
+    batch_outcomes = [outcome for outcome, _ in batches]
+    print(f"  {label:<18}{len(interactive) / DURATION:>8.0f}{np.median(latencies):>9.0f}"
+          f"{np.percentile(latencies, 99):>9.0f}{counts['full']:>8}{counts['degraded']:>9}"
+          f"{counts['shed']:>8}{counts['error']:>7}   {batch_outcomes.count('full')}/{len(batches)}")
+
+
+def main():
+    print("📊 BENCHMARK - CONTRÔLE D'ADMISSION")
+    print("=" * 88)
+    records = model_store.load_test_data()['X_test'].to_dict('records')
+    print(f"  {N_CLIENTS} clients interactifs + 1 lot de {BATCH_ROWS:,} lignes/s, {DURATION}s, "
+          f"budget {LATENCY_BUDGET_MS} ms\n")
+    print(f"  {'Mode':<18}{'Req/s':>8}{'p50 ms':>9}{'p99 ms':>9}{'Compl.':>8}{'Dégrad.':>9}"
+          f"{'Rejet':>8}{'Err.':>7}   Lots servis")
+
+    for label, enabled in (("Sans admission", False), ("Avec admission", True)):
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+        process = start_server(port, enabled)
+        try:
+            summarize(label, *run(url, records))
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark : overhead du journal d'audit sur la latence de /predict
+
+Compare p50/p99 de /predict (client de test Flask, sans réseau) avec
+l'audit désactivé puis activé, et affiche les compteurs du sink.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+warnings.filterwarnings('ignore')
+
+import numpy as np
+
+import app
+import audit_log
+import model_store
+
+N_REQUESTS = 500
+
+
+def measure(client, payloads):
+    latencies = []
+    for payload in payloads:
+        start = time.perf_counter()
+        response = client.post('/predict', json=payload)
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.get_json()
+    return np.percentile(latencies, [50, 99])
+
+
+def main():
+    print("📊 BENCHMARK - OVERHEAD DU JOURNAL D'AUDIT")
+    print("=" * 50)
+
+    app.wait_until_ready()
+    X_test = model_store.load_test_data()['X_test']
+    records = X_test.to_dict(orient='records')
+    payloads = [records[i % len(records)] for i in range(N_REQUESTS)]
+    client = app.app.test_client()
+
+    # Préchauffage
+    measure(client, payloads[:20])
+
+    audit_log.AUDIT_ENABLED = False
+    p50_off, p99_off = measure(client, payloads)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        audit_log.AUDIT_ENABLED = True
+        audit_log._sink = audit_log.AuditSink(db_path=os.path.join(tmp, "audit.db")).start()
+        p50_on, p99_on = measure(client, payloads)
+        audit_log._sink.stop()
+        stats = audit_log._sink.stats()
+
+    print(f"\n{N_REQUESTS} requêtes /predict (1 transaction)")
+    print(f"   Audit désactivé : p50 {p50_off:.2f} ms | p99 {p99_off:.2f} ms")
+    print(f"   Audit activé    : p50 {p50_on:.2f} ms | p99 {p99_on:.2f} ms")
+    print(f"   Overhead p99    : {p99_on - p99_off:+.2f} ms")
+    print(f"   Enqueue p99     : {stats['enqueue_overhead_us']['p99']} µs")
+    print(f"   Écrites: {stats['written']} | Perdues: {stats['dropped']} | Lots: {stats['batches']}")
+
+
+if __name__ == "__main__":
+    main()
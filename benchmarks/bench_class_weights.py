@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark : sur-échantillonnage (notebook) vs pondération des classes (train.py)
+
+Sur un CSV synthétique déséquilibré, les deux stratégies sont comparées sur la
+même division des lignes uniques : le sur-échantillonnage n'est appliqué qu'au
+train (sinon le test contiendrait des copies de lignes d'entraînement et le
+F1 serait surestimé). Mesures : temps d'entraînement, pic mémoire
+(tracemalloc, matrice d'entraînement comprise) et F1 sur le test.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import dataset_cache
+import train
+from bench_data_prep import generate_csv
+
+N_ROWS = int(os.environ.get('BENCH_BALANCE_ROWS', 200_000))
+FRAUD_RATE = float(os.environ.get('BENCH_BALANCE_FRAUD_RATE', 0.1))
+MODELS = os.environ.get('BENCH_BALANCE_MODELS', 'logreg,tree,forest,nb').split(',')
+
+
+def upsampled_rows(y, rows, seed=train.RANDOM_STATE):
+    """Indices du train après sur-échantillonnage de la classe minoritaire"""
+    from sklearn.utils import resample
+
+    labels, counts = np.unique(y[rows], return_counts=True)
+    majority = rows[y[rows] == labels[np.argmax(counts)]]
+    minority = rows[y[rows] == labels[np.argmin(counts)]]
+    return np.concatenate([majority, resample(minority, replace=True, n_samples=len(majority),
+                                              random_state=seed)])
+
+
+def measure(dataset, train_rows, test_rows, balancing, key):
+    from sklearn.metrics import f1_score
+
+    y = dataset.labels()
+    tracemalloc.start()
+    start = time.perf_counter()
+    # La matrice d'entraînement fait partie du coût : les copies y sont matérialisées
+    X_train = dataset.frame(train_rows)
+    model = train.candidate_models(balancing, [key])[train.MODEL_NAMES[key]]
+    model.fit(X_train, y[train_rows])
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+
+    f1 = f1_score(y[test_rows], model.predict(dataset.frame(test_rows)))
+    return elapsed, peak, f1, len(train_rows)
+
+
+def main():
+    warnings.filterwarnings('ignore')
+    print("📊 BENCHMARK - SUR-ÉCHANTILLONNAGE VS POIDS DE CLASSE")
+    print("=" * 72)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "transactions.csv")
+        generate_csv(csv_path, N_ROWS, fraud_rate=FRAUD_RATE)
+        dataset = dataset_cache.get_dataset(csv_path, cache_dir=os.path.join(tmp, "cache"))
+        train_rows, test_rows = (np.asarray(idx) for idx in dataset.split("none"))
+        y = dataset.labels()
+        print(f"  {len(dataset):,} lignes uniques, {y.mean() * 100:.1f}% de fraudes, "
+              f"test: {len(test_rows):,} lignes\n")
+
+        print(f"  {'Modèle':<24}{'Stratégie':<11}{'Lignes':>10}{'Fit (s)':>10}{'Pic (Mo)':>10}{'F1':>8}")
+        for key in MODELS:
+            for balancing, rows in (("upsample", upsampled_rows(y, train_rows)),
+                                    ("weights", train_rows)):
+                elapsed, peak, f1, n_rows = measure(dataset, rows, test_rows, balancing, key)
+                print(f"  {train.MODEL_NAMES[key]:<24}{balancing:<11}{n_rows:>10,}"
+                      f"{elapsed:>10.2f}{peak:>10.1f}{f1:>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark : client officiel (fraud_client.py) vs une requête par transaction
+
+Lance l'API sous gunicorn (workers gthread, qui gardent les connexions
+ouvertes) et score les mêmes transactions :
+  - motif naïf des scripts de test : un POST /predict par transaction,
+    nouvelle connexion à chaque appel, séquentiel puis sur plusieurs threads ;
+  - FraudClient.score() séquentiel (connexions persistantes seules) ;
+  - FraudClient.score() depuis plusieurs threads (appels regroupés) ;
+  - AsyncFraudClient.score() avec asyncio.gather ;
+  - FraudClient.predict() par lots explicites.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import model_store
+from bench_startup import free_port, wait_for
+from fraud_client import FraudClient, AsyncFraudClient
+
+N_TRANSACTIONS = int(os.environ.get('BENCH_CLIENT_TRANSACTIONS', 1000))
+N_THREADS = 16
+GUNICORN_WORKERS = 2
+
+
+def start_server(port):
+    env = {**os.environ, "AUDIT_LOG_ENABLED": "0", "HISTORY_ENABLED": "0", "PYTHONWARNINGS": "ignore"}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:app", "--bind", f"127.0.0.1:{port}",
+         "--workers", str(GUNICORN_WORKERS), "--worker-class", "gthread", "--threads", "8"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    # Chaque worker charge son modèle : attendre que /readyz réponde plusieurs fois
+    deadline = time.perf_counter() + 120
+    for _ in range(GUNICORN_WORKERS * 4):
+        wait_for(f"http://127.0.0.1:{port}/readyz", deadline)
+    return process
+
+
+def naive_post(url, transaction):
+    request = urllib.request.Request(f"{url}/predict", data=json.dumps(transaction).encode(),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())["predictions"][0]
+
+
+def run_naive(url, transactions, threads=1):
+    with ThreadPoolExecutor(threads) as pool:
+        return list(pool.map(lambda t: naive_post(url, t), transactions))
+
+
+def run_client_sequential(url, transactions):
+    with FraudClient(url) as client:
+        return [client.score(t) for t in transactions], client.stats()
+
+
+def run_client_threads(url, transactions):
+    with FraudClient(url) as client, ThreadPoolExecutor(N_THREADS) as pool:
+        return list(pool.map(client.score, transactions)), client.stats()
+
+
+def run_client_async(url, transactions):
+    async def scenario():
+        async with AsyncFraudClient(url) as client:
+            results = await asyncio.gather(*(client.score(t) for t in transactions))
+            return results, client.stats()
+    return asyncio.run(scenario())
+
+
+def run_client_batches(url, transactions, size=256):
+    with FraudClient(url) as client:
+        results = []
+        for start in range(0, len(transactions), size):
+            results.extend(client.predict(transactions[start:start + size]))
+        return results, client.stats()
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    print("📊 BENCHMARK - CLIENT DE L'API")
+    print("=" * 76)
+
+    X_test = model_store.load_test_data()['X_test']
+    records = X_test.to_dict('records')
+    transactions = [records[i % len(records)] for i in range(N_TRANSACTIONS)]
+
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    process = start_server(port)
+    try:
+        run_naive(url, transactions[:50])   # échauffement
+        reference, naive_seconds = timed(run_naive, url, transactions)
+        expected = [p["prediction"] for p in reference]
+
+        scenarios = [
+            ("Naïf, séquentiel", lambda: (reference, None), naive_seconds),
+            (f"Naïf, {N_THREADS} threads", lambda: (run_naive(url, transactions, N_THREADS), None), None),
+            ("Client score(), séquentiel", lambda: run_client_sequential(url, transactions), None),
+            (f"Client score(), {N_THREADS} threads", lambda: run_client_threads(url, transactions), None),
+            ("Client asyncio, gather", lambda: run_client_async(url, transactions), None),
+            ("Client predict(), lots de 256", lambda: run_client_batches(url, transactions), None),
+        ]
+
+        print(f"  {N_TRANSACTIONS:,} transactions, gunicorn {GUNICORN_WORKERS} workers gthread\n")
+        print(f"  {'Mode':<34}{'Temps (s)':>10}{'Trans./s':>10}{'Requêtes':>10}{'Connexions':>12}")
+        for label, scenario, seconds in scenarios:
+            if seconds is None:
+                (results, stats), seconds = timed(scenario)
+            else:
+                results, stats = scenario()
+            assert [p["prediction"] for p in results] == expected, label
+            requests = stats["requests"] if stats else N_TRANSACTIONS
+            connections = stats["connections_opened"] if stats else N_TRANSACTIONS
+            print(f"  {label:<34}{seconds:>10.2f}{N_TRANSACTIONS / seconds:>10,.0f}"
+                  f"{requests:>10,}{connections:>12,}")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    main()
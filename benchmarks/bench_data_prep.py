@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark : préparation des données en mémoire (notebook) vs par blocs (data_prep.py)
+
+Génère un CSV synthétique à partir des données de test sauvegardées (bruit,
+doublons et valeurs manquantes), puis compare temps et pic mémoire
+(tracemalloc) des deux approches et vérifie que leurs résultats concordent.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+import data_prep
+import model_store
+
+N_ROWS = int(os.environ.get('BENCH_DATA_PREP_ROWS', 2_000_000))
+CHUNK_SIZE = int(os.environ.get('BENCH_DATA_PREP_CHUNK', 100_000))
+DUPLICATE_RATE = 0.05
+MISSING_RATE = 0.01
+
+
+def generate_csv(path, n_rows, seed=42, fraud_rate=None):
+    """CSV synthétique au schéma du dataset, écrit par blocs
+
+    fraud_rate : part des fraudes (par défaut celle des données de test, équilibrées).
+    """
+    rng = np.random.default_rng(seed)
+    test_data = model_store.load_test_data()
+    base = test_data['X_test'].copy()
+    base[data_prep.TARGET_COLUMN] = test_data['y_test'].to_numpy()
+
+    weights = None
+    if fraud_rate is not None:
+        is_fraud = base[data_prep.TARGET_COLUMN].to_numpy() == 1
+        weights = np.where(is_fraud, fraud_rate / is_fraud.sum(), (1 - fraud_rate) / (~is_fraud).sum())
+
+    block_size = 200_000
+    first = True
+    for start in range(0, n_rows, block_size):
+        size = min(block_size, n_rows - start)
+        block = base.iloc[rng.choice(len(base), size, p=weights)].reset_index(drop=True)
+        unique = rng.random(size) >= DUPLICATE_RATE
+        block.loc[unique, "AccountNo"] = rng.integers(1_000_000, 9_999_999, int(unique.sum()))
+        block.loc[unique, "TransactionAmount"] = np.round(rng.gamma(1.2, 30.0, int(unique.sum())), 2)
+        for column in ("Age", "TransactionAmount"):
+            block.loc[rng.random(size) < MISSING_RATE, column] = np.nan
+        block.to_csv(path, mode='w' if first else 'a', header=first, index=False)
+        first = False
+
+
+def notebook_prep(path):
+    """Préparation du notebook : tout en mémoire"""
+    df = pd.read_csv(path)
+    df = df.drop_duplicates()
+    outliers = {}
+    for col in df.select_dtypes(include=[np.number]).columns:
+        q1, q3 = df[col].quantile(0.25), df[col].quantile(0.75)
+        iqr = q3 - q1
+        outliers[col] = int(((df[col] < q1 - 1.5 * iqr) | (df[col] > q3 + 1.5 * iqr)).sum())
+    medians = {}
+    for col in df.select_dtypes(include=[np.number]).columns:
+        medians[col] = float(df[col].median())
+        if df[col].isnull().sum() > 0:
+            df[col] = df[col].fillna(medians[col])
+    return df, outliers, medians
+
+
+def traced(func, *args, **kwargs):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    warnings.filterwarnings('ignore')
+    print("📊 BENCHMARK - PRÉPARATION DES DONNÉES")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "transactions.csv")
+        output_dir = os.path.join(tmp, "prepared")
+        generate_csv(csv_path, N_ROWS)
+        print(f"  CSV synthétique: {N_ROWS:,} lignes, {os.path.getsize(csv_path) / 1e6:.0f} Mo\n")
+
+        (df, outliers, medians), pandas_seconds, pandas_peak = traced(notebook_prep, csv_path)
+        manifest, stream_seconds, _ = traced(data_prep.prepare, csv_path, output_dir, CHUNK_SIZE)
+        # prepare() remet le pic à zéro à chaque étape : le pic global est celui de la pire étape
+        stream_peak = max(step["peak_mb"] for step in manifest["steps"])
+
+        print(f"  {'Approche':<40}{'Temps (s)':>10}{'Pic (Mo)':>10}")
+        print(f"  {'pandas en mémoire (notebook)':<40}{pandas_seconds:>10.2f}{pandas_peak:>10.1f}")
+        print(f"  {f'par blocs ({CHUNK_SIZE:,} lignes)':<40}{stream_seconds:>10.2f}{stream_peak:>10.1f}")
+        for step in manifest["steps"]:
+            print(f"    - {step['step']:<34}{step['seconds']:>10.2f}{step['peak_mb']:>10.1f}")
+
+        print("\n  Concordance avec pandas :")
+        print(f"    lignes après déduplication : {len(df):,} vs {manifest['rows']:,}")
+        mismatches = []
+        for entry in manifest["columns"]:
+            name = entry["name"]
+            if abs(entry["median"] - medians[name]) > 1e-6 and not (
+                    not entry["quantiles_exact"] and abs(entry["median"] - medians[name])
+                    <= (entry["max"] - entry["min"]) / data_prep.HISTOGRAM_BINS):
+                mismatches.append(f"médiane {name}")
+            if entry["quantiles_exact"] and entry["outliers"] != outliers[name]:
+                mismatches.append(f"aberrantes {name}")
+        prepared = data_prep.load_frame(output_dir)
+        tolerance = max((e["max"] - e["min"]) / data_prep.HISTOGRAM_BINS for e in manifest["columns"])
+        if not np.allclose(prepared.to_numpy(np.float64), df.to_numpy(np.float64), atol=tolerance):
+            mismatches.append("valeurs imputées")
+        print(f"    {'✅ résultats concordants' if not mismatches else '❌ écarts: ' + ', '.join(mismatches)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark : forêt complète vs sortie anticipée sur les données de test
+
+Pour plusieurs marges, mesure le nombre moyen d'arbres évalués par ligne,
+le débit, l'accord des décisions avec la forêt complète et l'écart maximal
+de probabilité.
+"""
+
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import model_store
+import scoring
+from early_exit import EarlyExitForest
+
+N_ROWS = int(os.environ.get('BENCH_EARLY_EXIT_ROWS', 20_000))
+MARGINS = (None, 0.3, 0.2, 0.1)
+REPEATS = 3
+
+
+def best_time(func, X):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func(X)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    warnings.filterwarnings('ignore')
+    print("📊 BENCHMARK - SORTIE ANTICIPÉE DE LA FORÊT")
+    print("=" * 70)
+
+    model_path = model_store.latest_model_path()
+    model = model_store.load_model(model_path)
+    metadata_path = model_store.metadata_path_for(model_path)
+    threshold = scoring.resolve_thresholds(
+        model_store.load_metadata(metadata_path) if metadata_path else None)["fraud"]
+    X_test = model_store.load_test_data(model_store.test_data_path_for(model_path))['X_test']
+    X = X_test[list(model.feature_names_in_)]
+    X = X.iloc[np.resize(np.arange(len(X)), N_ROWS)]
+
+    full_seconds, full_proba = best_time(model.predict_proba, X)
+    full_fraud = full_proba[:, 1]
+    print(f"  {len(model.estimators_)} arbres, {N_ROWS:,} lignes (test répété), seuil {threshold:.3f}")
+    print(f"  Forêt complète: {full_seconds * 1000:.1f} ms ({N_ROWS / full_seconds:,.0f} lignes/s)\n")
+
+    print(f"  {'Marge':<12}{'Arbres/ligne':>13}{'Temps (ms)':>12}{'Accélération':>14}"
+          f"{'Accord':>10}{'Écart max':>11}")
+    for margin in MARGINS:
+        fast = EarlyExitForest(model, threshold=threshold, margin=margin)
+        seconds, (fraud, trees) = best_time(fast.fraud_scores, X)
+        agreement = np.mean((fraud > threshold) == (full_fraud > threshold))
+        label = "certaine" if margin is None else f"{margin:.2f}"
+        print(f"  {label:<12}{trees.mean():>13.1f}{seconds * 1000:>12.1f}"
+              f"{full_seconds / seconds:>13.2f}x{agreement * 100:>9.2f}%"
+              f"{np.abs(fraud - full_fraud).max():>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark : requêtes paginées de l'historique sur 1M de prédictions
+
+Remplit une base temporaire (inserts directs, sans passer par le sink),
+puis mesure la latence des pages filtrées, y compris en profondeur.
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import history_store
+import scoring
+
+N_ROWS = int(os.environ.get('BENCH_HISTORY_ROWS', 1_000_000))
+N_QUERIES = 200
+
+
+def populate(db_path):
+    rng = np.random.default_rng(42)
+    now = time.time()
+    scored_at = np.sort(now - rng.uniform(0, 365 * 86400, N_ROWS))
+    risk = rng.beta(0.5, 2.0, N_ROWS)
+    country = rng.integers(1, 6, N_ROWS)
+    amount = np.round(rng.gamma(2.0, 80.0, N_ROWS), 2)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(history_store._SCHEMA)
+    rows = (
+        (float(scored_at[i]), float(amount[i]), int(country[i]), int(risk[i] > 0.5),
+         float(risk[i]), scoring.risk_band(risk[i]), "bench",
+         '{"TransactionAmount":%s,"TransactionCountry":%d}' % (amount[i], country[i]))
+        for i in range(N_ROWS)
+    )
+    with conn:
+        conn.executemany(history_store.HistorySink.insert_sql, rows)
+    conn.execute("ANALYZE")
+    conn.close()
+    return now
+
+
+def timed(label, db_path, pages=1, **filters):
+    latencies = []
+    for _ in range(N_QUERIES):
+        cursor = None
+        for _ in range(pages):
+            start = time.perf_counter()
+            page = history_store.query(cursor=cursor, db_path=db_path, **filters)
+            latencies.append((time.perf_counter() - start) * 1000)
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"   {label:<40} p50 {p50:6.3f} ms | p99 {p99:6.3f} ms")
+
+
+def main():
+    print("📊 BENCHMARK - HISTORIQUE PAGINÉ")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "history.db")
+        start = time.perf_counter()
+        now = populate(db_path)
+        print(f"{N_ROWS:,} lignes insérées en {time.perf_counter() - start:.1f} s\n")
+
+        last_week = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(now - 7 * 86400))
+        timed("Première page (sans filtre)", db_path)
+        timed("Bande 'high'", db_path, risk_band="high")
+        timed("Pays 3 + bande 'medium'", db_path, country=3, risk_band="medium")
+        timed("7 derniers jours + pays 2", db_path, start=last_week, country=2)
+        timed("Pages 1 à 50 (curseur), bande 'low'", db_path, pages=50, risk_band="low")
+
+
+if __name__ == "__main__":
+    main()
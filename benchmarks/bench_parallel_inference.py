@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark : scoring d'un gros lot dans le processus vs sur le pool d'inférence
+
+Mesure le débit de predict_proba sur un lot de N_ROWS lignes avec la forêt
+seule puis avec PooledForest de 1 à N processus (N = nombre de cœurs), le
+seuil de rentabilité du pool selon la taille du lot, et la mémoire propre
+de chaque worker (la forêt est partagée avec le forkserver).
+"""
+
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+import model_store
+from parallel_inference import PooledForest
+
+N_ROWS = int(os.environ.get('BENCH_PARALLEL_ROWS', 100_000))
+BATCH_SIZES = (1_000, 5_000, 20_000, 50_000)
+REPEATS = 3
+
+
+def best_time(func, X):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func(X)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def worker_counts(cores):
+    counts, n = [], 1
+    while n < cores:
+        counts.append(n)
+        n *= 2
+    return counts + [cores]
+
+
+def memory_kb(pid):
+    """Mémoire propre et partagée d'un processus (Linux, /proc/<pid>/smaps_rollup)"""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            fields = dict(line.split(":", 1) for line in f.read().splitlines()[1:])
+    except OSError:
+        return None
+    value = lambda name: int(fields[name].split()[0])
+    return value("Private_Clean") + value("Private_Dirty"), value("Shared_Clean") + value("Shared_Dirty")
+
+
+def main():
+    warnings.filterwarnings('ignore')
+    print("📊 BENCHMARK - POOL D'INFÉRENCE (MÉMOIRE PARTAGÉE)")
+    print("=" * 70)
+
+    model_path = model_store.latest_model_path()
+    model = model_store.load_model(model_path)
+    X_test = model_store.load_test_data()['X_test']
+    X = pd.concat([X_test] * (N_ROWS // len(X_test) + 1), ignore_index=True).iloc[:N_ROWS]
+    cores = os.cpu_count() or 1
+    print(f"  Lot: {N_ROWS:,} lignes, {len(model.estimators_)} arbres, {cores} cœur(s)\n")
+
+    inline_seconds, reference = best_time(model.predict_proba, X)
+    print(f"  {'Mode':<22}{'Temps (s)':>11}{'Lignes/s':>12}{'Accélération':>14}{'Identique':>11}")
+    print(f"  {'Dans le processus':<22}{inline_seconds:>11.3f}{N_ROWS / inline_seconds:>12,.0f}{1.0:>13.2f}x")
+
+    largest = None
+    for workers in worker_counts(cores):
+        pooled = PooledForest(model, model_path, workers=workers, min_rows=1)
+        pooled.predict_proba(X.iloc[:workers])  # démarrage du pool hors mesure
+        seconds, result = best_time(pooled.predict_proba, X)
+        same = "oui" if np.array_equal(result, reference) else "non"
+        print(f"  {f'Pool, {workers} processus':<22}{seconds:>11.3f}{N_ROWS / seconds:>12,.0f}"
+              f"{inline_seconds / seconds:>13.2f}x{same:>11}")
+        if largest is not None:
+            largest.close()
+        largest = pooled
+
+    print(f"\n  Seuil de rentabilité (pool de {largest.workers} processus)")
+    print(f"  {'Lignes':>10}{'Processus (ms)':>17}{'Pool (ms)':>12}")
+    for size in BATCH_SIZES:
+        batch = X.iloc[:size]
+        inline, _ = best_time(model.predict_proba, batch)
+        pooled, _ = best_time(largest.predict_proba, batch)
+        print(f"  {size:>10,}{inline * 1000:>17.1f}{pooled * 1000:>12.1f}")
+
+    usage = [memory_kb(pid) for pid in largest._pool._processes]
+    if all(usage):
+        private = sum(kb for kb, _ in usage) / len(usage) / 1024
+        shared = sum(kb for _, kb in usage) / len(usage) / 1024
+        print(f"\n  Mémoire par worker: {private:.0f} Mo propres, {shared:.0f} Mo partagés (forêt comprise)")
+    largest.close()
+
+    if cores == 1:
+        print("\n ⚠️  Un seul cœur disponible : le pool ne peut pas accélérer le scoring ici")
+
+
+if __name__ == "__main__":
+    main()
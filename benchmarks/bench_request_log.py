@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark : coût du journal structuré par requête
+
+Compare p50/p99 de /predict (client de test Flask, sans réseau) avec
+l'événement "request" désactivé puis activé, et le coût côté requête d'un
+événement : dépôt dans la file (QueueHandler) vs écriture synchrone du JSON
+dans un fichier avec rotation.
+"""
+
+import os
+import sys
+import time
+import logging
+import tempfile
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+warnings.filterwarnings('ignore')
+
+_log_dir = tempfile.TemporaryDirectory()
+os.environ.setdefault("REQUEST_LOG_FILE", os.path.join(_log_dir.name, "api.log"))
+os.environ.setdefault("AUDIT_LOG_ENABLED", "0")
+os.environ.setdefault("HISTORY_ENABLED", "0")
+
+import numpy as np
+from logging.handlers import RotatingFileHandler
+
+import app
+import model_store
+import request_log
+
+N_REQUESTS = 500
+N_EVENTS = 20000
+
+
+def measure(client, payloads):
+    latencies = []
+    for payload in payloads:
+        start = time.perf_counter()
+        response = client.post('/predict', json=payload)
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.get_json()
+    return np.percentile(latencies, [50, 99])
+
+
+def event_cost(logger):
+    """Coût par événement côté appelant (µs) : p50, p99"""
+    fields = {"method": "POST", "path": "/predict", "status": 200, "duration_ms": 6.1,
+              "stages_ms": {"parse": 0.8, "score": 5.1, "record": 0.02}, "rows": 1,
+              "model_version": "best_model.joblib", "admission": "accept"}
+    samples = []
+    for _ in range(N_EVENTS):
+        start = time.perf_counter()
+        logger.info("POST /predict 200", extra={"event": "request", "fields": fields, "trace_id": "0" * 32})
+        samples.append((time.perf_counter() - start) * 1e6)
+    return np.percentile(samples, [50, 99])
+
+
+def main():
+    print("📊 BENCHMARK - COÛT DU JOURNAL STRUCTURÉ")
+    print("=" * 50)
+
+    app.wait_until_ready()
+    records = model_store.load_test_data()['X_test'].to_dict(orient='records')
+    payloads = [records[i % len(records)] for i in range(N_REQUESTS)]
+    client = app.app.test_client()
+
+    # Préchauffage
+    measure(client, payloads[:20])
+
+    request_log.REQUEST_LOG_ENABLED = False
+    p50_off, p99_off = measure(client, payloads)
+    request_log.REQUEST_LOG_ENABLED = True
+    p50_on, p99_on = measure(client, payloads)
+    stats = request_log.stats()
+
+    print(f"\n{N_REQUESTS} requêtes /predict (1 transaction)")
+    print(f"   Journal désactivé : p50 {p50_off:.2f} ms | p99 {p99_off:.2f} ms")
+    print(f"   Journal activé    : p50 {p50_on:.2f} ms | p99 {p99_on:.2f} ms")
+    print(f"   Overhead p50      : {p50_on - p50_off:+.3f} ms")
+    print(f"   Dépôt p99         : {stats['emit_overhead_us']['p99']} µs | Perdus: {stats['dropped']}")
+
+    # Coût d'un événement sur le thread de la requête
+    queued_p50, queued_p99 = event_cost(request_log.get_logger())
+    sync_logger = logging.getLogger("bench_request_log.sync")
+    sync_logger.propagate = False
+    sync_logger.setLevel(logging.INFO)
+    with tempfile.TemporaryDirectory() as tmp:
+        handler = RotatingFileHandler(os.path.join(tmp, "sync.log"), maxBytes=50 * 1024 * 1024,
+                                      backupCount=5, encoding="utf-8")
+        handler.setFormatter(request_log.JsonFormatter())
+        sync_logger.addHandler(handler)
+        sync_p50, sync_p99 = event_cost(sync_logger)
+        handler.close()
+
+    print(f"\n{N_EVENTS:,} événements \"request\" (coût sur le thread de la requête)")
+    print(f"   File + thread d'écriture : p50 {queued_p50:.1f} µs | p99 {queued_p99:.1f} µs")
+    print(f"   Écriture synchrone       : p50 {sync_p50:.1f} µs | p99 {sync_p99:.1f} µs")
+    request_log.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark : coût des seuils par segment dans scoring.score_frame
+
+Compare score_frame avec les seuils globaux et avec une table de seuils par
+segment (TransactionCountry x ProductID x LargePurchase, calibrée sur les
+données de test), pour des lots de 1, 1 000 et 10 000 lignes, ainsi que le
+coût seul de la recherche dans la table. Vérifie que la table ne change que
+les décisions des segments calibrés.
+"""
+
+import os
+import sys
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+warnings.filterwarnings('ignore')
+
+import pandas as pd
+
+import model_store
+import scoring
+import segment_thresholds
+import threshold_optimizer
+
+BATCH_SIZES = (1, 1_000, 10_000)
+REPEATS = {1: 300, 1_000: 20, 10_000: 5}
+
+
+def best_of(funcs, repeats):
+    """Meilleur temps de chaque fonction, exécutions alternées (même état du CPU et des caches)"""
+    timings = [[] for _ in funcs]
+    for _ in range(repeats):
+        for func, func_timings in zip(funcs, timings):
+            start = time.perf_counter()
+            func()
+            func_timings.append(time.perf_counter() - start)
+    return [min(func_timings) for func_timings in timings]
+
+
+def choose(y_segment, scores_segment):
+    curves = threshold_optimizer.sweep_thresholds(y_segment, scores_segment, cost_fn=10.0)
+    fraud_index, review_index = threshold_optimizer.choose_thresholds(curves)
+    metrics = threshold_optimizer._metrics_at(curves, fraud_index)
+    return metrics["threshold"], threshold_optimizer._metrics_at(curves, review_index)["threshold"], metrics
+
+
+def main():
+    print("📊 BENCHMARK - SEUILS PAR SEGMENT")
+    print("=" * 70)
+    model = model_store.load_model(model_store.latest_model_path())
+    test_data = model_store.load_test_data()
+    X, y = test_data['X_test'], test_data['y_test']
+    if hasattr(model, 'feature_names_in_'):
+        X = X[list(model.feature_names_in_)]
+    scores = model.predict_proba(X)[:, 1]
+
+    metadata = dict(model_store.load_metadata(model_store.latest_metadata_path()) or {})
+    metadata["segment_thresholds"] = segment_thresholds.fit(X, y.to_numpy(), scores, choose)
+    metadata.pop("decision_thresholds", None)
+    global_thresholds = scoring.resolve_thresholds(metadata)
+    global_thresholds.segments = None
+    segment_table = scoring.resolve_thresholds(metadata)
+    calibrated = sum("fallback" not in s for s in metadata["segment_thresholds"]["segments"])
+    print(f"  Table: {len(segment_table.segments)} cases, {calibrated} segment(s) calibré(s)\n")
+
+    X = pd.concat([X] * (max(BATCH_SIZES) // len(X) + 1), ignore_index=True)
+    print(f"  {'Lignes':>8}{'Globaux ms':>12}{'Segments ms':>13}{'Écart':>9}{'Recherche µs':>14}{'µs/ligne':>10}")
+    for size in BATCH_SIZES:
+        batch = X.iloc[:size]
+        plain, table, lookup = best_of([
+            lambda: scoring.score_frame(model, batch, thresholds=global_thresholds),
+            lambda: scoring.score_frame(model, batch, thresholds=segment_table),
+            lambda: segment_table.segments.lookup(batch)
+        ], REPEATS[size])
+        print(f"  {size:>8,}{plain * 1000:>12.2f}{table * 1000:>13.2f}{(table - plain) / plain:>+9.1%}"
+              f"{lookup * 1e6:>14.1f}{lookup * 1e6 / size:>10.3f}")
+
+    batch = X.iloc[:len(y)]
+    plain = scoring.score_frame(model, batch, thresholds=global_thresholds)
+    table = scoring.score_frame(model, batch, thresholds=segment_table)
+    fraud_cuts, _ = segment_table.segments.lookup(batch)
+    changed = [i for i, (a, b) in enumerate(zip(plain, table)) if a["prediction"] != b["prediction"]]
+    outside = [i for i in changed if fraud_cuts[i] == global_thresholds["fraud"]]
+    print(f"\n  Décisions modifiées par la table: {len(changed)}/{len(plain)}"
+          f"{'' if not outside else f'  ❌ {len(outside)} hors des segments calibrés'}")
+
+
+if __name__ == "__main__":
+    main()
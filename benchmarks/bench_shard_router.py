@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark : débit du routeur réparti par compte selon le nombre d'instances
+
+Lance 1, 2, 4... instances locales de app.py (jusqu'au nombre de cœurs, au
+moins 2) et envoie, depuis N_CLIENTS threads, des lots de BATCH_ROWS
+transactions pendant DURATION secondes à travers ShardRouter. Référence :
+les mêmes lots envoyés directement à une instance, sans routeur. Vérifie
+aussi que les résultats réassemblés sont identiques à ceux d'une instance.
+"""
+
+import os
+import sys
+import time
+import threading
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+warnings.filterwarnings('ignore')
+
+import numpy as np
+
+import model_store
+from bench_startup import free_port
+from fraud_client import FraudClient
+from shard_router import LocalShards, ShardRouter
+
+N_CLIENTS = 8
+DURATION = 8
+BATCH_ROWS = 200
+SHARD_ENV = {"AUDIT_LOG_ENABLED": "0", "HISTORY_ENABLED": "0", "REQUEST_LOG_ENABLED": "0",
+             "ADMISSION_ENABLED": "0", "PYTHONWARNINGS": "ignore"}
+
+
+def shard_counts(cores):
+    counts, n = [], 1
+    while n < max(2, cores):
+        counts.append(n)
+        n *= 2
+    return counts + [max(2, cores)]
+
+
+def run(send, batches):
+    stop = time.perf_counter() + DURATION
+    latencies, rows = [], []
+
+    def client(seed):
+        rng = np.random.default_rng(seed)
+        while time.perf_counter() < stop:
+            batch = batches[rng.integers(len(batches))]
+            start = time.perf_counter()
+            send(batch)
+            latencies.append(time.perf_counter() - start)
+            rows.append(len(batch))
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(N_CLIENTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies = np.array(latencies) * 1000
+    return sum(rows) / DURATION, np.median(latencies), np.percentile(latencies, 99)
+
+
+def routed_send(router):
+    def send(batch):
+        status, body = router.predict(batch)
+        assert status == 200, body
+    return send
+
+
+def main():
+    print("📊 BENCHMARK - ROUTEUR RÉPARTI PAR COMPTE")
+    print("=" * 70)
+    records = model_store.load_test_data()['X_test'].to_dict('records')
+    batches = [[records[(i * BATCH_ROWS + j) % len(records)] for j in range(BATCH_ROWS)]
+               for i in range(len(records) // BATCH_ROWS + 1)]
+    cores = os.cpu_count() or 1
+    print(f"  {N_CLIENTS} clients, lots de {BATCH_ROWS} transactions, {DURATION}s par configuration, "
+          f"{cores} cœur(s)\n")
+    print(f"  {'Configuration':<24}{'Lignes/s':>10}{'p50 ms':>9}{'p99 ms':>9}   Répartition des lignes")
+
+    baseline = None
+    reference = None
+    for n_shards in shard_counts(cores):
+        with LocalShards([free_port() for _ in range(n_shards)], env=SHARD_ENV) as shards:
+            if baseline is None:
+                direct = FraudClient(shards.urls[0], pool_size=N_CLIENTS)
+                reference = direct.predict(records)
+                baseline = run(direct.predict, batches)
+                direct.close()
+                print(f"  {'1 instance, sans routeur':<24}{baseline[0]:>10,.0f}{baseline[1]:>9.1f}{baseline[2]:>9.1f}")
+
+            router = ShardRouter(shards.urls)
+            status, body = router.predict(records)
+            same = status == 200 and all(a["confidence"] == b["confidence"]
+                                         for a, b in zip(body["predictions"], reference))
+            rate, p50, p99 = run(routed_send(router), batches)
+            balance = " / ".join(f"{shard['rows']:,}" for shard in router.stats()["shards"])
+            label = f"{n_shards} instance(s), routeur"
+            print(f"  {label:<24}{rate:>10,.0f}{p50:>9.1f}{p99:>9.1f}   {balance}"
+                  f"{'' if same else '  ❌ résultats différents'}")
+            router.close()
+
+    if cores == 1:
+        print("\n ⚠️  Un seul cœur disponible : les instances se partagent le même CPU, "
+              "le débit ne peut pas augmenter ici")
+
+
+if __name__ == "__main__":
+    main()
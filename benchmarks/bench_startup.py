@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark : temps d'import et de démarrage de l'API
+
+Mesure, dans des processus neufs :
+  - l'ancien chemin critique (flask + pandas + numpy + joblib + chargement
+    synchrone du modèle, avant de pouvoir répondre) ;
+  - l'import de app.py avec imports différés ;
+  - le délai avant la première réponse de /livez et avant /readyz "ready"
+    en lançant réellement `python app.py`.
+"""
+
+import os
+import sys
+import time
+import socket
+import subprocess
+import urllib.request
+import urllib.error
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import model_store
+
+N_RUNS = 5
+
+EAGER_CODE = f"""
+import time
+start = time.perf_counter()
+import flask, pandas, numpy, joblib
+joblib.load({model_store.latest_model_path()!r})
+print(time.perf_counter() - start)
+"""
+
+LAZY_CODE = """
+import time
+start = time.perf_counter()
+import app
+print(time.perf_counter() - start)
+"""
+
+
+def run_python(code, **env):
+    output = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", code],
+        cwd=ROOT, env={**os.environ, **env}, capture_output=True, text=True, check=True
+    )
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url, deadline):
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(url)
+
+
+def boot_times():
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-W", "ignore", "app.py"], cwd=ROOT,
+        env={**os.environ, "PORT": str(port), "HOST": "127.0.0.1"},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = start + 60
+        live = wait_for(f"http://127.0.0.1:{port}/livez", deadline)
+        ready = wait_for(f"http://127.0.0.1:{port}/readyz", deadline)
+        return live - start, ready - start
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def best(values):
+    return min(values) * 1000
+
+
+def main():
+    print("📊 BENCHMARK - DÉMARRAGE DE L'API")
+    print("=" * 50)
+
+    eager = [run_python(EAGER_CODE) for _ in range(N_RUNS)]
+    lazy = [run_python(LAZY_CODE, MODEL_BACKGROUND_LOAD="0") for _ in range(N_RUNS)]
+    boots = [boot_times() for _ in range(N_RUNS)]
+
+    print(f"\nMeilleur de {N_RUNS} exécutions :")
+    print(f"   Ancien chemin critique (imports + modèle) : {best(eager):7.1f} ms")
+    print(f"   Import de app.py (imports différés)       : {best(lazy):7.1f} ms")
+    print(f"   Lancement → première réponse /livez        : {best([b[0] for b in boots]):7.1f} ms")
+    print(f"   Lancement → /readyz prêt                   : {best([b[1] for b in boots]):7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark : interface web rendue à chaque requête vs préparée au démarrage
+
+Compare, dans le même processus (client de test Flask) :
+  - l'ancien service : render_template('index.html') et fichiers de static/
+    relus et envoyés non compressés ;
+  - static_assets.py : page pré-rendue, fichiers précompressés, ETag.
+Mesure le temps par requête et les octets envoyés pour un navigateur qui
+accepte gzip, puis une visite répétée (revalidation 304 de la page, fichiers
+empreintes servis par le cache du navigateur).
+"""
+
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('MODEL_BACKGROUND_LOAD', '0')
+
+from flask import Flask, render_template
+
+import app as api
+
+N_REQUESTS = 2000
+HEADERS = {"Accept-Encoding": "gzip, deflate, br"}
+
+
+def legacy_app():
+    legacy = Flask("legacy", root_path=ROOT)
+
+    @legacy.route('/')
+    def home():
+        return render_template('index.html', asset_url=lambda path: f"static/{path}")
+
+    return legacy
+
+
+def measure(client, paths, headers=HEADERS):
+    sizes = 0
+    start = time.perf_counter()
+    for _ in range(N_REQUESTS):
+        for path in paths:
+            response = client.get(path, headers=headers)
+            sizes += len(response.data)
+            response.close()
+    elapsed = time.perf_counter() - start
+    return elapsed / N_REQUESTS * 1000, sizes / N_REQUESTS
+
+
+def main():
+    print("📊 BENCHMARK - INTERFACE WEB")
+    print("=" * 60)
+
+    legacy = legacy_app().test_client()
+    cached = api.app.test_client()
+    page = cached.get('/').get_data(as_text=True)
+    fingerprinted = ["/" + url for url in re.findall(r'(static/[^"]+\.[0-9a-f]{12}\.\w+)', page)]
+    etag = cached.get('/', headers=HEADERS).headers["ETag"]
+
+    scenarios = [
+        ("Ancien : page + CSS + JS", legacy, ['/', '/static/css/style.css', '/static/js/app.js'], HEADERS),
+        ("Préparé : page + CSS + JS (gzip)", cached, ['/'] + fingerprinted, HEADERS),
+        ("Préparé : visite répétée (304)", cached, ['/'], dict(HEADERS, **{"If-None-Match": etag})),
+    ]
+    print(f"  {'Scénario':<36}{'ms/visite':>10}{'Octets/visite':>15}")
+    for label, client, paths, headers in scenarios:
+        ms, size = measure(client, paths, headers)
+        print(f"  {label:<36}{ms:>10.3f}{size:>15,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Scoring en cascade : pré-filtre léger, Forêt Aléatoire pour les cas incertains
+
+Un petit modèle (arbre peu profond distillé depuis la forêt, ou régression
+logistique) score toutes les transactions. Seules celles dont la probabilité
+tombe dans la bande incertaine ]low, high] sont rescorées par la forêt ; les
+autres gardent la probabilité du pré-filtre.
+
+Les lignes de test_data_*.joblib sont divisées (stratifié) en deux moitiés.
+La bande est calibrée sur la première : c'est la plus étroite (la moins
+d'escalades) dont la perte de rappel et la perte de précision, par rapport
+à la forêt seule, restent sous les bornes fixées. Sans --source, le
+pré-filtre est distillé sur cette même moitié. Les pertes et le débit
+rapportés sont mesurés sur la seconde, que ni le pré-filtre ni la
+calibration n'ont vue.
+
+La cascade est enregistrée dans les métadonnées du modèle ("cascade") et
+activée dans l'API par CASCADE_ENABLED=1.
+
+Usage:
+    python cascade.py                                   # arbre distillé, perte de rappel <= 1 %
+    python cascade.py --prefilter logreg --max-recall-loss 0.005
+    python cascade.py --source creditcarddata.csv       # distillation sur le train en cache
+    python cascade.py --dry-run
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+import warnings
+from datetime import datetime
+
+import numpy as np
+
+import model_store
+import scoring
+
+CASCADE_ENABLED = os.environ.get('CASCADE_ENABLED', '0') == '1'
+
+PREFILTER_KINDS = ("tree", "logreg")
+DEFAULT_MAX_RECALL_LOSS = 0.01
+DEFAULT_MAX_PRECISION_LOSS = 0.01
+DISTILLATION_SAMPLES = 50_000
+# Part des lignes de test réservée à la calibration (le reste mesure la cascade)
+CALIBRATION_FRACTION = 0.5
+BAND_GRID = np.round(np.linspace(0.0, 1.0, 201), 3)
+
+
+def prefilter_scores(prefilter, X):
+    """Probabilité de fraude du pré-filtre (classifieur ou régresseur distillé)"""
+    if hasattr(prefilter, 'predict_proba'):
+        return prefilter.predict_proba(X)[:, 1]
+    return np.clip(prefilter.predict(X), 0.0, 1.0)
+
+
+class CascadeModel:
+    """Modèle composé, utilisable partout où l'est la forêt (predict_proba, predict)"""
+
+    def __init__(self, prefilter, model, low, high, threshold=0.5):
+        self.prefilter = prefilter
+        self.model = model
+        self.low = low
+        self.high = high
+        self.threshold = threshold
+        self.classes_ = getattr(model, 'classes_', np.array([0, 1]))
+        if hasattr(model, 'feature_names_in_'):
+            self.feature_names_in_ = model.feature_names_in_
+        self._lock = threading.Lock()
+        self.rows = 0
+        self.escalated = 0
+
+    def predict_proba(self, X):
+        fraud = prefilter_scores(self.prefilter, X).astype(np.float64)
+        escalate = (fraud > self.low) & (fraud <= self.high)
+        if escalate.any():
+            rows = X.iloc[escalate] if hasattr(X, 'iloc') else X[escalate]
+            fraud[escalate] = self.model.predict_proba(rows)[:, 1]
+
+        with self._lock:
+            self.rows += len(fraud)
+            self.escalated += int(escalate.sum())
+        return np.column_stack([1.0 - fraud, fraud])
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] > self.threshold).astype(int)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rows": self.rows,
+                "escalated": self.escalated,
+                "escalation_rate": round(self.escalated / self.rows, 4) if self.rows else None,
+                "band": [self.low, self.high]
+            }
+
+
+# ---------------------------------------------------------------------------
+# Pré-filtre
+# ---------------------------------------------------------------------------
+
+def distillation_inputs(X, n_samples=DISTILLATION_SAMPLES, seed=42):
+    """Entrées non étiquetées : lignes réelles et lignes aux colonnes rééchantillonnées
+
+    Les étiquettes viennent de la forêt (distillation) : aucune vérité
+    terrain n'est nécessaire, seulement des entrées plausibles.
+    """
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    n_synthetic = max(0, n_samples - len(X))
+    synthetic = pd.DataFrame({
+        column: X[column].to_numpy()[rng.integers(0, len(X), n_synthetic)] for column in X.columns
+    })
+    return pd.concat([X.reset_index(drop=True), synthetic], ignore_index=True)
+
+
+def fit_prefilter(model, X_fit, kind="tree", max_depth=6):
+    """Entraîner le pré-filtre sur les probabilités (ou décisions) de la forêt"""
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.tree import DecisionTreeRegressor
+
+    teacher = model.predict_proba(X_fit)[:, 1]
+    if kind == "logreg":
+        return LogisticRegression(max_iter=1000, random_state=42).fit(X_fit, (teacher > 0.5).astype(int))
+    return DecisionTreeRegressor(max_depth=max_depth, random_state=42).fit(X_fit, teacher)
+
+
+# ---------------------------------------------------------------------------
+# Calibration de la bande
+# ---------------------------------------------------------------------------
+
+def _precision_recall(tp, flagged, positives):
+    tp = np.asarray(tp, dtype=float)
+    flagged = np.asarray(flagged, dtype=float)
+    precision = np.divide(tp, flagged, out=np.ones_like(tp), where=flagged > 0)
+    recall = tp / max(int(positives), 1)
+    return precision, recall
+
+
+def calibrate_band(y_true, prefilter_proba, model_proba, threshold=0.5,
+                   max_recall_loss=DEFAULT_MAX_RECALL_LOSS,
+                   max_precision_loss=DEFAULT_MAX_PRECISION_LOSS, grid=BAND_GRID):
+    """Bande ]low, high] minimisant les escalades sous les bornes de perte
+
+    Toutes les bandes (low, high) de la grille sont évaluées d'un coup :
+    les décisions de la cascade valent celles de la forêt dans la bande et
+    celles du pré-filtre ailleurs. Les lignes sont triées une fois par score
+    du pré-filtre ; une bande est alors un intervalle de ce tri, et ses
+    comptes s'obtiennent par différence de sommes cumulées. Mémoire
+    O(lignes + bandes), sans matrice bandes x lignes.
+    """
+    y_true = np.asarray(y_true).astype(bool)
+    prefilter_proba = np.asarray(prefilter_proba, dtype=np.float64)
+    model_fraud = np.asarray(model_proba) > threshold
+    prefilter_fraud = prefilter_proba > threshold
+    positives = int(y_true.sum())
+    base_precision, base_recall = _precision_recall((model_fraud & y_true).sum(), model_fraud.sum(), positives)
+
+    lows, highs = np.meshgrid(grid, grid, indexing='ij')
+    valid = lows <= highs
+    lows, highs = lows[valid], highs[valid]
+
+    # Sommes cumulées dans l'ordre du score du pré-filtre (indice k : k premières lignes)
+    order = np.argsort(prefilter_proba, kind='stable')
+    sorted_proba = prefilter_proba[order]
+
+    def cumulative(values):
+        return np.concatenate([[0], np.cumsum(values[order], dtype=np.int64)])
+
+    model_tp, model_flagged = cumulative(model_fraud & y_true), cumulative(model_fraud)
+    prefilter_tp, prefilter_flagged = cumulative(prefilter_fraud & y_true), cumulative(prefilter_fraud)
+
+    # Bande ]low, high] : lignes [start, stop[ du tri
+    start = np.searchsorted(sorted_proba, lows, side='right')
+    stop = np.searchsorted(sorted_proba, highs, side='right')
+    tp = prefilter_tp[-1] + (model_tp[stop] - model_tp[start]) - (prefilter_tp[stop] - prefilter_tp[start])
+    flagged = (prefilter_flagged[-1] + (model_flagged[stop] - model_flagged[start])
+               - (prefilter_flagged[stop] - prefilter_flagged[start]))
+    precision, recall = _precision_recall(tp, flagged, positives)
+    escalation = (stop - start) / max(len(prefilter_proba), 1)
+
+    feasible = (base_recall - recall <= max_recall_loss) & (base_precision - precision <= max_precision_loss)
+    if not feasible.any():
+        best = int(np.argmax(escalation))
+    else:
+        # Moins d'escalades d'abord ; à égalité, la meilleure fidélité au rappel
+        candidates = np.flatnonzero(feasible)
+        best = candidates[np.lexsort((-recall[candidates], escalation[candidates]))[0]]
+
+    return {
+        "low": float(lows[best]),
+        "high": float(highs[best]),
+        "escalation_rate": round(float(escalation[best]), 4),
+        "recall": round(float(recall[best]), 6),
+        "precision": round(float(precision[best]), 6),
+        "model_recall": round(float(base_recall), 6),
+        "model_precision": round(float(base_precision), 6),
+        "recall_loss": round(float(base_recall - recall[best]), 6),
+        "precision_loss": round(float(base_precision - precision[best]), 6),
+        "feasible": bool(feasible.any())
+    }
+
+
+def evaluate_band(y_true, prefilter_proba, model_proba, low, high, threshold=0.5):
+    """Rappel, précision et escalades d'une bande fixée, comparés à la forêt seule"""
+    y_true = np.asarray(y_true).astype(bool)
+    prefilter_proba = np.asarray(prefilter_proba, dtype=np.float64)
+    model_fraud = np.asarray(model_proba) > threshold
+    escalate = (prefilter_proba > low) & (prefilter_proba <= high)
+    cascade_fraud = np.where(escalate, model_fraud, prefilter_proba > threshold)
+    positives = int(y_true.sum())
+    base_precision, base_recall = _precision_recall((model_fraud & y_true).sum(), model_fraud.sum(), positives)
+    precision, recall = _precision_recall((cascade_fraud & y_true).sum(), cascade_fraud.sum(), positives)
+    return {
+        "rows": int(len(y_true)),
+        "escalation_rate": round(float(escalate.mean()) if len(escalate) else 0.0, 4),
+        "recall": round(float(recall), 6),
+        "precision": round(float(precision), 6),
+        "model_recall": round(float(base_recall), 6),
+        "model_precision": round(float(base_precision), 6),
+        "recall_loss": round(float(base_recall - recall), 6),
+        "precision_loss": round(float(base_precision - precision), 6)
+    }
+
+
+def calibration_split(X, y, fraction=CALIBRATION_FRACTION, seed=42):
+    """(X_calib, y_calib, X_eval, y_eval) : division stratifiée des lignes de test"""
+    from sklearn.model_selection import train_test_split
+
+    X_calib, X_eval, y_calib, y_eval = train_test_split(X, y, train_size=fraction, stratify=y,
+                                                        random_state=seed)
+    return X_calib, y_calib, X_eval, y_eval
+
+
+# ---------------------------------------------------------------------------
+# Chargement pour l'API
+# ---------------------------------------------------------------------------
+
+def prefilter_path_for(model_path):
+    """Pré-filtre sauvegardé avec un modèle (même horodatage)"""
+    path = os.path.join(os.path.dirname(model_path),
+                        f"prefilter_{model_store._timestamp_of(model_path)}.joblib")
+    return path if os.path.exists(path) else None
+
+
+def load_cascade(model, model_path, metadata):
+    """Envelopper le modèle dans sa cascade calibrée, si elle existe"""
+    import joblib
+
+    config = (metadata or {}).get("cascade")
+    prefilter_path = prefilter_path_for(model_path)
+    if not config or prefilter_path is None:
+        return None
+    return CascadeModel(joblib.load(prefilter_path), model, config["low"], config["high"],
+                        threshold=scoring.resolve_thresholds(metadata)["fraud"])
+
+
+def measure_throughput(model, X, repeats=3):
+    """Lignes par seconde de predict_proba (meilleur de plusieurs passages)"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(X)
+        best = min(best, time.perf_counter() - start)
+    return len(X) / best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calibration du scoring en cascade")
+    parser.add_argument("--model", help="Chemin du modèle (défaut: le plus récent)")
+    parser.add_argument("--test-data", help="Données de test (défaut: celles du modèle)")
+    parser.add_argument("--source", help="CSV source : distillation sur le train en cache")
+    parser.add_argument("--prefilter", choices=PREFILTER_KINDS, default="tree")
+    parser.add_argument("--max-depth", type=int, default=6, help="Profondeur de l'arbre distillé")
+    parser.add_argument("--max-recall-loss", type=float, default=DEFAULT_MAX_RECALL_LOSS)
+    parser.add_argument("--max-precision-loss", type=float, default=DEFAULT_MAX_PRECISION_LOSS)
+    parser.add_argument("--dry-run", action="store_true", help="Ne rien sauvegarder")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings('ignore')
+    print("🪜 CALIBRATION DU SCORING EN CASCADE")
+    print("=" * 50)
+
+    model_path = args.model or model_store.latest_model_path()
+    if model_path is None:
+        print(" ❌ Aucun modèle trouvé")
+        return 1
+    test_data_path = args.test_data or model_store.test_data_path_for(model_path) \
+        or model_store.latest_test_data_path()
+    metadata_path = model_store.metadata_path_for(model_path)
+    metadata = model_store.load_metadata(metadata_path) if metadata_path else None
+    threshold = scoring.resolve_thresholds(metadata)["fraud"]
+
+    model = model_store.load_model(model_path)
+    test_data = model_store.load_test_data(test_data_path)
+    features = list(getattr(model, 'feature_names_in_', test_data['X_test'].columns))
+    X_calib, y_calib, X_eval, y_eval = calibration_split(test_data['X_test'][features],
+                                                         test_data['y_test'].to_numpy())
+
+    if args.source:
+        import dataset_cache
+        X_fit = dataset_cache.get_dataset(args.source).train_test()[0][features]
+        fit_origin = f"train en cache ({os.path.basename(args.source)})"
+    else:
+        X_fit = distillation_inputs(X_calib)
+        fit_origin = "moitié de calibration du test + colonnes rééchantillonnées"
+
+    start = time.perf_counter()
+    prefilter = fit_prefilter(model, X_fit, args.prefilter, args.max_depth)
+    print(f"  Modèle: {os.path.basename(model_path)}")
+    print(f"  Pré-filtre: {args.prefilter} entraîné sur {len(X_fit):,} lignes ({fit_origin}) "
+          f"en {time.perf_counter() - start:.2f}s")
+
+    band = calibrate_band(y_calib, prefilter_scores(prefilter, X_calib),
+                          model.predict_proba(X_calib)[:, 1], threshold,
+                          args.max_recall_loss, args.max_precision_loss)
+    if not band["feasible"]:
+        print(" ⚠️  Aucune bande ne respecte les bornes : la bande retenue escalade le plus de lignes")
+
+    # Mesures sur les lignes jamais vues par le pré-filtre ni par la calibration
+    holdout = evaluate_band(y_eval, prefilter_scores(prefilter, X_eval), model.predict_proba(X_eval)[:, 1],
+                            band["low"], band["high"], threshold)
+    cascade = CascadeModel(prefilter, model, band["low"], band["high"], threshold)
+    X_bench = X_eval.iloc[np.resize(np.arange(len(X_eval)), 20_000)]
+    model_rate = measure_throughput(model, X_bench)
+    cascade_rate = measure_throughput(cascade, X_bench)
+
+    print(f"\n  Bande incertaine: ]{band['low']:.3f}, {band['high']:.3f}] "
+          f"(calibrée sur {len(y_calib):,} lignes)")
+    print(f"  Mesures sur {holdout['rows']:,} lignes réservées :")
+    print(f"  Escalade vers la forêt: {holdout['escalation_rate'] * 100:.1f}% des transactions")
+    print(f"  Rappel: {holdout['model_recall']:.4f} → {holdout['recall']:.4f} "
+          f"(perte {holdout['recall_loss']:.4f})")
+    print(f"  Précision: {holdout['model_precision']:.4f} → {holdout['precision']:.4f} "
+          f"(perte {holdout['precision_loss']:.4f})")
+    print(f"  Débit (20 000 lignes): forêt {model_rate:,.0f}/s, cascade {cascade_rate:,.0f}/s "
+          f"(x{cascade_rate / model_rate:.1f})")
+    if holdout["recall_loss"] > args.max_recall_loss or holdout["precision_loss"] > args.max_precision_loss:
+        print(" ⚠️  Sur les lignes réservées, la perte dépasse les bornes de calibration")
+
+    if args.dry_run:
+        print("\n  Mode --dry-run : rien n'est sauvegardé")
+        return 0
+    if metadata is None:
+        print(" ❌ Aucune métadonnée associée au modèle")
+        return 1
+
+    import joblib
+    prefilter_path = os.path.join(os.path.dirname(model_path),
+                                  f"prefilter_{model_store._timestamp_of(model_path)}.joblib")
+    joblib.dump(prefilter, prefilter_path)
+    metadata["cascade"] = dict(band, **{
+        "prefilter": os.path.basename(prefilter_path),
+        "prefilter_kind": args.prefilter,
+        "max_recall_loss": args.max_recall_loss,
+        "max_precision_loss": args.max_precision_loss,
+        "throughput_gain": round(cascade_rate / model_rate, 2),
+        "holdout": holdout,
+        "test_data": os.path.basename(test_data_path),
+        "computed_at": datetime.now().isoformat()
+    })
+    model_store.save_metadata(metadata, metadata_path)
+    print(f"\n ✅ Pré-filtre: {os.path.basename(prefilter_path)}")
+    print(f" ✅ Cascade écrite dans: {os.path.basename(metadata_path)}")
+    print("  Activez-la avec CASCADE_ENABLED=1 au prochain démarrage de l'API")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
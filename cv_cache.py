@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Cache persistant des validations croisées
+
+Une validation croisée n'est recalculée que si les données, la graine de
+division ou les hyperparamètres du modèle ont changé. La clé combine :
+  - l'empreinte des données (division en cache ou objet en mémoire) ;
+  - la graine de division et le nombre de plis (ou l'objet de division) ;
+  - la classe et les paramètres de l'estimateur (get_params()).
+
+Chaque entrée de data_cache/cv/<clé>/ contient les scores par pli
+(scores.json) et, optionnellement, les modèles entraînés sur chaque pli
+(folds.joblib). Le cache compte ses succès et le temps de calcul économisé.
+
+Usage:
+    from cv_cache import CrossValidationCache
+    cache = CrossValidationCache()
+    scores = cache.cross_val_score(model, X_train, y_train, cv=5, data_hash=..., seed=42)
+    print(cache.stats())
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+
+import numpy as np
+
+import model_store
+
+CV_CACHE_DIR = os.environ.get('CV_CACHE_DIR', os.path.join(model_store.BASE_DIR, "data_cache", "cv"))
+STORE_FOLD_ESTIMATORS = os.environ.get('CV_CACHE_STORE_ESTIMATORS', '1') == '1'
+
+
+def estimator_fingerprint(estimator):
+    """Classe et hyperparamètres d'un estimateur, sous forme canonique"""
+    params = estimator.get_params(deep=True)
+    return {
+        "class": f"{type(estimator).__module__}.{type(estimator).__name__}",
+        # Les sous-estimateurs apparaissent aussi via leurs paramètres "a__b"
+        "params": {key: repr(value) for key, value in sorted(params.items())}
+    }
+
+
+def cv_fingerprint(cv):
+    """Nombre de plis tel quel ; objet de division (StratifiedKFold...) : classe et paramètres"""
+    if cv is None or isinstance(cv, (int, np.integer)):
+        return None if cv is None else int(cv)
+    # repr des diviseurs sklearn : StratifiedKFold(n_splits=5, random_state=42, shuffle=True)
+    return f"{type(cv).__module__}.{repr(cv)}"
+
+
+def cache_key(data_hash, seed, estimator, cv, scoring=None):
+    payload = json.dumps({
+        "data": data_hash,
+        "seed": seed,
+        "cv": cv_fingerprint(cv),
+        "scoring": scoring,
+        "estimator": estimator_fingerprint(estimator)
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class CrossValidationCache:
+    """Validations croisées mémorisées sur disque"""
+
+    def __init__(self, cache_dir=CV_CACHE_DIR, store_estimators=STORE_FOLD_ESTIMATORS):
+        self.cache_dir = cache_dir
+        self.store_estimators = store_estimators
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.computed_seconds = 0.0
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def _read(self, key):
+        try:
+            with open(os.path.join(self._entry_dir(key), "scores.json"), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, key, entry, estimators):
+        import joblib
+
+        path = self._entry_dir(key)
+        work_dir = f"{path}.tmp{os.getpid()}"
+        shutil.rmtree(work_dir, ignore_errors=True)
+        os.makedirs(work_dir)
+        if estimators is not None:
+            joblib.dump(estimators, os.path.join(work_dir, "folds.joblib"))
+        with open(os.path.join(work_dir, "scores.json"), 'w') as f:
+            json.dump(entry, f, indent=2)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(work_dir, path)
+
+    def cross_val_score(self, estimator, X, y, cv=5, data_hash=None, seed=None, scoring=None):
+        """Comme sklearn.model_selection.cross_val_score, avec mémorisation
+
+        data_hash : empreinte des données (calculée avec joblib.hash si absente).
+        """
+        from sklearn.model_selection import cross_validate
+
+        if data_hash is None:
+            import joblib
+            data_hash = joblib.hash((X, y))
+
+        key = cache_key(data_hash, seed, estimator, cv, scoring)
+        entry = self._read(key)
+        if entry is not None:
+            self.hits += 1
+            self.saved_seconds += entry["seconds"]
+            return np.asarray(entry["scores"])
+
+        start = time.perf_counter()
+        result = cross_validate(estimator, X, y, cv=cv, scoring=scoring,
+                                return_estimator=self.store_estimators)
+        elapsed = time.perf_counter() - start
+        self.misses += 1
+        self.computed_seconds += elapsed
+
+        entry = {
+            "scores": result["test_score"].tolist(),
+            "fit_seconds": result["fit_time"].tolist(),
+            "seconds": elapsed,
+            "estimator": estimator_fingerprint(estimator),
+            "data_hash": data_hash,
+            "seed": seed,
+            "cv": cv_fingerprint(cv),
+            "scoring": scoring
+        }
+        self._write(key, entry, result.get("estimator"))
+        return result["test_score"]
+
+    def fold_estimators(self, estimator, cv=5, data_hash=None, seed=None, scoring=None):
+        """Modèles entraînés sur chaque pli (None s'ils n'ont pas été conservés)"""
+        import joblib
+
+        path = os.path.join(self._entry_dir(cache_key(data_hash, seed, estimator, cv, scoring)),
+                            "folds.joblib")
+        return joblib.load(path) if os.path.exists(path) else None
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "saved_seconds": round(self.saved_seconds, 3),
+            "computed_seconds": round(self.computed_seconds, 3)
+        }
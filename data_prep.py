@@ -0,0 +1,528 @@
+#!/usr/bin/env python3
+"""
+Préparation des données par blocs, à mémoire bornée
+
+Reproduit la préparation du notebook (doublons, valeurs aberrantes IQR,
+imputation médiane / mode) sans jamais charger le CSV en entier :
+
+  1. lecture par blocs, typage compact (downcast sans perte) et déduplication
+     par empreinte de ligne (64 bits, 8 octets par ligne unique en mémoire) ;
+     les lignes retenues sont ajoutées colonne par colonne au cache ;
+  2. quantiles et médianes par histogrammes, colonne par colonne sur le cache
+     (exacts pour les entiers, sinon à une largeur de case près) ;
+  3. imputation (médiane / mode) en place et comptage des valeurs aberrantes.
+
+Le résultat est un cache colonnaire : un fichier binaire par colonne, lisible
+par np.memmap, et un manifest.json (schéma, statistiques, temps et pic mémoire
+de chaque étape). Le rééquilibrage des classes reste à l'entraînement : le
+manifeste fournit la distribution de la cible.
+
+Usage:
+    python data_prep.py --input creditcarddata.csv
+    python data_prep.py --input transactions.csv --output data_cache/prepared --chunk-size 200000
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+import model_store
+
+TARGET_COLUMN = "PotentialFraud"
+DEFAULT_INPUT = os.path.join(model_store.BASE_DIR, "creditcarddata.csv")
+DEFAULT_OUTPUT = os.path.join(model_store.BASE_DIR, "data_cache", "prepared")
+DEFAULT_CHUNK_SIZE = int(os.environ.get('DATA_PREP_CHUNK_SIZE', 100_000))
+
+MANIFEST_NAME = "manifest.json"
+HISTOGRAM_BINS = 65536
+# Entiers : histogramme exact (une case par valeur) jusqu'à cette étendue (32 Mo)
+EXACT_INTEGER_RANGE = 1 << 22
+QUARTILES = (0.25, 0.5, 0.75)
+
+
+# ---------------------------------------------------------------------------
+# Mesure des étapes
+# ---------------------------------------------------------------------------
+
+@contextmanager
+def measure_step(name, steps):
+    """Temps et pic mémoire (tracemalloc) d'une étape, ajoutés à steps"""
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    entry = {"step": name}
+    start = time.perf_counter()
+    try:
+        yield entry
+    finally:
+        entry["seconds"] = round(time.perf_counter() - start, 3)
+        entry["peak_mb"] = round((tracemalloc.get_traced_memory()[1] - baseline) / 1e6, 1)
+        steps.append(entry)
+
+
+def _max_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss est en Ko sous Linux, en octets sous macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1e6, 1)
+
+
+# ---------------------------------------------------------------------------
+# Déduplication
+# ---------------------------------------------------------------------------
+
+class HashedRowIndex:
+    """Ensemble des empreintes de lignes déjà vues
+
+    Tableaux triés de tailles décroissantes, fusionnés comme un compteur
+    binaire : insertion amortie en O(log n), recherche vectorisée par
+    np.searchsorted. Avec des empreintes 64 bits, la probabilité d'une
+    collision reste inférieure à 1e-3 jusqu'à 10^8 lignes uniques.
+    """
+
+    def __init__(self):
+        self._levels = []
+        self.size = 0
+
+    def _contains(self, hashes):
+        found = np.zeros(len(hashes), dtype=bool)
+        for level in self._levels:
+            positions = np.searchsorted(level, hashes)
+            np.minimum(positions, len(level) - 1, out=positions)
+            found |= level[positions] == hashes
+        return found
+
+    def add(self, hashes):
+        """Indexer un bloc et retourner le masque de ses lignes jamais vues"""
+        unique, first = np.unique(hashes, return_index=True)
+        new = ~self._contains(unique)
+
+        keep = np.zeros(len(hashes), dtype=bool)
+        keep[first[new]] = True
+
+        level = unique[new]
+        while self._levels and len(self._levels[-1]) <= len(level):
+            level = np.sort(np.concatenate([self._levels.pop(), level]))
+        if len(level):
+            self._levels.append(level)
+        self.size += int(new.sum())
+        return keep
+
+
+def row_hashes(chunk, numeric_columns):
+    """Empreintes 64 bits des lignes, indépendantes du typage du bloc"""
+    import pandas as pd
+
+    # Un entier lu en int64 dans un bloc et en float64 dans un autre (NaN)
+    # doit avoir la même empreinte : les colonnes numériques sont hachées en float64
+    canonical = chunk.astype({column: np.float64 for column in numeric_columns})
+    return pd.util.hash_pandas_object(canonical, index=False).to_numpy()
+
+
+# ---------------------------------------------------------------------------
+# Typage et écriture colonnaire
+# ---------------------------------------------------------------------------
+
+def downcast(values):
+    """Plus petit type numérique représentant les valeurs sans perte"""
+    if values.dtype.kind == "b":
+        return values.astype(np.int8)
+    if values.dtype.kind in "iu":
+        if len(values) == 0:
+            return values.astype(np.int8)
+        low, high = values.min(), values.max()
+        for dtype in (np.int8, np.int16, np.int32):
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return values.astype(dtype)
+        return values.astype(np.int64)
+    if values.dtype.kind == "f":
+        narrow = values.astype(np.float32)
+        if np.array_equal(narrow.astype(values.dtype), values, equal_nan=True):
+            return narrow
+        return values.astype(np.float64)
+    return values
+
+
+class ColumnWriter:
+    """Ajout de blocs à un fichier binaire de colonne, avec élargissement du type"""
+
+    def __init__(self, path, chunk_size):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.dtype = None
+        self.rows = 0
+        self._file = open(path, 'wb')
+
+    def append(self, values):
+        dtype = values.dtype if self.dtype is None else np.promote_types(self.dtype, values.dtype)
+        if self.dtype is not None and dtype != self.dtype:
+            self._widen(dtype)
+        self.dtype = dtype
+        values.astype(dtype, copy=False).tofile(self._file)
+        self.rows += len(values)
+
+    def _widen(self, dtype):
+        # Un bloc tardif exige un type plus large : conversion du fichier par blocs
+        self._file.close()
+        narrow_path = self.path + ".narrow"
+        os.replace(self.path, narrow_path)
+        with open(narrow_path, 'rb') as source, open(self.path, 'wb') as target:
+            while True:
+                block = np.fromfile(source, dtype=self.dtype, count=self.chunk_size)
+                if not len(block):
+                    break
+                block.astype(dtype).tofile(target)
+        os.remove(narrow_path)
+        self._file = open(self.path, 'ab')
+
+    def close(self):
+        self._file.close()
+
+
+class CategoryEncoder:
+    """Encodage par dictionnaire d'une colonne textuelle (code -1 : manquant)"""
+
+    def __init__(self):
+        self.vocabulary = {}
+
+    def encode(self, series):
+        import pandas as pd
+
+        codes, uniques = pd.factorize(series)
+        mapping = np.array([self.vocabulary.setdefault(value, len(self.vocabulary))
+                            for value in uniques], dtype=np.int32)
+        if not len(mapping):
+            return np.full(len(codes), -1, dtype=np.int32)
+        return np.where(codes >= 0, mapping[codes], -1).astype(np.int32)
+
+    def values(self):
+        return list(self.vocabulary)
+
+
+# ---------------------------------------------------------------------------
+# Quantiles par histogramme
+# ---------------------------------------------------------------------------
+
+def _iter_blocks(array, chunk_size):
+    for start in range(0, len(array), chunk_size):
+        yield start, array[start:start + chunk_size]
+
+
+def histogram_quantiles(column, low, high, chunk_size, quantiles=QUARTILES):
+    """Quantiles (interpolation linéaire, comme pandas) par histogramme en flux
+
+    Retourne (quantiles, exact) : exact si la colonne est entière et son
+    étendue tient dans EXACT_INTEGER_RANGE ; sinon l'erreur est bornée par
+    la largeur d'une case, (max - min) / HISTOGRAM_BINS.
+    """
+    exact = column.dtype.kind in "iu" and high - low < EXACT_INTEGER_RANGE
+    if exact:
+        n_bins, width = int(high - low) + 1, 1.0
+    else:
+        n_bins = HISTOGRAM_BINS
+        width = (high - low) / n_bins if high > low else 1.0
+
+    counts = np.zeros(n_bins, dtype=np.int64)
+    for _, block in _iter_blocks(column, chunk_size):
+        if block.dtype.kind == "f":
+            block = block[~np.isnan(block)]
+        if exact:
+            bins = block.astype(np.int64) - int(low)
+        else:
+            bins = ((block.astype(np.float64) - low) / width).astype(np.int64)
+            np.clip(bins, 0, n_bins - 1, out=bins)
+        counts += np.bincount(bins, minlength=n_bins)
+
+    cumulative = np.cumsum(counts)
+    total = int(cumulative[-1])
+
+    def order_statistic(k):
+        b = int(np.searchsorted(cumulative, k, side='right'))
+        if exact:
+            return low + b
+        rank = k - (cumulative[b] - counts[b])
+        return min(high, low + (b + (rank + 0.5) / counts[b]) * width)
+
+    results = []
+    for q in quantiles:
+        position = q * (total - 1)
+        below = int(np.floor(position))
+        lower_value = order_statistic(below)
+        upper_value = order_statistic(min(below + 1, total - 1))
+        results.append(float(lower_value + (position - below) * (upper_value - lower_value)))
+    return results, exact
+
+
+# ---------------------------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------------------------
+
+def _read_chunks(input_path, chunk_size):
+    import pandas as pd
+    return pd.read_csv(input_path, chunksize=chunk_size)
+
+
+def _ingest(input_path, work_dir, chunk_size, target_column):
+    """Étape 1 : lecture par blocs, typage, déduplication et écriture des colonnes"""
+    import pandas as pd
+
+    index = HashedRowIndex()
+    writers, encoders, stats = {}, {}, {}
+    numeric_columns = None
+    rows_read = 0
+    class_counts = {}
+
+    for chunk in _read_chunks(input_path, chunk_size):
+        if numeric_columns is None:
+            numeric_columns = [c for c in chunk.columns
+                               if pd.api.types.is_numeric_dtype(chunk[c])
+                               or pd.api.types.is_bool_dtype(chunk[c])]
+            for column in chunk.columns:
+                writers[column] = ColumnWriter(os.path.join(work_dir, f"{column}.bin"), chunk_size)
+                stats[column] = {"missing": 0, "min": None, "max": None}
+                if column not in numeric_columns:
+                    encoders[column] = CategoryEncoder()
+        else:
+            for column in numeric_columns:
+                if not (pd.api.types.is_numeric_dtype(chunk[column])
+                        or pd.api.types.is_bool_dtype(chunk[column])):
+                    raise ValueError(f"Colonne '{column}' non numérique à partir de la ligne {rows_read}")
+
+        rows_read += len(chunk)
+        chunk = chunk[index.add(row_hashes(chunk, numeric_columns))]
+
+        for column in chunk.columns:
+            stat = stats[column]
+            if column in encoders:
+                values = encoders[column].encode(chunk[column])
+                stat["missing"] += int((values < 0).sum())
+            else:
+                values = downcast(chunk[column].to_numpy())
+                if values.dtype.kind == "f":
+                    missing = np.isnan(values)
+                    stat["missing"] += int(missing.sum())
+                    present = values[~missing]
+                else:
+                    present = values
+                if len(present):
+                    low, high = present.min().item(), present.max().item()
+                    stat["min"] = low if stat["min"] is None else min(stat["min"], low)
+                    stat["max"] = high if stat["max"] is None else max(stat["max"], high)
+                if column == target_column:
+                    labels, counts = np.unique(present, return_counts=True)
+                    for label, count in zip(labels.tolist(), counts.tolist()):
+                        class_counts[label] = class_counts.get(label, 0) + count
+            writers[column].append(values)
+
+    for writer in writers.values():
+        writer.close()
+
+    columns = []
+    for column, writer in writers.items():
+        entry = {"name": column, "dtype": str(writer.dtype if writer.dtype is not None else np.int8),
+                 "kind": "categorical" if column in encoders else "numeric"}
+        entry.update(stats[column])
+        if column in encoders:
+            entry["vocabulary"] = encoders[column].values()
+        columns.append(entry)
+
+    return {
+        "rows_read": rows_read,
+        "rows": index.size,
+        "duplicates": rows_read - index.size,
+        "columns": columns,
+        "class_counts": {str(label): count for label, count in sorted(class_counts.items())}
+    }
+
+
+def _column_stats(work_dir, manifest, chunk_size):
+    """Étape 2 : quartiles, médianes, bornes IQR et modes"""
+    columns = open_columns(work_dir, manifest=manifest)
+    for entry in manifest["columns"]:
+        column = columns[entry["name"]]
+        if entry["kind"] == "categorical":
+            counts = np.zeros(max(len(entry["vocabulary"]), 1), dtype=np.int64)
+            for _, block in _iter_blocks(column, chunk_size):
+                counts += np.bincount(block[block >= 0], minlength=len(counts))
+            # À effectif égal, pandas.mode() retourne la plus petite valeur
+            best = counts.max()
+            candidates = [entry["vocabulary"][i] for i in np.flatnonzero(counts == best)]
+            entry["fill_value"] = sorted(candidates)[0] if entry["vocabulary"] else None
+            continue
+        if entry["min"] is None:
+            continue
+
+        (q1, median, q3), exact = histogram_quantiles(column, entry["min"], entry["max"], chunk_size)
+        iqr = q3 - q1
+        entry.update({
+            "quantiles": {"0.25": q1, "0.5": median, "0.75": q3},
+            "median": median,
+            "quantiles_exact": exact,
+            "iqr_bounds": [q1 - 1.5 * iqr, q3 + 1.5 * iqr],
+            "fill_value": median
+        })
+
+
+def _impute(work_dir, manifest, chunk_size):
+    """Étape 3 : imputation en place et comptage des valeurs aberrantes"""
+    columns = open_columns(work_dir, manifest=manifest, mode='r+')
+    for entry in manifest["columns"]:
+        column = columns[entry["name"]]
+        if entry["kind"] == "categorical":
+            if entry["missing"] and entry["fill_value"] is not None:
+                fill_code = entry["vocabulary"].index(entry["fill_value"])
+                for _, block in _iter_blocks(column, chunk_size):
+                    block[block < 0] = fill_code
+            continue
+        if "iqr_bounds" not in entry:
+            continue
+
+        lower, upper = entry["iqr_bounds"]
+        outliers = 0
+        for _, block in _iter_blocks(column, chunk_size):
+            outliers += int(((block < lower) | (block > upper)).sum())
+            if entry["missing"]:
+                block[np.isnan(block)] = entry["fill_value"]
+        entry["outliers"] = outliers
+    for column in columns.values():
+        if isinstance(column, np.memmap):
+            column.flush()
+
+
+def prepare(input_path=DEFAULT_INPUT, output_dir=DEFAULT_OUTPUT, chunk_size=DEFAULT_CHUNK_SIZE,
+            target_column=TARGET_COLUMN, extra=None):
+    """Exécuter le pipeline et retourner le manifeste du cache produit
+
+    extra : champs supplémentaires à enregistrer dans le manifeste.
+    """
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+
+    work_dir = output_dir.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir)
+
+    steps = []
+    try:
+        with measure_step("lecture, typage et déduplication", steps) as step:
+            manifest = _ingest(input_path, work_dir, chunk_size, target_column)
+            step["rows"] = manifest["rows_read"]
+        with measure_step("quantiles et modes", steps) as step:
+            _column_stats(work_dir, manifest, chunk_size)
+            step["rows"] = manifest["rows"]
+        with measure_step("imputation et valeurs aberrantes", steps) as step:
+            _impute(work_dir, manifest, chunk_size)
+            step["rows"] = manifest["rows"]
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+    counts = list(manifest["class_counts"].values())
+    manifest.update({
+        "source": os.path.basename(input_path),
+        "source_bytes": os.path.getsize(input_path),
+        "chunk_size": chunk_size,
+        "target": target_column,
+        "imbalance_ratio": round(max(counts) / min(counts), 4) if len(counts) > 1 else None,
+        "steps": steps,
+        "max_rss_mb": _max_rss_mb(),
+        "created_at": datetime.now().isoformat()
+    })
+    manifest.update(extra or {})
+
+    # Le manifeste est écrit en dernier : un cache sans manifeste est incomplet
+    with open(os.path.join(work_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(work_dir, output_dir)
+    return manifest
+
+
+# ---------------------------------------------------------------------------
+# Lecture du cache
+# ---------------------------------------------------------------------------
+
+def load_manifest(cache_dir=DEFAULT_OUTPUT):
+    with open(os.path.join(cache_dir, MANIFEST_NAME), 'r') as f:
+        return json.load(f)
+
+
+def open_columns(cache_dir=DEFAULT_OUTPUT, columns=None, manifest=None, mode='r'):
+    """Colonnes du cache en np.memmap (codes entiers pour les colonnes textuelles)"""
+    manifest = manifest or load_manifest(cache_dir)
+    arrays = {}
+    for entry in manifest["columns"]:
+        if columns is not None and entry["name"] not in columns:
+            continue
+        dtype = np.dtype(entry["dtype"])
+        if manifest["rows"] == 0:
+            arrays[entry["name"]] = np.empty(0, dtype=dtype)
+        else:
+            arrays[entry["name"]] = np.memmap(os.path.join(cache_dir, f"{entry['name']}.bin"),
+                                              dtype=dtype, mode=mode, shape=(manifest["rows"],))
+    return arrays
+
+
+def load_frame(cache_dir=DEFAULT_OUTPUT, columns=None):
+    """DataFrame préparé (colonnes textuelles décodées)"""
+    import pandas as pd
+
+    manifest = load_manifest(cache_dir)
+    arrays = open_columns(cache_dir, columns, manifest)
+    data = {}
+    for entry in manifest["columns"]:
+        if entry["name"] not in arrays:
+            continue
+        values = arrays[entry["name"]]
+        if entry["kind"] == "categorical":
+            values = np.asarray(entry["vocabulary"], dtype=object)[values]
+        data[entry["name"]] = np.asarray(values)
+    return pd.DataFrame(data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Préparation des données par blocs")
+    parser.add_argument("--input", default=DEFAULT_INPUT, help="Fichier CSV source")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Répertoire du cache colonnaire")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Lignes par bloc")
+    parser.add_argument("--target", default=TARGET_COLUMN, help="Variable cible")
+    args = parser.parse_args(argv)
+
+    print("🧹 PRÉPARATION DES DONNÉES PAR BLOCS")
+    print("=" * 50)
+    manifest = prepare(args.input, args.output, args.chunk_size, args.target)
+
+    print(f"  Lignes lues: {manifest['rows_read']:,} | doublons: {manifest['duplicates']:,} "
+          f"| lignes retenues: {manifest['rows']:,}")
+    print(f"\n  {'Étape':<36}{'Temps (s)':>10}{'Pic (Mo)':>10}")
+    for step in manifest["steps"]:
+        print(f"  {step['step']:<36}{step['seconds']:>10.2f}{step['peak_mb']:>10.1f}")
+    if manifest["max_rss_mb"] is not None:
+        print(f"  RSS maximal du processus: {manifest['max_rss_mb']:.1f} Mo")
+
+    print(f"\n  {'Colonne':<26}{'Type':>9}{'Manq.':>8}{'Médiane':>14}{'Aberr.':>9}")
+    for entry in manifest["columns"]:
+        median = entry.get("median")
+        median = f"{median:.2f}" if median is not None else str(entry.get("fill_value"))
+        print(f"  {entry['name']:<26}{entry['dtype']:>9}{entry['missing']:>8}{median:>14}"
+              f"{entry.get('outliers', '-'):>9}")
+    print(f"\n  Distribution de la cible: {manifest['class_counts']} "
+          f"(ratio {manifest['imbalance_ratio']})")
+    print(f"\n ✅ Cache colonnaire: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
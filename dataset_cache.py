@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Jeu d'entraînement préparé, mis en cache par empreinte du fichier source
+
+Le CSV n'est lu et nettoyé (data_prep.py) qu'une fois par contenu : le cache
+colonnaire est rangé dans data_cache/<empreinte>/ et reconstruit seulement si
+le fichier source change. Les indices de division train/test y sont aussi
+enregistrés (.npy, ouverts en np.memmap), pour chaque combinaison
+rééquilibrage / taille du test / graine :
+
+  - balance="upsample" reproduit le notebook : sur-échantillonnage de la classe
+    minoritaire (resample, random_state=42), puis train_test_split stratifié ;
+    les doublons ne sont pas matérialisés, ce sont des indices répétés ;
+  - balance="none" divise les lignes uniques, sans rééquilibrage.
+
+Usage:
+    python dataset_cache.py --source creditcarddata.csv          # construit / vérifie le cache
+    python dataset_cache.py --source creditcarddata.csv --rebuild
+
+    from dataset_cache import get_dataset
+    X_train, X_test, y_train, y_test = get_dataset("creditcarddata.csv").train_test()
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+
+import numpy as np
+
+import data_prep
+import model_store
+
+DATA_CACHE_DIR = os.environ.get('DATA_CACHE_DIR', os.path.join(model_store.BASE_DIR, "data_cache"))
+SOURCES_INDEX = "sources.json"
+
+# Paramètres de division du notebook
+DEFAULT_BALANCE = "upsample"
+DEFAULT_TEST_SIZE = 0.3
+DEFAULT_SEED = 42
+BALANCE_STRATEGIES = ("upsample", "none")
+
+
+# ---------------------------------------------------------------------------
+# Empreinte de la source
+# ---------------------------------------------------------------------------
+
+def _load_sources(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, SOURCES_INDEX), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_sources(cache_dir, sources):
+    path = os.path.join(cache_dir, SOURCES_INDEX)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(sources, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def source_hash(source_path, cache_dir=DATA_CACHE_DIR):
+    """SHA-256 du fichier source
+
+    L'empreinte est mémorisée avec la taille et la date de modification du
+    fichier : elle n'est recalculée que si le fichier a été modifié.
+    """
+    source_path = os.path.abspath(source_path)
+    stat = os.stat(source_path)
+    sources = _load_sources(cache_dir)
+    known = sources.get(source_path)
+    if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+        return known["sha256"]
+
+    digest = model_store.file_hash(source_path)
+    sources[source_path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+    os.makedirs(cache_dir, exist_ok=True)
+    _save_sources(cache_dir, sources)
+    return digest
+
+
+# ---------------------------------------------------------------------------
+# Jeu de données en cache
+# ---------------------------------------------------------------------------
+
+class TrainingDataset:
+    """Colonnes préparées (np.memmap) et indices de division en cache"""
+
+    def __init__(self, path):
+        self.path = path
+        self.manifest = data_prep.load_manifest(path)
+        self.columns = data_prep.open_columns(path, manifest=self.manifest)
+        self.target = self.manifest["target"]
+        self.features = [entry["name"] for entry in self.manifest["columns"]
+                         if entry["name"] != self.target]
+
+    def __len__(self):
+        return self.manifest["rows"]
+
+    @property
+    def source_sha256(self):
+        return self.manifest.get("source_sha256")
+
+    def labels(self):
+        return np.asarray(self.columns[self.target])
+
+    def frame(self, rows=None, columns=None):
+        """DataFrame des lignes demandées (toutes par défaut)"""
+        import pandas as pd
+
+        columns = columns or self.features
+        entries = {entry["name"]: entry for entry in self.manifest["columns"]}
+        data = {}
+        for name in columns:
+            values = self.columns[name] if rows is None else self.columns[name][rows]
+            if entries[name]["kind"] == "categorical":
+                values = np.asarray(entries[name]["vocabulary"], dtype=object)[values]
+            data[name] = np.asarray(values)
+        return pd.DataFrame(data)
+
+    def split(self, balance=DEFAULT_BALANCE, test_size=DEFAULT_TEST_SIZE, seed=DEFAULT_SEED):
+        """Indices (train, test) des lignes du cache, calculés une seule fois"""
+        if balance not in BALANCE_STRATEGIES:
+            raise ValueError(f"Rééquilibrage inconnu: {balance}")
+
+        split_dir = os.path.join(self.path, "splits", f"{balance}_test{test_size}_seed{seed}")
+        train_path = os.path.join(split_dir, "train.npy")
+        test_path = os.path.join(split_dir, "test.npy")
+        if os.path.exists(train_path) and os.path.exists(test_path):
+            return np.load(train_path, mmap_mode='r'), np.load(test_path, mmap_mode='r')
+
+        train_idx, test_idx = self._compute_split(balance, test_size, seed)
+        os.makedirs(split_dir, exist_ok=True)
+        for path, indices in ((train_path, train_idx), (test_path, test_idx)):
+            tmp_path = path + ".tmp.npy"
+            np.save(tmp_path, indices)
+            os.replace(tmp_path, path)
+        return train_idx, test_idx
+
+    def _compute_split(self, balance, test_size, seed):
+        from sklearn.model_selection import train_test_split
+        from sklearn.utils import resample
+
+        y = self.labels()
+        rows = np.arange(len(y), dtype=np.int64)
+        if balance == "upsample":
+            # Même tirage que le notebook : la classe majoritaire, puis la
+            # minoritaire sur-échantillonnée (resample ne dépend que du nombre de lignes)
+            labels, counts = np.unique(y, return_counts=True)
+            if len(labels) > 1:
+                order = np.argsort(-counts, kind='stable')
+                majority = rows[y == labels[order[0]]]
+                minority = rows[y == labels[order[1]]]
+                upsampled = resample(minority, replace=True, n_samples=len(majority),
+                                     random_state=seed)
+                rows = np.concatenate([majority, upsampled])
+
+        train_idx, test_idx = train_test_split(rows, test_size=test_size, random_state=seed,
+                                               stratify=y[rows])
+        index_dtype = np.int32 if len(y) < np.iinfo(np.int32).max else np.int64
+        return train_idx.astype(index_dtype), test_idx.astype(index_dtype)
+
+    def test_set(self, balance=DEFAULT_BALANCE, test_size=DEFAULT_TEST_SIZE, seed=DEFAULT_SEED):
+        """X_test, y_test seuls (évaluation, calibration des seuils)"""
+        import pandas as pd
+
+        _, test_idx = self.split(balance, test_size, seed)
+        return self.frame(test_idx), pd.Series(self.labels()[test_idx], name=self.target)
+
+    def split_key(self, balance=DEFAULT_BALANCE, test_size=DEFAULT_TEST_SIZE, seed=DEFAULT_SEED):
+        """Identifiant d'une division : empreinte de la source et paramètres"""
+        return f"{self.source_sha256}:{balance}_test{test_size}_seed{seed}"
+
+    def train_test(self, balance=DEFAULT_BALANCE, test_size=DEFAULT_TEST_SIZE, seed=DEFAULT_SEED):
+        """X_train, X_test, y_train, y_test comme dans le notebook"""
+        import pandas as pd
+
+        train_idx, test_idx = self.split(balance, test_size, seed)
+        y = self.labels()
+        return (self.frame(train_idx), self.frame(test_idx),
+                pd.Series(y[train_idx], name=self.target), pd.Series(y[test_idx], name=self.target))
+
+
+def cache_path_for(digest, cache_dir=DATA_CACHE_DIR):
+    return os.path.join(cache_dir, digest[:16])
+
+
+def get_dataset(source_path=data_prep.DEFAULT_INPUT, cache_dir=DATA_CACHE_DIR, rebuild=False,
+                chunk_size=data_prep.DEFAULT_CHUNK_SIZE):
+    """Jeu préparé pour ce fichier source, construit seulement si son contenu a changé"""
+    digest = source_hash(source_path, cache_dir)
+    path = cache_path_for(digest, cache_dir)
+
+    if not rebuild:
+        try:
+            dataset = TrainingDataset(path)
+            if dataset.source_sha256 == digest:
+                return dataset
+        except (OSError, ValueError, KeyError):
+            pass
+
+    data_prep.prepare(source_path, path, chunk_size,
+                      extra={"source_sha256": digest, "source_path": os.path.abspath(source_path)})
+    _prune_stale(cache_dir, os.path.abspath(source_path), keep=path)
+    return TrainingDataset(path)
+
+
+def _prune_stale(cache_dir, source_path, keep):
+    """Supprimer les caches d'anciennes versions du même fichier source"""
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if path == keep or not os.path.isdir(path):
+            continue
+        try:
+            manifest = data_prep.load_manifest(path)
+        except (OSError, ValueError):
+            continue
+        if manifest.get("source_path") == source_path:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cache du jeu d'entraînement préparé")
+    parser.add_argument("--source", default=data_prep.DEFAULT_INPUT, help="Fichier CSV source")
+    parser.add_argument("--rebuild", action="store_true", help="Reconstruire le cache")
+    parser.add_argument("--balance", choices=BALANCE_STRATEGIES, default=DEFAULT_BALANCE)
+    args = parser.parse_args(argv)
+
+    print("🗄️  CACHE DU JEU D'ENTRAÎNEMENT")
+    print("=" * 50)
+    start = time.perf_counter()
+    dataset = get_dataset(args.source, rebuild=args.rebuild)
+    train_idx, test_idx = dataset.split(args.balance)
+    elapsed = time.perf_counter() - start
+
+    print(f"  Source: {os.path.basename(args.source)} (sha256 {dataset.source_sha256[:16]})")
+    print(f"  Cache: {dataset.path}")
+    print(f"  Lignes préparées: {len(dataset):,} | features: {len(dataset.features)}")
+    print(f"  Division '{args.balance}': {len(train_idx):,} train / {len(test_idx):,} test")
+    print(f"\n ✅ Prêt en {elapsed:.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
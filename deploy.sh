@@ -89,7 +89,8 @@ start_api() {
     # Attendre le démarrage avec vérification progressive
     for i in {1..10}; do
         sleep 1
-        if curl -s "${API_URL}/health" > /dev/null 2>&1; then
+        # /readyz ne répond 200 qu'une fois le modèle chargé en arrière-plan
+        if curl -sf "${API_URL}/readyz" > /dev/null 2>&1; then
             log_success "API démarrée avec succès (PID: $API_PID)"
             return 0
         fi
@@ -132,6 +133,8 @@ show_info() {
     echo " Endpoints:"
     echo "   GET  /           - Informations sur l'API"
     echo "   GET  /health     - Vérification de santé"
+    echo "   GET  /livez      - Liveness (processus actif)"
+    echo "   GET  /readyz     - Readiness (modèle chargé)"
     echo "   GET  /model-info - Informations du modèle"
     echo "   POST /predict    - Prédiction de fraude"
     echo ""
@@ -212,7 +215,11 @@ case "${1:-deploy}" in
         test_api
         ;;
     "logs")
-        if [ -f "api.log" ]; then
+        # Journal JSON structuré de l'API (request_log.py), sinon sortie console
+        # Un fichier par processus (logs/api_<pid>.log)
+        if ls logs/api_*.log >/dev/null 2>&1; then
+            tail -f logs/api_*.log
+        elif [ -f "api.log" ]; then
             tail -f api.log
         else
             log_error "Fichier de logs non trouvé"
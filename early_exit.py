@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Évaluation de la forêt avec sortie anticipée
+
+Les arbres sont évalués par paquets ; après chaque paquet, une ligne sort
+dès que sa décision (probabilité > seuil) est acquise :
+  - de façon certaine : même si tous les arbres restants votaient à 0 (ou
+    à 1), la moyenne finale resterait du même côté du seuil ;
+  - ou, si une marge est configurée, quand la moyenne courante est à plus
+    de `margin` du seuil (décision quasi certaine, probabilité approchée).
+
+La probabilité retournée pour une ligne sortie tôt est la moyenne des
+arbres évalués. predict_proba(X, exact=True) évalue toujours toute la forêt.
+
+Avec des seuils par segment (segments : table de segment_thresholds.py),
+chaque ligne sort par rapport à son propre seuil de fraude.
+
+Usage (lots de prédictions : JOBS_EARLY_EXIT=1) :
+    from early_exit import EarlyExitForest
+    fast = EarlyExitForest(model, threshold=0.5, margin=0.2)
+    probabilities = fast.predict_proba(X)
+    exact = fast.predict_proba(X, exact=True)
+"""
+
+import os
+import threading
+
+import numpy as np
+
+DEFAULT_CHUNK_TREES = int(os.environ.get('EARLY_EXIT_CHUNK_TREES', 10))
+# Marge autour du seuil ; vide : sortie uniquement quand la décision est certaine
+_margin = os.environ.get('EARLY_EXIT_MARGIN', '0.2')
+DEFAULT_MARGIN = float(_margin) if _margin else None
+
+
+class EarlyExitForest:
+    """Enveloppe d'une RandomForestClassifier binaire (predict_proba, predict)"""
+
+    def __init__(self, forest, threshold=0.5, margin=DEFAULT_MARGIN, chunk_trees=DEFAULT_CHUNK_TREES,
+                 segments=None):
+        self.forest = forest
+        self.estimators = forest.estimators_
+        self.threshold = threshold
+        self.segments = segments
+        self.margin = margin
+        self.chunk_trees = max(1, chunk_trees)
+        self.classes_ = forest.classes_
+        if hasattr(forest, 'feature_names_in_'):
+            self.feature_names_in_ = forest.feature_names_in_
+        self._fraud_index = int(np.flatnonzero(self.classes_ == 1)[0]) if 1 in self.classes_ else 1
+
+        self._lock = threading.Lock()
+        self.rows = 0
+        self.trees_evaluated = 0
+
+    def _as_array(self, X):
+        if hasattr(X, 'columns') and hasattr(self, 'feature_names_in_'):
+            X = X[list(self.feature_names_in_)]
+        return np.ascontiguousarray(np.asarray(X), dtype=np.float32)
+
+    def thresholds_for(self, X):
+        """Seuil de fraude de chaque ligne (table par segment), sinon le seuil global"""
+        if self.segments is not None and hasattr(X, 'columns'):
+            return self.segments.lookup(X)[0]
+        return np.full(len(X), self.threshold)
+
+    def fraud_scores(self, X):
+        """Probabilités de fraude et nombre d'arbres évalués par ligne"""
+        thresholds = self.thresholds_for(X)
+        X = self._as_array(X)
+        n_rows, n_trees = len(X), len(self.estimators)
+        sums = np.zeros(n_rows)
+        trees_used = np.full(n_rows, n_trees, dtype=np.int32)
+        active = np.arange(n_rows)
+
+        for start in range(0, n_trees, self.chunk_trees):
+            evaluated = min(start + self.chunk_trees, n_trees)
+            X_active = X[active]
+            chunk_sum = np.zeros(len(active))
+            for tree in self.estimators[start:evaluated]:
+                chunk_sum += tree.predict_proba(X_active, check_input=False)[:, self._fraud_index]
+            sums[active] += chunk_sum
+            if evaluated == n_trees:
+                break
+
+            partial = sums[active]
+            threshold = thresholds[active]
+            # Bornes de la moyenne finale : arbres restants tous à 0 ou tous à 1
+            settled = (partial / n_trees > threshold) | \
+                      ((partial + n_trees - evaluated) / n_trees <= threshold)
+            if self.margin is not None:
+                settled |= np.abs(partial / evaluated - threshold) > self.margin
+            trees_used[active[settled]] = evaluated
+            active = active[~settled]
+            if not len(active):
+                break
+
+        with self._lock:
+            self.rows += n_rows
+            self.trees_evaluated += int(trees_used.sum())
+        return sums / trees_used, trees_used
+
+    def predict_proba(self, X, exact=False):
+        if exact:
+            return self.forest.predict_proba(X)
+        fraud, _ = self.fraud_scores(X)
+        proba = np.empty((len(fraud), 2))
+        proba[:, self._fraud_index] = fraud
+        proba[:, 1 - self._fraud_index] = 1.0 - fraud
+        return proba
+
+    def predict(self, X):
+        fraud, _ = self.fraud_scores(X)
+        return self.classes_[(fraud > self.thresholds_for(X)).astype(int)]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rows": self.rows,
+                "mean_trees_per_row": round(self.trees_evaluated / self.rows, 2) if self.rows else None,
+                "n_trees": len(self.estimators),
+                "margin": self.margin
+            }
+
+
+def supports(model):
+    """Le modèle est-il une forêt binaire évaluable arbre par arbre ?"""
+    return hasattr(model, 'estimators_') and hasattr(model, 'classes_') and len(model.classes_) == 2 \
+        and all(hasattr(tree, 'tree_') for tree in model.estimators_)
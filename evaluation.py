@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Évaluation headless et vectorisée des modèles candidats
+
+Reprend l'évaluation du notebook (matrices de confusion, précision, rappel,
+F1...) sans boucles Python par modèle ni affichage inline :
+  - chaque candidat est scoré une seule fois sur le jeu de test ;
+  - les matrices de confusion de tous les candidats sont obtenues en un seul
+    np.bincount, et toutes les métriques en découlent vectoriellement ;
+  - un rapport JSON est écrit, ainsi que des figures optionnelles (Agg) ;
+  - les comptes sont mis en cache par empreinte (modèle, données de test) :
+    réévaluer un modèle inchangé ne le recharge même pas ;
+  - un modèle sauvegardé n'est évalué que sur la division avec laquelle il a
+    été entraîné (ses test_data_<horodatage>.joblib, ou la source de ses
+    métadonnées) : les autres sont écartés et listés dans "skipped", leurs
+    lignes de test pouvant recouvrir le train d'un autre modèle.
+
+Usage:
+    python evaluation.py                                # tous les best_model_*.joblib
+    python evaluation.py --figures --output reports/evaluation.json
+    python evaluation.py --model saved_models/best_model_X.joblib --no-cache
+    python evaluation.py --source creditcarddata.csv    # jeu de test du cache préparé
+
+Depuis le notebook :
+    from evaluation import evaluate_models
+    report = evaluate_models({name: r['model'] for name, r in results.items()}, X_test, y_test)
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import warnings
+from datetime import datetime
+
+import numpy as np
+
+import model_store
+
+REPORTS_DIR = os.path.join(model_store.BASE_DIR, "reports")
+CACHE_DIR = os.environ.get('EVAL_CACHE_DIR', os.path.join(REPORTS_DIR, "cache"))
+
+# Ordre des cases de la matrice : indice = 2 * vérité + prédiction
+COUNT_NAMES = ("tn", "fp", "fn", "tp")
+
+
+def confusion_counts(y_true, predictions):
+    """Matrices de confusion de M modèles en un seul bincount
+
+    predictions : tableau (M, n) de prédictions binaires (ou (n,) pour un modèle).
+    Retourne un tableau (M, 4) de comptes [tn, fp, fn, tp].
+    """
+    y_true = np.asarray(y_true).astype(np.int64)
+    predictions = np.atleast_2d(np.asarray(predictions)).astype(np.int64)
+    n_models = predictions.shape[0]
+
+    keys = predictions + 2 * y_true
+    keys += 4 * np.arange(n_models)[:, None]
+    return np.bincount(keys.ravel(), minlength=4 * n_models).reshape(n_models, 4)
+
+
+def metrics_from_counts(counts):
+    """Métriques du notebook calculées vectoriellement depuis les comptes (M, 4)"""
+    counts = np.atleast_2d(counts).astype(np.float64)
+    tn, fp, fn, tp = counts.T
+
+    def ratio(numerator, denominator):
+        return np.divide(numerator, denominator, out=np.zeros_like(numerator),
+                         where=denominator > 0)
+
+    precision = ratio(tp, tp + fp)
+    recall = ratio(tp, tp + fn)
+    return {
+        "accuracy": ratio(tp + tn, tn + fp + fn + tp),
+        "precision": precision,
+        "recall": recall,
+        "specificity": ratio(tn, tn + fp),
+        "f1_score": ratio(2 * precision * recall, precision + recall),
+        "false_positive_rate": ratio(fp, fp + tn),
+        "false_negative_rate": ratio(fn, fn + tp)
+    }
+
+
+# ---------------------------------------------------------------------------
+# Cache par empreinte
+# ---------------------------------------------------------------------------
+
+def object_hash(obj):
+    """Empreinte d'un objet Python (modèle ou données en mémoire)"""
+    import joblib
+    return joblib.hash(obj, hash_name="sha1")
+
+
+def _cache_path(cache_dir, model_hash, data_hash):
+    key = hashlib.sha256(f"{model_hash}:{data_hash}".encode()).hexdigest()
+    return os.path.join(cache_dir, f"{key}.json")
+
+
+def _read_cache(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(path, entry):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(entry, f)
+    os.replace(tmp_path, path)
+
+
+# ---------------------------------------------------------------------------
+# Évaluation
+# ---------------------------------------------------------------------------
+
+def _predict(model, X):
+    if hasattr(model, 'feature_names_in_') and hasattr(X, 'columns'):
+        X = X[list(model.feature_names_in_)]
+    return np.asarray(model.predict(X))
+
+
+def evaluate_candidates(candidates, X_test, y_test, data_hash=None,
+                        cache_dir=CACHE_DIR, use_cache=True):
+    """Évaluer des candidats décrits par (nom, empreinte, fonction de chargement)
+
+    Seuls les candidats absents du cache sont chargés et scorés ; leurs
+    comptes sont calculés ensemble en un seul passage.
+    """
+    data_hash = data_hash or object_hash((X_test, y_test))
+
+    entries = {}
+    to_score = []
+    for name, model_hash, load in candidates:
+        path = _cache_path(cache_dir, model_hash, data_hash)
+        cached = _read_cache(path) if use_cache else None
+        if cached is not None:
+            entries[name] = dict(cached, cached=True)
+        else:
+            to_score.append((name, model_hash, load, path))
+
+    if to_score:
+        predictions = []
+        durations = []
+        for name, _, load, _ in to_score:
+            model = load()
+            start = time.perf_counter()
+            predictions.append(_predict(model, X_test))
+            durations.append(time.perf_counter() - start)
+
+        counts = confusion_counts(y_test, np.vstack(predictions))
+        for (name, model_hash, _, path), row, duration in zip(to_score, counts, durations):
+            entry = {
+                "model_hash": model_hash,
+                "counts": dict(zip(COUNT_NAMES, (int(c) for c in row))),
+                "predict_seconds": round(duration, 6)
+            }
+            if use_cache:
+                _write_cache(path, entry)
+            entries[name] = dict(entry, cached=False)
+
+    return _build_report(entries, data_hash, n_rows=len(y_test))
+
+
+def evaluate_models(models, X_test, y_test, **kwargs):
+    """Évaluer des modèles en mémoire {nom: modèle} (ex. depuis le notebook)"""
+    candidates = [(name, object_hash(model), (lambda m=model: m)) for name, model in models.items()]
+    return evaluate_candidates(candidates, X_test, y_test, **kwargs)
+
+
+def _same_test_data(path, reference_path, reference_hash):
+    """Deux fichiers de données de test contiennent-ils la même division ?"""
+    if model_store.file_hash(path) == reference_hash:
+        return True
+    # Même division, sérialisée différemment
+    other, reference = model_store.load_test_data(path), model_store.load_test_data(reference_path)
+    return object_hash((other['X_test'], other['y_test'])) == \
+        object_hash((reference['X_test'], reference['y_test']))
+
+
+def split_mismatch(model_path, test_data_path=None, source_sha256=None):
+    """Raison d'écarter un modèle entraîné sur une autre division (None s'il est comparable)"""
+    if source_sha256 is not None:
+        metadata_path = model_store.metadata_path_for(model_path)
+        metadata = model_store.load_metadata(metadata_path) if metadata_path else None
+        trained_on = (metadata or {}).get("source_sha256")
+        if trained_on is None:
+            return "source d'entraînement inconnue (métadonnées sans source_sha256)"
+        if trained_on != source_sha256:
+            return f"entraîné sur une autre source ({trained_on[:16]})"
+        return None
+
+    own_test_data = model_store.test_data_path_for(model_path)
+    if own_test_data is None:
+        return "données de test du modèle introuvables"
+    if os.path.abspath(own_test_data) == os.path.abspath(test_data_path):
+        return None
+    if not _same_test_data(own_test_data, test_data_path, model_store.file_hash(test_data_path)):
+        return f"entraîné avec une autre division ({os.path.basename(own_test_data)})"
+    return None
+
+
+def evaluate_saved_models(model_paths, test_data_path=None, source=None, **kwargs):
+    """Évaluer des modèles sauvegardés sur un même jeu de test
+
+    Le jeu de test est celui de test_data_path, ou la division en cache du
+    CSV source (dataset_cache.py) si source est fourni. Les modèles entraînés
+    sur une autre division sont écartés (report["skipped"]).
+    """
+    dataset = None
+    if source is not None:
+        import dataset_cache
+        dataset = dataset_cache.get_dataset(source)
+
+    skipped = []
+    candidates = []
+    for path in model_paths:
+        reason = split_mismatch(path, test_data_path, dataset.source_sha256 if dataset else None)
+        if reason is not None:
+            skipped.append({"name": os.path.basename(path), "reason": reason})
+            continue
+        candidates.append((os.path.basename(path), model_store.file_hash(path),
+                           (lambda p=path: model_store.load_model(p))))
+
+    if dataset is not None:
+        X_test, y_test = dataset.test_set()
+        report = evaluate_candidates(candidates, X_test, y_test, data_hash=dataset.split_key(), **kwargs)
+        report["test_data"] = f"{os.path.basename(source)} (cache {dataset.source_sha256[:16]})"
+    else:
+        test_data = model_store.load_test_data(test_data_path)
+        report = evaluate_candidates(candidates, test_data['X_test'], test_data['y_test'],
+                                     data_hash=model_store.file_hash(test_data_path), **kwargs)
+        report["test_data"] = os.path.basename(test_data_path)
+    report["skipped"] = skipped
+    return report
+
+
+def _build_report(entries, data_hash, n_rows):
+    names = list(entries)
+    counts = np.array([[entries[name]["counts"][key] for key in COUNT_NAMES] for name in names])
+    metrics = metrics_from_counts(counts) if names else {}
+
+    models = []
+    for i, name in enumerate(names):
+        model_report = {"name": name}
+        model_report.update({key: round(float(values[i]), 6) for key, values in metrics.items()})
+        model_report.update(entries[name])
+        models.append(model_report)
+    models.sort(key=lambda m: m["f1_score"], reverse=True)
+
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "test_data_hash": data_hash,
+        "n_test_rows": int(n_rows),
+        "best_model": models[0]["name"] if models else None,
+        "models": models
+    }
+
+
+# ---------------------------------------------------------------------------
+# Sorties
+# ---------------------------------------------------------------------------
+
+def write_report(report, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def write_figures(report, output_dir):
+    """Matrices de confusion en PNG, sans affichage (backend Agg)"""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print(" ⚠️  matplotlib non installé : figures ignorées")
+        return None
+
+    models = report["models"]
+    n_cols = min(3, len(models))
+    n_rows = (len(models) + n_cols - 1) // n_cols
+    fig, axes = plt.subplots(n_rows, n_cols, figsize=(6 * n_cols, 5 * n_rows), squeeze=False)
+
+    for ax, model_report in zip(axes.ravel(), models):
+        c = model_report["counts"]
+        matrix = np.array([[c["tn"], c["fp"]], [c["fn"], c["tp"]]])
+        ax.imshow(matrix, cmap="Blues")
+        for (row, col), value in np.ndenumerate(matrix):
+            ax.text(col, row, str(value), ha="center", va="center",
+                    color="white" if value > matrix.max() / 2 else "black")
+        ax.set_title(f"{model_report['name']}\nF1 = {model_report['f1_score']:.4f}", fontsize=9)
+        ax.set_xlabel("Prédictions")
+        ax.set_ylabel("Valeurs Réelles")
+        ax.set_xticks([0, 1])
+        ax.set_yticks([0, 1])
+    for ax in axes.ravel()[len(models):]:
+        ax.axis("off")
+
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, "confusion_matrices.png")
+    fig.tight_layout()
+    fig.savefig(path, dpi=100)
+    plt.close(fig)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Évaluation des modèles candidats")
+    parser.add_argument("--model", action="append", dest="models",
+                        help="Modèle à évaluer (répétable ; défaut: tous les best_model_*.joblib)")
+    parser.add_argument("--test-data", help="Données de test (défaut: les plus récentes)")
+    parser.add_argument("--source", help="CSV source : jeu de test pris dans le cache préparé")
+    parser.add_argument("--output", help="Rapport JSON (défaut: reports/evaluation_<horodatage>.json)")
+    parser.add_argument("--figures", action="store_true", help="Écrire les matrices de confusion en PNG")
+    parser.add_argument("--no-cache", action="store_true", help="Ignorer le cache d'évaluation")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings('ignore')
+    print("📊 ÉVALUATION DES MODÈLES")
+    print("=" * 50)
+
+    model_paths = args.models or sorted(
+        os.path.join(model_store.MODEL_DIR, f) for f in os.listdir(model_store.MODEL_DIR)
+        if f.startswith("best_model_") and f.endswith(".joblib")
+    )
+    test_data_path = args.test_data or model_store.latest_test_data_path()
+    if not model_paths or (test_data_path is None and args.source is None):
+        print(" ❌ Aucun modèle ou aucune donnée de test trouvés")
+        return 1
+
+    start = time.perf_counter()
+    report = evaluate_saved_models(model_paths, test_data_path, source=args.source,
+                                   use_cache=not args.no_cache)
+    elapsed = time.perf_counter() - start
+
+    print(f"  {len(report['models'])} modèle(s), {report['n_test_rows']} lignes de test, {elapsed:.3f}s\n")
+    print(f"  {'Modèle':<52}{'Acc.':>8}{'Préc.':>8}{'Rappel':>8}{'F1':>8}  Cache")
+    for m in report["models"]:
+        print(f"  {m['name'][:50]:<52}{m['accuracy']:>8.4f}{m['precision']:>8.4f}"
+              f"{m['recall']:>8.4f}{m['f1_score']:>8.4f}  {'oui' if m['cached'] else 'non'}")
+    if report["skipped"]:
+        print(f"\n ⚠️  {len(report['skipped'])} modèle(s) écarté(s), division différente de {report['test_data']} :")
+        for skipped in report["skipped"]:
+            print(f"   {skipped['name']}: {skipped['reason']}")
+
+    output = args.output or os.path.join(
+        REPORTS_DIR, f"evaluation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    write_report(report, output)
+    print(f"\n ✅ Rapport: {output}")
+
+    if args.figures:
+        figure = write_figures(report, os.path.dirname(os.path.abspath(output)))
+        if figure:
+            print(f" ✅ Figures: {figure}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
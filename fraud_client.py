@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Client Python officiel de l'API de Détection de Fraude
+
+Remplace le motif `requests.post(f"{API_URL}/predict", json=transaction)`
+(une connexion par appel, sans délai d'attente ni regroupement) :
+  - pool de connexions HTTP persistantes (keep-alive), délai d'attente par requête ;
+  - score(transaction) : les appels individuels concurrents sont regroupés
+    en une seule requête /predict. Un appel isolé part immédiatement ; tant
+    qu'une requête est en cours, les appels suivants s'accumulent (jusqu'à
+    max_batch transactions ou max_wait_ms d'attente) ;
+  - nouvelles tentatives avec attente exponentielle sur les erreurs de
+    connexion et les réponses 429/502/503/504 (un Retry-After du serveur
+    allonge l'attente). Le scoring ne modifie pas l'état du modèle : rejouer
+    une requête /predict renvoie le même résultat. POST /jobs n'est rejoué
+    qu'avec une clé d'idempotence (en-tête Idempotency-Key) ;
+  - un lot regroupé refusé par l'API est coupé en deux et renvoyé, jusqu'à
+    isoler la transaction en cause : seuls ses appelants reçoivent l'erreur ;
+  - interface synchrone (FraudClient) et asyncio (AsyncFraudClient).
+
+Bibliothèque standard uniquement : le module peut être copié tel quel dans
+un autre service.
+
+Usage:
+    from fraud_client import FraudClient
+    with FraudClient("http://localhost:8080") as client:
+        prediction = client.score(transaction)        # regroupé avec les appels concurrents
+        predictions = client.predict(transactions)    # un lot explicite
+
+    from fraud_client import AsyncFraudClient
+    async with AsyncFraudClient("http://localhost:8080") as client:
+        predictions = await asyncio.gather(*(client.score(t) for t in transactions))
+"""
+
+import os
+import json
+import time
+import queue
+import random
+import uuid
+import asyncio
+import threading
+import http.client
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+API_URL = os.environ.get('API_URL', "http://localhost:8080")
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_POOL_SIZE = 8
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_WAIT_MS = 5.0
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.1
+# Statuts où la requête n'a pas été scorée (lot hors budget, passerelle, modèle en chargement)
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+# Attente maximale acceptée d'un en-tête Retry-After (secondes)
+MAX_RETRY_AFTER = 30.0
+
+
+class APIError(Exception):
+    """Réponse d'erreur de l'API (statut HTTP et message)"""
+
+    def __init__(self, status, message, payload=None):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.payload = payload
+
+
+class ConnectionPool:
+    """Connexions HTTP persistantes réutilisées entre les requêtes"""
+
+    def __init__(self, base_url, size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.connections_opened = 0
+
+    def _new_connection(self):
+        connection_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        self.connections_opened += 1
+        return connection_class(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method, path, body=None, headers=None):
+        """(statut, corps, Retry-After) d'une requête ; lève OSError / HTTPException si la connexion échoue"""
+        with self._slots:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = self._new_connection()
+            try:
+                connection.request(method, self.prefix + path, body=body, headers=headers or {})
+                response = connection.getresponse()
+                data = response.read()
+            except Exception:
+                connection.close()
+                raise
+            # Un serveur qui ferme la connexion (Connection: close) la rouvre au prochain appel
+            self._idle.put(connection)
+            return response.status, data, response.getheader("Retry-After")
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class FraudClient:
+    """Client synchrone, sûr entre threads"""
+
+    def __init__(self, base_url=API_URL, timeout=DEFAULT_TIMEOUT, pool_size=DEFAULT_POOL_SIZE,
+                 max_batch=DEFAULT_MAX_BATCH, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+        self.pool = ConnectionPool(base_url, pool_size, timeout)
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.retries = retries
+        self.backoff = backoff
+
+        self._pending = queue.Queue()
+        self._batcher = None
+        self._senders = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="fraud-client")
+        self._lock = threading.Lock()
+        self._closed = False
+        self.requests = 0
+        self.retried = 0
+        self.batches = 0
+        self.coalesced = 0
+        self.split_batches = 0
+        self._in_flight = 0
+
+    # -- requêtes --------------------------------------------------------
+
+    def request(self, method, path, payload=None, headers=None):
+        """Réponse JSON décodée, avec nouvelles tentatives"""
+        body = json.dumps(payload).encode() if payload is not None else None
+        headers = {"Content-Type": "application/json", "Accept": "application/json", **(headers or {})}
+
+        for attempt in range(self.retries + 1):
+            with self._lock:
+                self.requests += 1
+                if attempt:
+                    self.retried += 1
+            retry_after = None
+            try:
+                status, data, retry_after = self.pool.request(method, path, body, headers)
+            except (OSError, http.client.HTTPException):
+                if attempt == self.retries:
+                    raise
+            else:
+                if status not in RETRY_STATUSES or attempt == self.retries:
+                    return self._decode(status, data)
+            # Attente exponentielle avec gigue, au moins le Retry-After du serveur
+            delay = self.backoff * (2 ** attempt) * (0.5 + random.random())
+            time.sleep(max(delay, self._retry_after_seconds(retry_after)))
+
+    @staticmethod
+    def _retry_after_seconds(value):
+        """Retry-After en secondes (0 si absent ou au format date), plafonné à MAX_RETRY_AFTER"""
+        try:
+            return min(max(float(value), 0.0), MAX_RETRY_AFTER)
+        except (TypeError, ValueError):
+            return 0.0
+
+    @staticmethod
+    def _decode(status, data):
+        try:
+            payload = json.loads(data) if data else None
+        except ValueError:
+            payload = None
+        if status >= 400:
+            message = payload.get("error") if isinstance(payload, dict) else data[:200].decode(errors="replace")
+            raise APIError(status, message, payload)
+        return payload
+
+    def health(self):
+        return self.request("GET", "/health")
+
+    def model_info(self):
+        return self.request("GET", "/model-info")
+
+    def predict(self, transactions):
+        """Prédictions d'un lot explicite (une requête /predict)"""
+        if isinstance(transactions, dict):
+            transactions = [transactions]
+        return self.request("POST", "/predict", transactions)["predictions"]
+
+    def create_job(self, transactions, exact=False, idempotency_key=None):
+        """Soumettre un lot à /jobs
+
+        POST /jobs crée un job : chaque appel porte une clé d'idempotence
+        (générée si absente), pour qu'une nouvelle tentative après un délai
+        dépassé renvoie le job déjà accepté au lieu d'en créer un doublon.
+        """
+        payload = {"transactions": transactions}
+        if exact:
+            payload["exact"] = True
+        headers = {"Idempotency-Key": idempotency_key or uuid.uuid4().hex}
+        return self.request("POST", "/jobs", payload, headers=headers)
+
+    def job(self, job_id, offset=0, limit=None):
+        path = f"/jobs/{job_id}?offset={offset}" + (f"&limit={limit}" if limit is not None else "")
+        return self.request("GET", path)
+
+    # -- regroupement des appels individuels -----------------------------
+
+    def submit(self, transaction):
+        """Future de la prédiction d'une transaction (regroupée avec les appels concurrents)"""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Client fermé")
+            if self._batcher is None:
+                self._batcher = threading.Thread(target=self._run_batcher, name="fraud-client-batcher",
+                                                 daemon=True)
+                self._batcher.start()
+        self._pending.put((transaction, future))
+        return future
+
+    def score(self, transaction, timeout=None):
+        """Prédiction d'une transaction, au format d'un appel /predict individuel"""
+        return self.submit(transaction).result(timeout)
+
+    def _run_batcher(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            batch = [item]
+            # Serveur inactif : inutile d'attendre d'autres appels
+            with self._lock:
+                idle = self._in_flight == 0
+            deadline = time.monotonic() + (0 if idle else self.max_wait)
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._pending.get(timeout=remaining) if remaining > 0 else self._pending.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._pending.put(None)
+                    break
+                batch.append(item)
+            # Les lots partent en parallèle sur le pool ; le regroupement continue
+            with self._lock:
+                self._in_flight += 1
+            self._senders.submit(self._send_batch, batch)
+
+    def _send_batch(self, batch):
+        with self._lock:
+            self.batches += 1
+            self.coalesced += len(batch)
+        try:
+            self._resolve(batch)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _resolve(self, batch):
+        """Scorer un lot regroupé et remplir ses futures
+
+        Un lot refusé par l'API (400 sur une transaction invalide, 429/5xx
+        persistant...) est coupé en deux et chaque moitié renvoyée : une
+        transaction en cause n'échoue que pour son propre appelant. Une erreur
+        de connexion, elle, concerne tout le lot.
+        """
+        try:
+            predictions = self.predict([transaction for transaction, _ in batch])
+        except APIError as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            with self._lock:
+                self.split_batches += 1
+            middle = len(batch) // 2
+            self._resolve(batch[:middle])
+            self._resolve(batch[middle:])
+            return
+        except BaseException as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), prediction in zip(batch, predictions):
+            prediction["transaction_id"] = 0
+            future.set_result(prediction)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retried,
+                "connections_opened": self.pool.connections_opened,
+                "batches": self.batches,
+                "mean_batch_size": round(self.coalesced / self.batches, 2) if self.batches else None,
+                "split_batches": self.split_batches
+            }
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            batcher = self._batcher
+        if batcher is not None:
+            self._pending.put(None)
+            batcher.join()
+        self._senders.shutdown(wait=True)
+        self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AsyncFraudClient:
+    """Interface asyncio : mêmes connexions et même regroupement que FraudClient"""
+
+    def __init__(self, base_url=API_URL, **kwargs):
+        self.client = FraudClient(base_url, **kwargs)
+
+    async def _call(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.client._senders, func, *args)
+
+    async def score(self, transaction):
+        return await asyncio.wrap_future(self.client.submit(transaction))
+
+    async def predict(self, transactions):
+        return await self._call(self.client.predict, transactions)
+
+    async def health(self):
+        return await self._call(self.client.health)
+
+    async def model_info(self):
+        return await self._call(self.client.model_info)
+
+    async def create_job(self, transactions, exact=False, idempotency_key=None):
+        return await self._call(self.client.create_job, transactions, exact, idempotency_key)
+
+    async def job(self, job_id, offset=0, limit=None):
+        return await self._call(self.client.job, job_id, offset, limit)
+
+    def stats(self):
+        return self.client.stats()
+
+    async def close(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.client.close)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
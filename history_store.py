@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Historique des transactions analysées, côté serveur (GET /history)
+
+Remplace l'historique localStorage de l'interface web, tronqué à 50 entrées.
+Les prédictions de /predict sont écrites par lots en arrière-plan (même
+mécanique que le journal d'audit) dans une table SQLite indexée par date,
+bande de risque et pays. La pagination se fait par curseur (keyset) : le
+coût d'une page ne dépend ni de sa profondeur ni de la taille de la table.
+"""
+
+import os
+import json
+import atexit
+import sqlite3
+import threading
+from datetime import datetime
+
+import audit_log
+import model_store
+import scoring
+
+# Configuration (surchargeable par variables d'environnement)
+HISTORY_ENABLED = os.environ.get('HISTORY_ENABLED', '1') == '1'
+HISTORY_DB_PATH = os.environ.get('HISTORY_DB_PATH', os.path.join(model_store.BASE_DIR, "history", "history.db"))
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 200
+RISK_BANDS = ("high", "medium", "low")
+
+# Un index par combinaison de filtres, toujours suffixé par la date :
+# filtre + tri + curseur se résolvent en un seul parcours d'index.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    scored_at REAL NOT NULL,
+    amount REAL,
+    country INTEGER,
+    prediction INTEGER NOT NULL,
+    risk REAL,
+    risk_band TEXT NOT NULL,
+    model_version TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_time ON history (scored_at);
+CREATE INDEX IF NOT EXISTS idx_history_band ON history (risk_band, scored_at);
+CREATE INDEX IF NOT EXISTS idx_history_country ON history (country, scored_at);
+CREATE INDEX IF NOT EXISTS idx_history_band_country ON history (risk_band, country, scored_at);
+"""
+
+
+class HistorySink(audit_log.AuditSink):
+    """Écriture asynchrone par lots de l'historique"""
+
+    thread_name = "history-writer"
+    schema = _SCHEMA
+    insert_sql = (
+        "INSERT INTO history (scored_at, amount, country, prediction, risk, risk_band, model_version, data) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+    )
+
+    def __init__(self, db_path=HISTORY_DB_PATH, **kwargs):
+        super().__init__(db_path=db_path, **kwargs)
+
+    def _rows(self, batch):
+        rows = []
+        for scored_at, model_version, records, results in batch:
+            timestamp = datetime.fromisoformat(scored_at).timestamp()
+            for record, result in zip(records, results):
+                confidence = result.get("confidence")
+                risk = confidence["fraud"] if confidence else float(result["prediction"])
+                rows.append((
+                    timestamp,
+                    record.get("TransactionAmount"),
+                    record.get("TransactionCountry"),
+                    result["prediction"],
+                    risk,
+                    result.get("risk_band") or scoring.risk_band(risk),
+                    model_version,
+                    json.dumps(record, separators=(",", ":"))
+                ))
+        return rows
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_sink():
+    """Sink partagé du processus (None si l'historique est désactivé)"""
+    global _sink
+    if not HISTORY_ENABLED:
+        return None
+    with _sink_lock:
+        if _sink is None:
+            _sink = HistorySink().start()
+            atexit.register(_sink.stop)
+    return _sink
+
+
+def record(records, results, model_version=None):
+    """Ajouter un lot scoré à l'historique (non bloquant)"""
+    sink = get_sink()
+    if sink is not None:
+        sink.record(records, results, model_version)
+
+
+# ---------------------------------------------------------------------------
+# Lecture
+# ---------------------------------------------------------------------------
+
+_local = threading.local()
+
+
+def _reader(db_path):
+    """Connexion de lecture réutilisée par thread"""
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(db_path)
+    if conn is None:
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        connections[db_path] = conn
+    return conn
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+
+def encode_cursor(scored_at, row_id):
+    return f"{scored_at!r}_{row_id}"
+
+
+def decode_cursor(cursor):
+    try:
+        scored_at, row_id = cursor.split("_")
+        return float(scored_at), int(row_id)
+    except (AttributeError, ValueError):
+        raise ValueError("Curseur invalide")
+
+
+def query(start=None, end=None, risk_band=None, country=None, cursor=None,
+          limit=DEFAULT_PAGE_SIZE, db_path=HISTORY_DB_PATH):
+    """Page d'historique, de la plus récente à la plus ancienne
+
+    start / end : dates ISO 8601 (end exclue) ; cursor : valeur next_cursor
+    de la page précédente.
+    """
+    if risk_band is not None and risk_band not in RISK_BANDS:
+        raise ValueError(f"Bande de risque invalide (attendu: {', '.join(RISK_BANDS)})")
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    clauses, params = [], []
+    if risk_band is not None:
+        clauses.append("risk_band = ?")
+        params.append(risk_band)
+    if country is not None:
+        clauses.append("country = ?")
+        params.append(int(country))
+    if start:
+        clauses.append("scored_at >= ?")
+        params.append(_parse_time(start))
+    if end:
+        clauses.append("scored_at < ?")
+        params.append(_parse_time(end))
+    if cursor:
+        clauses.append("(scored_at, id) < (?, ?)")
+        params.extend(decode_cursor(cursor))
+
+    sql = "SELECT * FROM history"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY scored_at DESC, id DESC LIMIT ?"
+    params.append(limit + 1)
+
+    rows = _reader(db_path).execute(sql, params).fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        "items": [_row_to_item(row) for row in rows],
+        "has_more": has_more,
+        "next_cursor": encode_cursor(rows[-1]["scored_at"], rows[-1]["id"]) if has_more else None
+    }
+
+
+def _row_to_item(row):
+    return {
+        "id": row["id"],
+        "timestamp": datetime.fromtimestamp(row["scored_at"]).isoformat(),
+        "amount": row["amount"],
+        "country": row["country"],
+        "prediction": "fraud" if row["prediction"] == 1 else "no_fraud",
+        "risk": row["risk"],
+        "risk_band": row["risk_band"],
+        "model_version": row["model_version"],
+        "data": json.loads(row["data"])
+    }
@@ -87,7 +87,7 @@ def test_transaction(transaction):
             if prediction['prediction'] == 1:
                 risk_level = " ÉLEVÉ"
                 recommendation = "  TRANSACTION SUSPECTE - Investigation requise"
-            elif fraud_prob > 0.3:
+            elif prediction.get('risk_band') == 'medium':
                 risk_level = " MODÉRÉ"
                 recommendation = "  Risque modéré - Surveillance renforcée"
             else:
@@ -0,0 +1,526 @@
+#!/usr/bin/env python3
+"""
+Traitements asynchrones des gros lots de prédictions (POST /jobs)
+
+Les jobs sont persistés dans une base SQLite locale, sans broker externe.
+Chaque job est réservé par un worker de l'API au moyen d'un bail (lease)
+renouvelé pendant le traitement : si le worker redémarre, le bail expire
+et le job est repris par le prochain dispatcher disponible, en sautant
+les morceaux déjà scorés. Le scoring lui-même est réparti par morceaux
+sur un pool de processus borné, qui score avec le modèle servi par l'API
+(ou le plus récent) : à chaque job, un pool chargé avec un autre modèle est
+remplacé. Chaque morceau enregistre la version du modèle qui l'a scoré.
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+import audit_log
+import model_registry
+import model_store
+import request_log
+import scoring
+
+# Configuration (surchargeable par variables d'environnement)
+JOBS_DIR = os.environ.get('JOBS_DIR', os.path.join(model_store.BASE_DIR, "jobs"))
+JOBS_DB_PATH = os.path.join(JOBS_DIR, "jobs.db")
+JOBS_PAYLOAD_DIR = os.path.join(JOBS_DIR, "payloads")
+JOBS_INPUT_DIR = os.environ.get('JOBS_INPUT_DIR', os.path.join(JOBS_DIR, "inputs"))
+JOBS_MAX_WORKERS = int(os.environ.get('JOBS_MAX_WORKERS', 2))
+JOBS_CHUNK_SIZE = int(os.environ.get('JOBS_CHUNK_SIZE', 5000))
+# Sortie anticipée de la forêt (early_exit.py) ; un job peut demander des probabilités exactes
+JOBS_EARLY_EXIT = os.environ.get('JOBS_EARLY_EXIT', '0') == '1'
+
+LEASE_SECONDS = 60
+POLL_INTERVAL = 1.0
+# Espace de noms des identifiants dérivés des clés d'idempotence (uuid5)
+_IDEMPOTENCY_NAMESPACE = uuid.UUID("6f1c1d0e-2b7a-5c4e-9a43-6a0f3d1b8e21")
+SUPPORTED_FORMATS = (".csv", ".jsonl")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    source TEXT NOT NULL,
+    total_rows INTEGER,
+    processed_rows INTEGER NOT NULL DEFAULT 0,
+    chunk_size INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    error TEXT,
+    exact_probabilities INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_results (
+    job_id TEXT NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    row_count INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    model_version TEXT,
+    PRIMARY KEY (job_id, chunk_index)
+);
+"""
+
+# Colonnes ajoutées depuis la création du schéma (bases existantes)
+_MIGRATIONS = (
+    ("jobs", "exact_probabilities", "ALTER TABLE jobs ADD COLUMN exact_probabilities INTEGER NOT NULL DEFAULT 0"),
+    ("job_results", "model_version", "ALTER TABLE job_results ADD COLUMN model_version TEXT"),
+)
+
+
+# ---------------------------------------------------------------------------
+# Stockage SQLite
+# ---------------------------------------------------------------------------
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def _connect():
+    """Ouvrir une connexion (une par appel : sûr entre threads et processus)"""
+    global _schema_ready
+
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    conn = sqlite3.connect(JOBS_DB_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+
+    if not _schema_ready:
+        with _schema_lock:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            for table, column, statement in _MIGRATIONS:
+                columns = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if column not in columns:
+                    conn.execute(statement)
+            _schema_ready = True
+    return conn
+
+
+def _now():
+    return datetime.now().isoformat()
+
+
+def _job_to_dict(row, model_versions=()):
+    total = row["total_rows"]
+    processed = row["processed_rows"]
+    return {
+        "job_id": row["id"],
+        "status": row["status"],
+        "total_rows": total,
+        "processed_rows": processed,
+        "progress": round(processed / total, 4) if total else (1.0 if row["status"] == "completed" else 0.0),
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+        "exact_probabilities": bool(row["exact_probabilities"]),
+        "model_versions": list(model_versions),
+        "error": row["error"]
+    }
+
+
+def _job_id(idempotency_key=None):
+    """Identifiant d'un nouveau job ; dérivé de la clé d'idempotence si elle est fournie"""
+    if idempotency_key is None:
+        return uuid.uuid4().hex
+    if not isinstance(idempotency_key, str) or not 0 < len(idempotency_key) <= 200:
+        raise ValueError("Clé d'idempotence invalide (1 à 200 caractères)")
+    return uuid.uuid5(_IDEMPOTENCY_NAMESPACE, idempotency_key).hex
+
+
+def _create_job(job_id, source, exact=False):
+    now = _now()
+    conn = _connect()
+    try:
+        # Même clé d'idempotence : le job existant est conservé et renvoyé
+        conn.execute(
+            "INSERT OR IGNORE INTO jobs (id, status, source, chunk_size, created_at, updated_at, exact_probabilities) "
+            "VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+            (job_id, source, JOBS_CHUNK_SIZE, now, now, int(exact))
+        )
+    finally:
+        conn.close()
+    return get_job(job_id)
+
+
+def submit_records(records, exact=False, idempotency_key=None):
+    """Enregistrer un lot de transactions et créer le job associé
+
+    exact : probabilités exactes (toute la forêt), même si JOBS_EARLY_EXIT=1.
+    idempotency_key : une nouvelle soumission avec la même clé renvoie le job
+    déjà créé au lieu d'en créer un second (nouvelle tentative du client).
+    """
+    if not isinstance(records, list) or not records:
+        raise ValueError("Le lot doit être une liste non vide de transactions")
+
+    job_id = _job_id(idempotency_key)
+    existing = get_job(job_id) if idempotency_key is not None else None
+    if existing is not None:
+        return existing
+    os.makedirs(JOBS_PAYLOAD_DIR, exist_ok=True)
+    path = os.path.join(JOBS_PAYLOAD_DIR, f"{job_id}.jsonl")
+
+    # Écriture atomique : le dispatcher ne voit jamais un fichier partiel
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        for record in records:
+            if not isinstance(record, dict):
+                raise ValueError("Chaque transaction doit être un objet JSON")
+            f.write(json.dumps(record))
+            f.write("\n")
+    os.replace(tmp_path, path)
+
+    return _create_job(job_id, path, exact)
+
+
+def submit_file(filename, exact=False, idempotency_key=None):
+    """Créer un job à partir d'un fichier déposé dans JOBS_INPUT_DIR"""
+    input_dir = os.path.realpath(JOBS_INPUT_DIR)
+    path = os.path.realpath(os.path.join(input_dir, filename))
+
+    # Interdire toute sortie du dossier d'entrée (../, chemins absolus)
+    if os.path.commonpath([input_dir, path]) != input_dir:
+        raise ValueError("Référence de fichier invalide")
+    if not path.endswith(SUPPORTED_FORMATS):
+        raise ValueError(f"Format non supporté (attendu: {', '.join(SUPPORTED_FORMATS)})")
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"Fichier introuvable: {filename}")
+
+    return _create_job(_job_id(idempotency_key), path, exact)
+
+
+def get_job(job_id):
+    """État d'un job (None s'il n'existe pas)"""
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        # Modèles ayant scoré ses morceaux (plusieurs si le job a repris après un changement)
+        versions = [version["model_version"] for version in conn.execute(
+            "SELECT DISTINCT model_version FROM job_results WHERE job_id = ? AND model_version IS NOT NULL "
+            "ORDER BY model_version", (job_id,))]
+    finally:
+        conn.close()
+    return _job_to_dict(row, versions) if row else None
+
+
+def get_results(job_id, offset=0, limit=None):
+    """Résultats d'un job, dans l'ordre des transactions soumises"""
+    conn = _connect()
+    try:
+        job = conn.execute("SELECT chunk_size FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if job is None:
+            return []
+
+        # Ne lire que les morceaux couvrant la fenêtre demandée
+        chunk_size = job["chunk_size"]
+        first_chunk = offset // chunk_size
+        query = "SELECT chunk_index, payload FROM job_results WHERE job_id = ? AND chunk_index >= ?"
+        params = [job_id, first_chunk]
+        if limit is not None:
+            query += " AND chunk_index <= ?"
+            params.append((offset + limit - 1) // chunk_size)
+        rows = conn.execute(query + " ORDER BY chunk_index", params).fetchall()
+    finally:
+        conn.close()
+
+    results = []
+    for row in rows:
+        results.extend(json.loads(row["payload"]))
+
+    start = offset - first_chunk * chunk_size
+    end = None if limit is None else start + limit
+    return results[start:end]
+
+
+def _claim_next_job(owner):
+    """Réserver le prochain job en attente ou dont le bail a expiré"""
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE status = 'queued' "
+            "OR (status = 'running' AND lease_expires < ?) "
+            "ORDER BY created_at LIMIT 1",
+            (now,)
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+
+        conn.execute(
+            "UPDATE jobs SET status = 'running', lease_owner = ?, lease_expires = ?, updated_at = ? "
+            "WHERE id = ?",
+            (owner, now + LEASE_SECONDS, _now(), row["id"])
+        )
+        conn.execute("COMMIT")
+        return dict(row)
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def _update_job(job_id, owner, **fields):
+    """Mettre à jour un job et renouveler son bail ; False si le bail est perdu"""
+    fields["lease_expires"] = time.time() + LEASE_SECONDS
+    fields["updated_at"] = _now()
+    assignments = ", ".join(f"{key} = ?" for key in fields)
+
+    conn = _connect()
+    try:
+        cursor = conn.execute(
+            f"UPDATE jobs SET {assignments} WHERE id = ? AND lease_owner = ?",
+            (*fields.values(), job_id, owner)
+        )
+        return cursor.rowcount == 1
+    finally:
+        conn.close()
+
+
+def _completed_chunks(job_id):
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            "SELECT chunk_index FROM job_results WHERE job_id = ?", (job_id,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return {row["chunk_index"] for row in rows}
+
+
+def _save_chunk(job_id, owner, chunk_index, results, model_version=None):
+    """Persister un morceau scoré et la progression dans une même transaction"""
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(
+            "INSERT OR REPLACE INTO job_results (job_id, chunk_index, row_count, payload, model_version) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (job_id, chunk_index, len(results), json.dumps(results), model_version)
+        )
+        cursor = conn.execute(
+            "UPDATE jobs SET processed_rows = "
+            "(SELECT COALESCE(SUM(row_count), 0) FROM job_results WHERE job_id = ?), "
+            "lease_expires = ?, updated_at = ? WHERE id = ? AND lease_owner = ?",
+            (job_id, time.time() + LEASE_SECONDS, _now(), job_id, owner)
+        )
+        conn.execute("COMMIT")
+        return cursor.rowcount == 1
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Lecture des entrées par morceaux
+# ---------------------------------------------------------------------------
+
+def _count_rows(source):
+    with open(source, 'rb') as f:
+        lines = sum(1 for line in f if line.strip())
+    return lines - 1 if source.endswith(".csv") else lines
+
+
+def _iter_chunks(source, chunk_size):
+    """Itérer sur (index, DataFrame) sans charger le fichier entier"""
+    import pandas as pd
+
+    if source.endswith(".csv"):
+        reader = pd.read_csv(source, chunksize=chunk_size)
+    else:
+        reader = pd.read_json(source, lines=True, chunksize=chunk_size,
+                              dtype=False, convert_dates=False)
+    with reader:
+        for index, chunk in enumerate(reader):
+            yield index, chunk
+
+
+# ---------------------------------------------------------------------------
+# Pool de processus
+# ---------------------------------------------------------------------------
+
+_worker_model = None
+_worker_fast_model = None
+_worker_thresholds = None
+_worker_registry = None
+
+
+def _init_worker(model_path):
+    """Charger le modèle et ses seuils une seule fois par processus du pool"""
+    global _worker_model, _worker_fast_model, _worker_thresholds, _worker_registry
+    _worker_model = model_store.load_model(model_path)
+    metadata_path = model_store.metadata_path_for(model_path)
+    metadata = model_store.load_metadata(metadata_path) if metadata_path else None
+    _worker_thresholds = scoring.resolve_thresholds(metadata)
+    if os.environ.get('CASCADE_ENABLED', '0') == '1':
+        import cascade
+        _worker_model = cascade.load_cascade(_worker_model, model_path, metadata) or _worker_model
+
+    _worker_fast_model = None
+    if JOBS_EARLY_EXIT:
+        import early_exit
+        if early_exit.supports(_worker_model):
+            _worker_fast_model = early_exit.EarlyExitForest(_worker_model, _worker_thresholds["fraud"],
+                                                            segments=_worker_thresholds.segments)
+
+    _worker_registry = None
+    if model_registry.SEGMENT_COLUMN:
+        _worker_registry = model_registry.ModelRegistry(_worker_model, _worker_thresholds)
+
+
+def _score_chunk(df, offset, exact=False):
+    model = _worker_model if exact or _worker_fast_model is None else _worker_fast_model
+    if _worker_registry is not None:
+        return _worker_registry.score_frame(df, offset=offset, default_model=model)
+    return scoring.score_frame(model, df, offset=offset, thresholds=_worker_thresholds)
+
+
+class JobDispatcher:
+    """Thread qui réserve les jobs et répartit leurs morceaux sur le pool"""
+
+    def __init__(self, max_workers=JOBS_MAX_WORKERS, model_path=None):
+        self.max_workers = max_workers
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # Modèle servi par l'API (start_dispatcher) ; None : le plus récent de saved_models/
+        self.model_path = model_path
+        self._model_path = None
+        self._pool = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="job-dispatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def _get_pool(self):
+        """Pool chargé avec le modèle à servir ; remplacé si ce modèle a changé
+
+        Appelé entre deux jobs : l'ancien pool n'a plus de morceau en cours.
+        """
+        model_path = self.model_path or model_store.latest_model_path()
+        if self._pool is not None and model_path != self._model_path:
+            request_log.info(f"Jobs: nouveau modèle {os.path.basename(model_path or '')}", event="jobs",
+                             stage="reload", previous=os.path.basename(self._model_path or ""))
+            self._pool.shutdown()
+            self._pool = None
+        if self._pool is None:
+            # 'spawn' : pas de fork d'un processus multi-threadé (gunicorn/Flask)
+            self._model_path = model_path
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self._model_path,)
+            )
+        return self._pool
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                job = _claim_next_job(self.owner)
+            except sqlite3.Error as e:
+                request_log.warning(f"Erreur file de jobs: {e}", event="jobs", stage="claim",
+                                    owner=self.owner)
+                job = None
+
+            if job is None:
+                self._stop.wait(POLL_INTERVAL)
+                continue
+
+            try:
+                self._process(job)
+            except BrokenProcessPool as e:
+                self._pool = None
+                _update_job(job["id"], self.owner, status="failed", error=f"Pool interrompu: {e}")
+            except Exception as e:
+                _update_job(job["id"], self.owner, status="failed", error=str(e))
+
+    def _process(self, job):
+        job_id = job["id"]
+        source = job["source"]
+        chunk_size = job["chunk_size"]
+
+        if job["total_rows"] is None:
+            if not _update_job(job_id, self.owner, total_rows=_count_rows(source)):
+                return
+
+        done = _completed_chunks(job_id)
+        pool = self._get_pool()
+        pending = {}
+        max_in_flight = self.max_workers * 2
+
+        for index, chunk in _iter_chunks(source, chunk_size):
+            if index in done:
+                continue
+            while len(pending) >= max_in_flight:
+                if not self._collect(job_id, pending):
+                    return
+            future = pool.submit(_score_chunk, chunk, index * chunk_size,
+                                 bool(job["exact_probabilities"]))
+            pending[future] = (index, chunk)
+
+        while pending:
+            if not self._collect(job_id, pending):
+                return
+
+        _update_job(job_id, self.owner, status="completed", lease_owner=None)
+
+    def _collect(self, job_id, pending):
+        """Enregistrer les morceaux terminés ; False si le job a été repris ailleurs"""
+        finished, _ = wait(pending, timeout=LEASE_SECONDS / 3, return_when=FIRST_COMPLETED)
+        if not finished:
+            return _update_job(job_id, self.owner)
+
+        model_version = os.path.basename(self._model_path) if self._model_path else None
+        for future in finished:
+            index, chunk = pending.pop(future)
+            results = future.result()
+            if not _save_chunk(job_id, self.owner, index, results, model_version):
+                for other in pending:
+                    other.cancel()
+                return False
+            audit_log.record(chunk.to_dict(orient="records"), results, model_version)
+        return True
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def start_dispatcher(model_path=None):
+    """Démarrer (une fois par processus) le dispatcher de jobs
+
+    model_path : modèle que l'API vient de charger ; les jobs suivants sont
+    scorés avec lui. Sans chemin, le modèle déjà désigné est conservé.
+    """
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = JobDispatcher()
+        if model_path is not None:
+            _dispatcher.model_path = model_path
+        _dispatcher.start()
+    return _dispatcher
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Registre de modèles par segment (pays de transaction, ligne de produit...)
+
+Chaque valeur de la colonne de segmentation (SEGMENT_COLUMN) peut avoir sa
+propre forêt, rangée comme un mini saved_models/ :
+
+    saved_models/segments/<colonne>/<valeur>/best_model_*.joblib
+                                            model_metadata_*.json
+
+Les lignes d'un lot sont regroupées par segment : chaque modèle score son
+groupe en un seul appel, puis les résultats sont remis dans l'ordre du lot.
+Les segments sans modèle dédié sont scorés par le modèle global. Les modèles
+sont chargés à la première ligne de leur segment et gardés en mémoire dans
+la limite de SEGMENT_MEMORY_BUDGET_MB ; au-delà, le moins récemment utilisé
+est déchargé (taille estimée par celle du fichier .joblib).
+
+Usage:
+    python model_registry.py --column ProductID --source creditcarddata.csv
+    SEGMENT_COLUMN=ProductID python app.py
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+import warnings
+from collections import OrderedDict
+
+import model_store
+import scoring
+
+# Configuration (surchargeable par variables d'environnement)
+SEGMENT_COLUMN = os.environ.get('SEGMENT_COLUMN', '')
+SEGMENT_MODEL_DIR = os.environ.get('SEGMENT_MODEL_DIR', os.path.join(model_store.MODEL_DIR, "segments"))
+SEGMENT_MEMORY_BUDGET_MB = float(os.environ.get('SEGMENT_MEMORY_BUDGET_MB', 512))
+DEFAULT_SEGMENT = "default"
+MIN_SEGMENT_ROWS = 1000
+
+
+def segment_key(value):
+    """Nom de dossier d'une valeur de segment (1.0 et 1 donnent "1")"""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    elif hasattr(value, 'item'):
+        return segment_key(value.item())
+    return str(value)
+
+
+def segment_dir(column, value, model_dir=SEGMENT_MODEL_DIR):
+    return os.path.join(model_dir, column, segment_key(value))
+
+
+class ModelRegistry:
+    """Modèles par segment chargés à la demande, évincés par LRU"""
+
+    def __init__(self, default_model, default_thresholds=None, column=SEGMENT_COLUMN,
+                 model_dir=SEGMENT_MODEL_DIR, memory_budget_mb=SEGMENT_MEMORY_BUDGET_MB):
+        self.default_model = default_model
+        self.default_thresholds = default_thresholds or dict(scoring.DEFAULT_THRESHOLDS)
+        self.column = column
+        self.model_dir = model_dir
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+
+        self._lock = threading.Lock()
+        # Un chargement à la fois : deux requêtes du même segment ne chargent
+        # pas deux copies, et le pic mémoire reste borné
+        self._load_lock = threading.Lock()
+        self._loaded = OrderedDict()     # segment -> entrée, du moins au plus récemment utilisé
+        self._paths = None
+        self.loads = 0
+        self.evictions = 0
+        self.hits = 0
+        self.misses = 0
+        self._latency = {}
+
+    def segment_paths(self):
+        """Modèle le plus récent de chaque segment disponible sur disque"""
+        with self._lock:
+            if self._paths is not None:
+                return self._paths
+
+        paths = {}
+        column_dir = os.path.join(self.model_dir, self.column)
+        if os.path.isdir(column_dir):
+            for name in sorted(os.listdir(column_dir)):
+                model_path = model_store.latest_model_path(os.path.join(column_dir, name))
+                if model_path:
+                    paths[name] = model_path
+        with self._lock:
+            self._paths = paths
+        return paths
+
+    def refresh(self):
+        """Relire les segments disponibles et décharger tous les modèles"""
+        with self._lock:
+            self._paths = None
+            self._loaded.clear()
+
+    def _cached(self, key):
+        with self._lock:
+            entry = self._loaded.get(key)
+            if entry is not None:
+                self._loaded.move_to_end(key)
+                self.hits += 1
+            return entry
+
+    def get(self, value):
+        """(modèle, seuils, version) du segment, ou None s'il n'a pas de modèle dédié"""
+        key = segment_key(value)
+        model_path = self.segment_paths().get(key)
+        if model_path is None:
+            return None
+
+        entry = self._cached(key)
+        if entry is not None:
+            return entry
+
+        with self._load_lock:
+            entry = self._cached(key)
+            if entry is not None:
+                return entry
+
+            metadata_path = model_store.metadata_path_for(model_path)
+            metadata = model_store.load_metadata(metadata_path) if metadata_path else None
+            entry = {
+                "model": model_store.load_model(model_path),
+                "thresholds": scoring.resolve_thresholds(metadata),
+                "version": os.path.basename(model_path),
+                "size": os.path.getsize(model_path)
+            }
+            with self._lock:
+                self.misses += 1
+                self.loads += 1
+                self._loaded[key] = entry
+                self._evict()
+        return entry
+
+    def _evict(self):
+        """Décharger les modèles les moins récemment utilisés au-delà du budget"""
+        # Le dernier modèle chargé reste, même s'il dépasse seul le budget
+        while len(self._loaded) > 1 and \
+                sum(entry["size"] for entry in self._loaded.values()) > self.memory_budget:
+            self._loaded.popitem(last=False)
+            self.evictions += 1
+
+    def _record_latency(self, key, rows, seconds):
+        with self._lock:
+            latency = self._latency.setdefault(key, {"batches": 0, "rows": 0, "seconds": 0.0, "max_seconds": 0.0})
+            latency["batches"] += 1
+            latency["rows"] += rows
+            latency["seconds"] += seconds
+            latency["max_seconds"] = max(latency["max_seconds"], seconds)
+
+    def score_frame(self, df, offset=0, default_model=None, thresholds=None):
+        """Scorer un DataFrame, chaque ligne par le modèle de son segment
+
+        Les résultats sont au format de scoring.score_frame, dans l'ordre de df,
+        avec en plus le segment qui a servi ("default" : modèle global).
+        """
+        import numpy as np
+        import pandas as pd
+
+        default_model = default_model if default_model is not None else self.default_model
+        thresholds = thresholds or self.default_thresholds
+
+        if self.column in df.columns:
+            codes, uniques = pd.factorize(df[self.column])
+        else:
+            codes, uniques = np.full(len(df), -1), []
+
+        groups = {}
+        for code, value in enumerate(uniques):
+            key = segment_key(value)
+            entry = self.get(value)
+            group_key = key if entry is not None else DEFAULT_SEGMENT
+            groups.setdefault(group_key, (entry, []))[1].append(code)
+
+        results = [None] * len(df)
+        for key, (entry, segment_codes) in groups.items():
+            rows = np.flatnonzero(np.isin(codes, segment_codes))
+            self._score_group(key, entry, df, rows, offset, default_model, thresholds, results)
+
+        # Valeurs manquantes dans la colonne de segmentation : modèle global
+        missing = np.flatnonzero(codes == -1)
+        if len(missing):
+            self._score_group(DEFAULT_SEGMENT, None, df, missing, offset, default_model, thresholds, results)
+        return results
+
+    def _score_group(self, key, entry, df, rows, offset, default_model, thresholds, results):
+        model = entry["model"] if entry is not None else default_model
+        group_thresholds = entry["thresholds"] if entry is not None else thresholds
+
+        start = time.perf_counter()
+        group_results = scoring.score_frame(model, df.iloc[rows], thresholds=group_thresholds)
+        self._record_latency(key, len(rows), time.perf_counter() - start)
+
+        for row, result in zip(rows, group_results):
+            result["transaction_id"] = offset + int(row)
+            result["segment"] = key
+            results[row] = result
+
+    def stats(self):
+        paths = self.segment_paths()
+        with self._lock:
+            return {
+                "column": self.column,
+                "available_segments": sorted(paths),
+                "loaded_segments": list(self._loaded),
+                "loaded_mb": round(sum(entry["size"] for entry in self._loaded.values()) / 1024 / 1024, 1),
+                "memory_budget_mb": round(self.memory_budget / 1024 / 1024, 1),
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "hits": self.hits,
+                "misses": self.misses,
+                "latency": {
+                    key: {
+                        "batches": latency["batches"],
+                        "rows": latency["rows"],
+                        "mean_ms": round(latency["seconds"] / latency["batches"] * 1000, 3),
+                        "max_ms": round(latency["max_seconds"] * 1000, 3)
+                    }
+                    for key, latency in sorted(self._latency.items())
+                }
+            }
+
+
+def train_segments(source, column, balancing="upsample", min_rows=MIN_SEGMENT_ROWS,
+                   model_dir=SEGMENT_MODEL_DIR, segments=None):
+    """Entraîner une Forêt Aléatoire par valeur de la colonne (jeu en cache)
+
+    Les segments trop petits ou sans les deux classes gardent le modèle global.
+    """
+    import numpy as np
+    import perf_gate
+    import train
+
+    (X_train, X_test, y_train, y_test), dataset = train.load_split(source, balancing)
+    if column not in X_train.columns:
+        raise ValueError(f"Colonne de segmentation inconnue: {column}")
+
+    saved = {}
+    values = segments or sorted(np.unique(X_train[column]))
+    for value in values:
+        key = segment_key(value)
+        train_mask = (X_train[column] == value).to_numpy()
+        test_mask = (X_test[column] == value).to_numpy()
+        y_segment = y_train[train_mask]
+        if train_mask.sum() < min_rows or y_segment.nunique() < 2 or not test_mask.any():
+            print(f"  {column}={key:<12} ⚠️  ignoré ({int(train_mask.sum()):,} lignes d'entraînement)")
+            continue
+
+        models = train.candidate_models(balancing, ["forest"])
+        results = train.fit_candidates(models, X_train[train_mask], y_segment,
+                                       X_test[test_mask], y_test[test_mask], cv=0, verbose=False)
+        extra = {
+            'balancing': train.balancing_info(balancing, y_segment),
+            'source_sha256': dataset.source_sha256,
+            'segment': {'column': column, 'value': key, 'train_rows': int(train_mask.sum())}
+        }
+        try:
+            _, model_path, _ = train.save_best(results, X_train[train_mask], X_test[test_mask],
+                                               y_test[test_mask], extra,
+                                               save_dir=segment_dir(column, value, model_dir))
+        except perf_gate.PerformanceRegression as e:
+            print(f"  {column}={key:<12} ❌ non promu : {e}")
+            continue
+        result = next(iter(results.values()))
+        print(f"  {column}={key:<12} ✅ {int(train_mask.sum()):>9,} lignes | F1: {result['f1_score']:.4f} | "
+              f"fit: {result['fit_seconds']:.2f}s")
+        saved[key] = model_path
+    return saved
+
+
+def main(argv=None):
+    import data_prep
+    import train
+
+    parser = argparse.ArgumentParser(description="Entraînement des modèles par segment")
+    parser.add_argument("--column", default=SEGMENT_COLUMN or None, required=not SEGMENT_COLUMN,
+                        help="Colonne de segmentation (ex. TransactionCountry, ProductID)")
+    parser.add_argument("--source", default=data_prep.DEFAULT_INPUT, help="Fichier CSV source")
+    parser.add_argument("--balancing", choices=train.BALANCING_STRATEGIES, default=train.DEFAULT_BALANCING,
+                        help="Rééquilibrage des classes")
+    parser.add_argument("--min-rows", type=int, default=MIN_SEGMENT_ROWS,
+                        help="Lignes d'entraînement minimales par segment")
+    parser.add_argument("--model-dir", default=SEGMENT_MODEL_DIR, help="Dossier des modèles par segment")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings('ignore')
+    print("🗂️  MODÈLES PAR SEGMENT")
+    print("=" * 50)
+
+    try:
+        saved = train_segments(args.source, args.column, args.balancing, args.min_rows, args.model_dir)
+    except ValueError as e:
+        print(f" ❌ {e}")
+        return 1
+
+    print(f"\n ✅ {len(saved)} modèle(s) de segment dans {os.path.join(args.model_dir, args.column)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Accès aux artefacts sauvegardés dans saved_models/
+(modèles, métadonnées et données de test)
+
+publish_model est le seul chemin de sauvegarde d'un nouveau modèle (train.py,
+notebook) : le coût de service y est contrôlé (perf_gate.py) avant la promotion.
+"""
+
+import os
+import json
+import hashlib
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIR = os.path.join(BASE_DIR, "saved_models")
+
+
+def latest_artifact(prefix, suffix, model_dir=MODEL_DIR):
+    """Retourner le chemin de l'artefact le plus récent (ou None)"""
+    if not os.path.exists(model_dir):
+        return None
+
+    candidates = [f for f in os.listdir(model_dir)
+                  if f.startswith(prefix) and f.endswith(suffix)]
+    if not candidates:
+        return None
+
+    # Les noms se terminent par un horodatage YYYYMMDD_HHMMSS : trier sur lui, pas sur
+    # le nom entier (best_model_<nom>_... : un autre nom de modèle fausserait l'ordre)
+    return os.path.join(model_dir, max(candidates, key=lambda name: (_timestamp_of(name), name)))
+
+
+def latest_model_path(model_dir=MODEL_DIR):
+    """Chemin du meilleur modèle le plus récent"""
+    return latest_artifact("best_model_", ".joblib", model_dir)
+
+
+def latest_metadata_path(model_dir=MODEL_DIR):
+    """Chemin des métadonnées les plus récentes"""
+    return latest_artifact("model_metadata_", ".json", model_dir)
+
+
+def latest_test_data_path(model_dir=MODEL_DIR):
+    """Chemin des données de test les plus récentes"""
+    return latest_artifact("test_data_", ".joblib", model_dir)
+
+
+def _timestamp_of(path):
+    """Horodatage YYYYMMDD_HHMMSS qui termine le nom d'un artefact"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return "_".join(stem.split("_")[-2:])
+
+
+def metadata_path_for(model_path):
+    """Métadonnées sauvegardées avec un modèle (même horodatage)"""
+    path = os.path.join(os.path.dirname(model_path),
+                        f"model_metadata_{_timestamp_of(model_path)}.json")
+    return path if os.path.exists(path) else None
+
+
+def test_data_path_for(model_path):
+    """Données de test sauvegardées avec un modèle (même horodatage)"""
+    path = os.path.join(os.path.dirname(model_path),
+                        f"test_data_{_timestamp_of(model_path)}.joblib")
+    return path if os.path.exists(path) else None
+
+
+def file_hash(path):
+    """Empreinte SHA-256 du contenu d'un fichier"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_model(model_path=None):
+    """Charger un modèle (le plus récent par défaut)"""
+    import joblib
+
+    model_path = model_path or latest_model_path()
+    if model_path is None:
+        raise FileNotFoundError("Aucun modèle trouvé")
+    return joblib.load(model_path)
+
+
+def load_metadata(metadata_path=None):
+    """Charger les métadonnées (les plus récentes par défaut)"""
+    metadata_path = metadata_path or latest_metadata_path()
+    if metadata_path is None:
+        return None
+    with open(metadata_path, 'r') as f:
+        return json.load(f)
+
+
+def save_metadata(metadata, metadata_path):
+    """Réécrire un fichier de métadonnées de façon atomique"""
+    tmp_path = metadata_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(tmp_path, metadata_path)
+
+
+def load_test_data(test_data_path=None):
+    """Charger X_test / y_test sauvegardés par le notebook"""
+    import joblib
+
+    test_data_path = test_data_path or latest_test_data_path()
+    if test_data_path is None:
+        raise FileNotFoundError("Aucune donnée de test trouvée")
+    return joblib.load(test_data_path)
+
+
+def publish_model(model, model_name, metadata, X_test, y_test, save_dir=MODEL_DIR, check_performance=None):
+    """Sauvegarder un modèle, ses données de test et ses métadonnées
+
+    Les artefacts sont d'abord écrits dans save_dir/.staging/, hors de la vue
+    de latest_model_path. Le coût de service est comparé au modèle servi
+    (perf_gate.check) : PerformanceRegression si le modèle se dégrade, et
+    rien n'est alors publié. Retourne (chemin du modèle, chemin des métadonnées).
+    """
+    import joblib
+    import perf_gate
+
+    if check_performance is None:
+        check_performance = perf_gate.PERF_GATE_ENABLED
+
+    os.makedirs(save_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    model_path = os.path.join(save_dir, f"best_model_{model_name.replace(' ', '_')}_{timestamp}.joblib")
+    metadata_path = os.path.join(save_dir, f"model_metadata_{timestamp}.json")
+    test_data_path = os.path.join(save_dir, f"test_data_{timestamp}.joblib")
+    metadata = dict(metadata)
+
+    staging_dir = os.path.join(save_dir, ".staging")
+    os.makedirs(staging_dir, exist_ok=True)
+    staged_model = os.path.join(staging_dir, os.path.basename(model_path))
+    staged_test_data = os.path.join(staging_dir, os.path.basename(test_data_path))
+    joblib.dump(model, staged_model)
+    joblib.dump({'X_test': X_test, 'y_test': y_test, 'feature_names': list(X_test.columns)},
+                staged_test_data)
+
+    if check_performance:
+        try:
+            metadata['performance'] = perf_gate.check(staged_model, staged_test_data,
+                                                      latest_model_path(save_dir))
+        except BaseException:
+            os.remove(staged_model)
+            os.remove(staged_test_data)
+            raise
+
+    os.replace(staged_model, model_path)
+    os.replace(staged_test_data, test_data_path)
+    # Les métadonnées en dernier : elles désignent un modèle complet
+    save_metadata(metadata, metadata_path)
+    return model_path, metadata_path
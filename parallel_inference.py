@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Scoring des gros lots sur un pool de processus persistant
+
+Dans un worker, le parcours des arbres d'un gros lot /predict tient le GIL
+une bonne partie du temps : un lot de 100 000 lignes est scoré sur un seul
+cœur. PooledForest découpe les lots d'au moins PARALLEL_INFERENCE_MIN_ROWS
+lignes en tranches scorées par PARALLEL_INFERENCE_WORKERS processus :
+
+  - la forêt n'est chargée qu'une fois pour tout le pool : le serveur
+    forkserver la précharge et les workers en sont forkés, ils en partagent
+    donc les pages mémoire (copie à l'écriture, jamais écrites). Le chemin
+    du modèle lui parvient dans la liste de préchargement, sous la forme
+    d'un nom de module que ce module sait importer ;
+  - la matrice d'entrée (float32) et les probabilités de sortie passent par
+    des blocs multiprocessing.shared_memory : seuls leurs noms et les bornes
+    des tranches sont sérialisés ;
+  - les lots plus petits sont scorés dans le processus, sans surcoût.
+
+Usage (l'API l'active avec PARALLEL_INFERENCE_WORKERS=4) :
+    from parallel_inference import PooledForest
+    model = PooledForest(forest, model_path, workers=4)
+    probabilities = model.predict_proba(X)
+"""
+
+import os
+import sys
+import threading
+import warnings
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import model_store
+
+# Configuration (surchargeable par variables d'environnement)
+PARALLEL_INFERENCE_WORKERS = int(os.environ.get('PARALLEL_INFERENCE_WORKERS', 0))
+PARALLEL_INFERENCE_MIN_ROWS = int(os.environ.get('PARALLEL_INFERENCE_MIN_ROWS', 20000))
+
+# Attente maximale du démarrage de tous les workers (secondes)
+POOL_START_TIMEOUT = 300
+
+# Forêt préchargée par le serveur forkserver : importer le module
+# "<_PRELOAD_PREFIX><chemin en hexadécimal>" charge le modèle de ce chemin
+_PRELOAD_PREFIX = "_parallel_inference_preload_"
+_preloaded_path = None
+_preloaded_model = None
+
+_worker_model = None
+_worker_barrier = None
+
+
+class _PreloadFinder:
+    """Importeur des noms de préchargement (set_forkserver_preload n'accepte que des modules)"""
+
+    @staticmethod
+    def find_spec(name, path=None, target=None):
+        if not name.startswith(_PRELOAD_PREFIX):
+            return None
+        import importlib.util
+        return importlib.util.spec_from_loader(name, _PreloadFinder)
+
+    @staticmethod
+    def create_module(spec):
+        return None
+
+    @staticmethod
+    def exec_module(module):
+        global _preloaded_path, _preloaded_model
+        warnings.filterwarnings('ignore')
+        _preloaded_path = bytes.fromhex(module.__name__[len(_PRELOAD_PREFIX):]).decode()
+        _preloaded_model = model_store.load_model(_preloaded_path)
+
+
+def preload_name(model_path):
+    return _PRELOAD_PREFIX + model_path.encode().hex()
+
+
+if not any(finder is _PreloadFinder for finder in sys.meta_path):
+    sys.meta_path.append(_PreloadFinder)
+
+
+def _init_worker(model_path, barrier):
+    """Forêt du worker : celle du forkserver (partagée) ou un chargement propre"""
+    global _worker_model, _worker_barrier
+    warnings.filterwarnings('ignore')
+    if _preloaded_model is not None and _preloaded_path == model_path:
+        _worker_model = _preloaded_model
+    else:
+        # Forkserver déjà démarré pour un autre modèle
+        _worker_model = model_store.load_model(model_path)
+    _worker_barrier = barrier
+
+
+def _score_slice(input_name, output_name, shape, start, end):
+    """Scorer les lignes [start, end) de la matrice partagée"""
+    # Workers et processus de l'API partagent le même resource_tracker : le bloc
+    # reste enregistré une seule fois et n'est supprimé que par son créateur
+    input_block = shared_memory.SharedMemory(name=input_name)
+    output_block = shared_memory.SharedMemory(name=output_name)
+    try:
+        X = np.ndarray(shape, dtype=np.float32, buffer=input_block.buf)
+        out = np.ndarray((shape[0], len(_worker_model.classes_)), dtype=np.float64, buffer=output_block.buf)
+        out[start:end] = _worker_model.predict_proba(X[start:end])
+        del X, out
+    finally:
+        input_block.close()
+        output_block.close()
+    return end - start
+
+
+def _wait_started(_):
+    """Tâche de démarrage : bloque jusqu'à ce que tous les workers l'exécutent"""
+    _worker_barrier.wait(POOL_START_TIMEOUT)
+    return os.getpid()
+
+
+class PooledForest:
+    """Enveloppe d'un modèle (predict_proba, predict) : gros lots sur le pool"""
+
+    def __init__(self, model, model_path, workers=PARALLEL_INFERENCE_WORKERS,
+                 min_rows=PARALLEL_INFERENCE_MIN_ROWS):
+        self.model = model
+        self.model_path = model_path
+        self.workers = max(1, workers)
+        self.min_rows = min_rows
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.inline_batches = 0
+        self.pooled_batches = 0
+        self.pooled_rows = 0
+
+    def __getattr__(self, name):
+        # classes_, feature_names_in_, estimators_... : ceux de la forêt
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                context = multiprocessing.get_context("forkserver")
+                # Sans effet si le forkserver du processus tourne déjà (autre modèle)
+                context.set_forkserver_preload([__name__, preload_name(self.model_path)])
+                # La barrière ne peut être transmise qu'au démarrage des processus (initargs)
+                barrier = context.Barrier(self.workers)
+                pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                           initializer=_init_worker, initargs=(self.model_path, barrier))
+                # Une tâche bloquante par worker : aucune ne se termine avant que tous
+                # aient chargé la forêt, chaque soumission démarre donc un nouveau processus
+                try:
+                    started = set(pool.map(_wait_started, range(self.workers)))
+                except BaseException:
+                    pool.shutdown(cancel_futures=True)
+                    raise
+                if len(started) != self.workers:
+                    pool.shutdown()
+                    raise RuntimeError(f"{len(started)}/{self.workers} workers démarrés")
+                self._pool = pool
+            return self._pool
+
+    def _as_matrix(self, X):
+        if hasattr(X, 'columns') and hasattr(self.model, 'feature_names_in_'):
+            X = X[list(self.model.feature_names_in_)]
+        return np.asarray(X, dtype=np.float32)
+
+    def predict_proba(self, X):
+        n_rows = len(X)
+        if n_rows < self.min_rows:
+            with self._lock:
+                self.inline_batches += 1
+            return self.model.predict_proba(X)
+
+        pool = self._get_pool()
+        matrix = self._as_matrix(X)
+        n_classes = len(self.model.classes_)
+        input_block = shared_memory.SharedMemory(create=True, size=max(1, matrix.nbytes))
+        output_block = shared_memory.SharedMemory(create=True, size=n_rows * n_classes * 8)
+        try:
+            np.ndarray(matrix.shape, dtype=np.float32, buffer=input_block.buf)[:] = matrix
+            bounds = np.linspace(0, n_rows, self.workers + 1).astype(int)
+            futures = [pool.submit(_score_slice, input_block.name, output_block.name, matrix.shape,
+                                   int(start), int(end))
+                       for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+            for future in futures:
+                future.result()
+            result = np.ndarray((n_rows, n_classes), dtype=np.float64, buffer=output_block.buf).copy()
+        finally:
+            input_block.close()
+            input_block.unlink()
+            output_block.close()
+            output_block.unlink()
+
+        with self._lock:
+            self.pooled_batches += 1
+            self.pooled_rows += n_rows
+        return result
+
+    def predict(self, X):
+        return self.model.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def pool_stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "min_rows": self.min_rows,
+                "inline_batches": self.inline_batches,
+                "pooled_batches": self.pooled_batches,
+                "pooled_rows": self.pooled_rows
+            }
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
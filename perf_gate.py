@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Contrôle de non-régression du coût de service des modèles
+
+Chaque sauvegarde de train.save_best mesure, dans un processus neuf, le
+coût de service du nouvel artefact sur ses données de test :
+  - temps de chargement et mémoire résidente ajoutée par le modèle ;
+  - latence d'une transaction seule (p50, p99 ; DataFrame d'une ligne comme
+    /predict) ;
+  - débit de lots de 1 000 et 10 000 lignes (meilleur de REPEATS passages).
+
+Le modèle actuellement servi (le plus récent du dossier, par horodatage)
+est mesuré de la même façon, dans la même exécution et sur les mêmes
+lignes. Le nouveau modèle n'est promu que si aucune métrique ne se dégrade
+de plus de PERF_GATE_TOLERANCE (0.25 = 25 %). Les écarts absolus
+inférieurs au bruit de mesure (NOISE_FLOOR) sont ignorés. Une référence
+impossible à mesurer refuse aussi la promotion, sauf avec
+PERF_GATE_ALLOW_UNMEASURED_REFERENCE=1 (--allow-unmeasured-reference). Les
+chiffres sont enregistrés dans les métadonnées ("performance"). Un refus
+lève PerformanceRegression, et le rapport est écrit dans reports/perf_gate/.
+
+Usage:
+    python perf_gate.py                                   # modèle servi, sans comparaison
+    python perf_gate.py saved_models/best_model_B.joblib  # comparé au modèle servi
+    python perf_gate.py saved_models/best_model_B.joblib --against saved_models/best_model_A.joblib --save
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import warnings
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import model_store
+
+# Configuration (surchargeable par variables d'environnement)
+PERF_GATE_ENABLED = os.environ.get('PERF_GATE_ENABLED', '1') == '1'
+PERF_GATE_TOLERANCE = float(os.environ.get('PERF_GATE_TOLERANCE', 0.25))
+# Promouvoir sans comparaison quand le modèle servi ne peut pas être mesuré
+ALLOW_UNMEASURED_REFERENCE = os.environ.get('PERF_GATE_ALLOW_UNMEASURED_REFERENCE', '0') == '1'
+SINGLE_ROW_CALLS = int(os.environ.get('PERF_GATE_SINGLE_ROW_CALLS', 200))
+REPEATS = 3
+BATCH_SIZES = (1_000, 10_000)
+REPORT_DIR = os.path.join(model_store.BASE_DIR, "reports", "perf_gate")
+
+# Métriques contrôlées : sens de l'amélioration et écart absolu ignoré (bruit)
+METRICS = {
+    "load_seconds": ("lower", 0.05),
+    "model_rss_mb": ("lower", 5.0),
+    "single_row_p50_ms": ("lower", 0.5),
+    "batch_1k_rows_per_second": ("higher", 0.0),
+    "batch_10k_rows_per_second": ("higher", 0.0),
+}
+
+
+class PerformanceRegression(Exception):
+    """Promotion refusée : une métrique dépasse la tolérance, ou la référence n'a pu être mesurée"""
+
+    def __init__(self, report):
+        names = ", ".join(regression["metric"] for regression in report["regressions"])
+        super().__init__(f"Régression de performance: {names}")
+        self.report = report
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _peak_rss_mb():
+    import resource
+    # ru_maxrss : kilo-octets sous Linux, octets sous macOS
+    scale = 2 ** 20 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _measure(model_path, test_data_path):
+    """Mesures d'un artefact (exécuté dans un processus neuf)"""
+    import joblib
+    import numpy as np
+    import pandas as pd
+
+    warnings.filterwarnings('ignore')
+    X = joblib.load(test_data_path)['X_test']
+
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    model = joblib.load(model_path)
+    load_seconds = time.perf_counter() - start
+    model_rss_mb = _rss_mb() - rss_before
+
+    if hasattr(model, 'feature_names_in_'):
+        X = X[list(model.feature_names_in_)]
+    X = pd.concat([X] * (max(BATCH_SIZES) // len(X) + 1), ignore_index=True)
+
+    # Transaction seule, comme /predict (DataFrame d'une ligne)
+    rows = [X.iloc[[i]] for i in range(min(SINGLE_ROW_CALLS, len(X)))]
+    model.predict_proba(rows[0])
+    latencies = []
+    for row in rows:
+        start = time.perf_counter()
+        model.predict_proba(row)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    figures = {
+        "load_seconds": round(load_seconds, 4),
+        "model_rss_mb": round(model_rss_mb, 1),
+        "single_row_p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "single_row_p99_ms": round(float(np.percentile(latencies, 99)), 3),
+    }
+    for size in BATCH_SIZES:
+        batch = X.iloc[:size]
+        best = float("inf")
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            model.predict_proba(batch)
+            best = min(best, time.perf_counter() - start)
+        figures[f"batch_{size // 1000}k_rows_per_second"] = round(size / best, 1)
+    figures["peak_rss_mb"] = round(_peak_rss_mb(), 1)
+    return figures
+
+
+def measure(model_path, test_data_path):
+    """Mesures d'un artefact dans un processus neuf (chargement et mémoire sans biais)"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        figures = pool.submit(_measure, os.path.abspath(model_path), os.path.abspath(test_data_path)).result()
+    figures["model"] = os.path.basename(model_path)
+    figures["model_bytes"] = os.path.getsize(model_path)
+    return figures
+
+
+def compare(candidate, reference, tolerance=PERF_GATE_TOLERANCE):
+    """Métriques du candidat dégradées au-delà de la tolérance par rapport à la référence"""
+    regressions = []
+    for metric, (better, noise_floor) in METRICS.items():
+        new, old = candidate.get(metric), reference.get(metric)
+        if new is None or not old:
+            continue
+        change = (new - old) / old
+        worse = change > tolerance if better == "lower" else change < -tolerance
+        if worse and abs(new - old) > noise_floor:
+            regressions.append({"metric": metric, "candidate": new, "reference": old,
+                                "change": round(change, 4)})
+    return regressions
+
+
+def check(model_path, test_data_path, reference_path=None, tolerance=PERF_GATE_TOLERANCE,
+          allow_unmeasured_reference=ALLOW_UNMEASURED_REFERENCE):
+    """Rapport de performance d'un candidat ; PerformanceRegression si la promotion est refusée"""
+    report = {
+        "measured_at": datetime.now().isoformat(),
+        "tolerance": tolerance,
+        "candidate": measure(model_path, test_data_path),
+        "reference": None,
+        "regressions": []
+    }
+    if reference_path and os.path.exists(reference_path):
+        try:
+            report["reference"] = measure(reference_path, test_data_path)
+        except Exception as e:
+            # Modèle servi non mesurable sur ces données (autres features...) : pas de
+            # comparaison possible, ce qui refuse la promotion sauf dérogation explicite
+            report["reference_error"] = repr(e)
+            if not allow_unmeasured_reference:
+                report["regressions"] = [{"metric": "reference", "error": repr(e)}]
+        else:
+            report["regressions"] = compare(report["candidate"], report["reference"], tolerance)
+
+    if report["regressions"]:
+        os.makedirs(REPORT_DIR, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(model_path))[0]
+        report_path = os.path.join(REPORT_DIR, f"{stem}.json")
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        report["report_path"] = report_path
+        raise PerformanceRegression(report)
+    return report
+
+
+def print_report(report):
+    candidate, reference = report["candidate"], report.get("reference") or {}
+    regressed = {regression["metric"] for regression in report["regressions"]}
+    print(f"  {'Métrique':<28}{'Candidat':>14}{'Référence':>14}{'Écart':>9}")
+    for metric in list(METRICS) + ["single_row_p99_ms", "peak_rss_mb"]:
+        new, old = candidate.get(metric), reference.get(metric)
+        change = f"{(new - old) / old:+.1%}" if old else ""
+        flag = "  ❌" if metric in regressed else ""
+        old = f"{old:>14,.3f}" if old is not None else f"{'-':>14}"
+        print(f"  {metric:<28}{new:>14,.3f}{old}{change:>9}{flag}")
+    if report.get("reference_error"):
+        print(f"\n ⚠️  Référence non mesurée : {report['reference_error']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Coût de service d'un modèle et contrôle de non-régression")
+    parser.add_argument("model", nargs="?", help="Modèle candidat (défaut: le modèle servi)")
+    parser.add_argument("--against", help="Modèle de référence (défaut: le modèle servi)")
+    parser.add_argument("--tolerance", type=float, default=PERF_GATE_TOLERANCE,
+                        help="Dégradation relative tolérée (0.25 = 25 %%)")
+    parser.add_argument("--save", action="store_true", help="Enregistrer les mesures dans les métadonnées du candidat")
+    parser.add_argument("--allow-unmeasured-reference", action="store_true",
+                        default=ALLOW_UNMEASURED_REFERENCE,
+                        help="Accepter le candidat si la référence ne peut pas être mesurée")
+    args = parser.parse_args(argv)
+
+    print("⏱️  CONTRÔLE DE PERFORMANCE DU MODÈLE")
+    print("=" * 50)
+
+    model_path = args.model or model_store.latest_model_path()
+    test_data_path = model_path and model_store.test_data_path_for(model_path)
+    if not model_path or not os.path.exists(model_path) or not test_data_path:
+        print(f" ❌ Modèle ou données de test introuvables: {model_path}")
+        return 1
+    reference_path = args.against or model_store.latest_model_path(os.path.dirname(model_path))
+    if reference_path and os.path.abspath(reference_path) == os.path.abspath(model_path):
+        reference_path = None
+
+    print(f"  Candidat: {os.path.basename(model_path)}")
+    print(f"  Référence: {os.path.basename(reference_path) if reference_path else 'aucune'}\n")
+    try:
+        report = check(model_path, test_data_path, reference_path, args.tolerance,
+                       args.allow_unmeasured_reference)
+        passed = True
+    except PerformanceRegression as e:
+        report = e.report
+        passed = False
+    print_report(report)
+
+    if args.save:
+        metadata_path = model_store.metadata_path_for(model_path)
+        if metadata_path:
+            metadata = model_store.load_metadata(metadata_path)
+            metadata["performance"] = report
+            model_store.save_metadata(metadata, metadata_path)
+            print(f"\n ✅ Mesures enregistrées: {os.path.basename(metadata_path)}")
+
+    if not passed:
+        print(f"\n ❌ Promotion refusée (tolérance {args.tolerance:.0%}) : rapport {report['report_path']}")
+        return 1
+    print(f"\n ✅ Aucune régression au-delà de {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
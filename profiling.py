@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Profilage CPU à la demande du chemin de prédiction
+
+Activé uniquement par variables d'environnement, lues au démarrage :
+  - PROFILE_SAMPLE_RATE=N   profile une requête /predict sur N
+  - PROFILE_ADMIN_TOKEN=xxx profile les requêtes portant l'en-tête
+                            X-Profile-Token: xxx (et protège /admin/profile,
+                            qui reste fermé sans jeton)
+
+Si aucune des deux n'est définie, le décorateur @profiled retourne la vue
+inchangée : aucun coût à l'exécution. Les profils cProfile sont agrégés
+en mémoire et servis par /admin/profile (fonctions les plus coûteuses et
+temps par bibliothèque : pandas, sklearn, numpy, json...).
+"""
+
+import os
+import hmac
+import time
+import pstats
+import cProfile
+import functools
+import itertools
+import threading
+
+from flask import request
+
+PROFILE_SAMPLE_RATE = int(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_ADMIN_TOKEN = os.environ.get('PROFILE_ADMIN_TOKEN', '')
+PROFILE_HEADER = "X-Profile-Token"
+
+ENABLED = PROFILE_SAMPLE_RATE > 0 or bool(PROFILE_ADMIN_TOKEN)
+
+# Regroupement des fonctions profilées par bibliothèque (chemin du fichier)
+LIBRARIES = (
+    ("sklearn", "/sklearn/"),
+    ("pandas", "/pandas/"),
+    ("numpy", "/numpy/"),
+    ("json", "/json/"),
+    ("flask", "/flask/"),
+    ("werkzeug", "/werkzeug/"),
+)
+
+
+class ProfileAggregator:
+    """Agrégation thread-safe de profils cProfile"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # cProfile ne supporte qu'un profil actif à la fois dans le processus
+        self._active = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stats = None
+            self.profiled_requests = 0
+            self.skipped_requests = 0
+            self.profiled_seconds = 0.0
+            self.since = time.time()
+
+    def run(self, func, *args, **kwargs):
+        """Exécuter func sous cProfile et agréger le profil"""
+        if not self._active.acquire(blocking=False):
+            with self._lock:
+                self.skipped_requests += 1
+            return func(*args, **kwargs)
+
+        try:
+            profiler = cProfile.Profile()
+            start = time.perf_counter()
+            try:
+                return profiler.runcall(func, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    if self._stats is None:
+                        self._stats = pstats.Stats(profiler)
+                    else:
+                        self._stats.add(profiler)
+                    self.profiled_requests += 1
+                    self.profiled_seconds += elapsed
+        finally:
+            self._active.release()
+
+    def summary(self, top=20, sort="tottime"):
+        """Fonctions les plus coûteuses et temps propre par bibliothèque"""
+        sort_index = {"tottime": 2, "cumtime": 3, "ncalls": 1}.get(sort, 2)
+
+        with self._lock:
+            entries = dict(self._stats.stats) if self._stats is not None else {}
+            summary = {
+                "profiled_requests": self.profiled_requests,
+                "skipped_requests": self.skipped_requests,
+                "profiled_seconds": round(self.profiled_seconds, 6),
+                "since": self.since
+            }
+
+        by_library = {}
+        for (filename, _, _), (_, _, tottime, _, _) in entries.items():
+            library = _library_of(filename)
+            by_library[library] = by_library.get(library, 0.0) + tottime
+
+        hottest = sorted(entries.items(), key=lambda item: item[1][sort_index], reverse=True)[:top]
+        summary["by_library"] = [
+            {"library": name, "tottime": round(seconds, 6)}
+            for name, seconds in sorted(by_library.items(), key=lambda item: -item[1])
+        ]
+        summary["top_functions"] = [
+            {
+                "function": name,
+                "file": filename,
+                "line": line,
+                "library": _library_of(filename),
+                "ncalls": ncalls,
+                "tottime": round(tottime, 6),
+                "cumtime": round(cumtime, 6)
+            }
+            for (filename, line, name), (_, ncalls, tottime, cumtime, _) in hottest
+        ]
+        return summary
+
+
+def _library_of(filename):
+    path = filename.replace("\\", "/")
+    for name, marker in LIBRARIES:
+        if marker in path:
+            return name
+    if path.startswith("~") or path.startswith("<"):
+        return "builtins"
+    return "other"
+
+
+aggregator = ProfileAggregator()
+_request_counter = itertools.count(1)
+
+
+def is_admin():
+    """La requête courante porte-t-elle le jeton d'administration ?"""
+    if not PROFILE_ADMIN_TOKEN:
+        return False
+    token = request.headers.get(PROFILE_HEADER)
+    if not token:
+        return False
+    # Comparaison en octets : compare_digest refuse les str non ASCII (TypeError)
+    return hmac.compare_digest(token.encode(), PROFILE_ADMIN_TOKEN.encode())
+
+
+def _should_profile():
+    if PROFILE_SAMPLE_RATE > 0 and next(_request_counter) % PROFILE_SAMPLE_RATE == 0:
+        return True
+    return is_admin()
+
+
+def profiled(view):
+    """Décorateur de vue : profilage à la demande, sans effet si désactivé"""
+    if not ENABLED:
+        return view
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if _should_profile():
+            return aggregator.run(view, *args, **kwargs)
+        return view(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Journal structuré de l'API : une ligne JSON par événement
+
+Chaque requête reçoit un identifiant de trace : celui de l'en-tête
+X-Request-ID s'il est fourni (proxy, client), sinon un identifiant
+généré. Il est renvoyé dans la réponse. À la fin de la requête, un événement
+"request" est journalisé avec :
+  - la méthode, le chemin, le statut et la durée totale ;
+  - la durée de chaque étape (stage("score") ...) ;
+  - la taille du lot, la version du modèle et les décisions d'admission
+    (annotate(...)).
+
+Le chemin de requête ne fait que déposer l'enregistrement dans une file
+mémoire bornée (QueueHandler). Un QueueListener le formate en JSON et
+l'écrit dans REQUEST_LOG_FILE, avec rotation par taille (REQUEST_LOG_MAX_MB,
+REQUEST_LOG_BACKUPS). Comme pour le journal d'audit, une file pleine fait
+perdre (et compter) l'événement plutôt que de bloquer la requête. Les
+événements autres que "request" (chargement du modèle, erreurs) sont aussi
+affichés sur la console.
+
+"{pid}" dans REQUEST_LOG_FILE donne un fichier par processus (défaut
+logs/api_{pid}.log) : la rotation n'est pas coordonnée entre processus, et
+plusieurs workers gunicorn ne doivent pas écrire dans le même fichier.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import queue
+import atexit
+import logging
+import threading
+import traceback
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from flask import g, has_request_context, request
+
+import model_store
+
+# Configuration (surchargeable par variables d'environnement)
+REQUEST_LOG_ENABLED = os.environ.get('REQUEST_LOG_ENABLED', '1') == '1'
+# Un fichier par processus par défaut : les workers gunicorn ne partagent pas la rotation
+REQUEST_LOG_FILE = os.environ.get('REQUEST_LOG_FILE', os.path.join(model_store.BASE_DIR, "logs", "api_{pid}.log"))
+REQUEST_LOG_MAX_MB = float(os.environ.get('REQUEST_LOG_MAX_MB', 50))
+REQUEST_LOG_BACKUPS = int(os.environ.get('REQUEST_LOG_BACKUPS', 5))
+REQUEST_LOG_QUEUE_SIZE = int(os.environ.get('REQUEST_LOG_QUEUE_SIZE', 10000))
+REQUEST_LOG_LEVEL = os.environ.get('REQUEST_LOG_LEVEL', 'INFO').upper()
+
+LOGGER_NAME = "fraud_api"
+TRACE_HEADER = "X-Request-ID"
+REQUEST_EVENT = "request"
+_VALID_TRACE_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+class JsonFormatter(logging.Formatter):
+    """Enregistrement -> objet JSON d'une ligne (champs de extra={"fields": ...} à plat)"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "event": getattr(record, "event", "log"),
+            "message": record.getMessage(),
+            "pid": record.process
+        }
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id:
+            entry["trace_id"] = trace_id
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Messages lisibles pour la console (hors événements "request")"""
+
+    ICONS = {"WARNING": " ⚠️ ", "ERROR": " ❌", "CRITICAL": " ❌"}
+
+    def format(self, record):
+        line = f"{self.ICONS.get(record.levelname, ' ')} {record.getMessage()}"
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+class _SkipRequests(logging.Filter):
+    def filter(self, record):
+        return getattr(record, "event", None) != REQUEST_EVENT
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler non bloquant : file pleine -> événement perdu et compté
+
+    Le formatage JSON est laissé au thread d'écriture ; seule la trace d'une
+    exception est rendue ici (elle référence les frames de la requête).
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.dropped = 0
+        self._emit_us = deque(maxlen=10000)
+
+    def prepare(self, record):
+        if record.exc_info:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        start = time.perf_counter()
+        try:
+            self.queue.put_nowait(self.prepare(record))
+            accepted = True
+        except queue.Full:
+            accepted = False
+        with self._lock:
+            if accepted:
+                self.enqueued += 1
+            else:
+                self.dropped += 1
+            self._emit_us.append((time.perf_counter() - start) * 1e6)
+
+    def stats(self):
+        with self._lock:
+            samples = sorted(self._emit_us)
+            return {
+                "enabled": True,
+                "file": log_file(),
+                "enqueued": self.enqueued,
+                "dropped": self.dropped,
+                "queue_depth": self.queue.qsize(),
+                "queue_capacity": self.queue.maxsize,
+                "emit_overhead_us": {
+                    "p50": round(_percentile(samples, 50), 2),
+                    "p99": round(_percentile(samples, 99), 2),
+                    "max": round(samples[-1], 2) if samples else 0.0
+                }
+            }
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def log_file():
+    return REQUEST_LOG_FILE.replace("{pid}", str(os.getpid()))
+
+
+_logger = None
+_handler = None
+_listener = None
+_logger_lock = threading.Lock()
+
+
+def get_logger():
+    """Logger de l'API, configuré au premier appel (file + thread d'écriture)"""
+    global _logger, _handler, _listener
+    with _logger_lock:
+        if _logger is not None:
+            return _logger
+        logger = logging.getLogger(LOGGER_NAME)
+        logger.setLevel(REQUEST_LOG_LEVEL)
+        logger.propagate = False
+
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(ConsoleFormatter())
+        console.addFilter(_SkipRequests())
+        if REQUEST_LOG_ENABLED:
+            path = log_file()
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            rotating = RotatingFileHandler(path, maxBytes=int(REQUEST_LOG_MAX_MB * 1024 * 1024),
+                                           backupCount=REQUEST_LOG_BACKUPS, encoding="utf-8")
+            rotating.setFormatter(JsonFormatter())
+            _handler = DroppingQueueHandler(queue.Queue(maxsize=REQUEST_LOG_QUEUE_SIZE))
+            _listener = QueueListener(_handler.queue, rotating, console, respect_handler_level=True)
+            _listener.start()
+            atexit.register(shutdown)
+            logger.addHandler(_handler)
+        else:
+            logger.addHandler(console)
+        _logger = logger
+    return _logger
+
+
+def shutdown():
+    """Vider la file et arrêter le thread d'écriture"""
+    global _listener
+    with _logger_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def log(level, message, event="log", **fields):
+    """Journaliser un événement structuré (identifiant de trace de la requête en cours)"""
+    get_logger().log(level, message, extra={"event": event, "fields": fields, "trace_id": trace_id()})
+
+
+def info(message, event="log", **fields):
+    log(logging.INFO, message, event, **fields)
+
+
+def warning(message, event="log", **fields):
+    log(logging.WARNING, message, event, **fields)
+
+
+def exception(message, event="error", **fields):
+    get_logger().exception(message, extra={"event": event, "fields": fields, "trace_id": trace_id()})
+
+
+def trace_id():
+    """Identifiant de trace de la requête en cours (None hors requête)"""
+    return g.get("trace_id") if has_request_context() else None
+
+
+def begin_request():
+    """before_request : identifiant de trace et chronomètre"""
+    incoming = request.headers.get(TRACE_HEADER, "")
+    g.trace_id = incoming if _VALID_TRACE_ID.match(incoming) else uuid.uuid4().hex
+    g.request_start = time.perf_counter()
+    g.log_stages = {}
+    g.log_fields = {}
+
+
+@contextmanager
+def stage(name):
+    """Chronométrer une étape de la requête en cours (durée en ms dans l'événement)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if has_request_context() and "log_stages" in g:
+            g.log_stages[name] = round((time.perf_counter() - start) * 1000, 3)
+
+
+def annotate(**fields):
+    """Ajouter des champs à l'événement de la requête en cours"""
+    if has_request_context() and "log_fields" in g:
+        g.log_fields.update(fields)
+
+
+def end_request(response):
+    """after_request : en-tête de trace et événement "request" """
+    if "trace_id" not in g:
+        return response
+    response.headers[TRACE_HEADER] = g.trace_id
+    if not REQUEST_LOG_ENABLED:
+        return response
+    fields = {
+        "method": request.method,
+        "path": request.path,
+        "status": response.status_code,
+        "duration_ms": round((time.perf_counter() - g.request_start) * 1000, 3)
+    }
+    if g.log_stages:
+        fields["stages_ms"] = g.log_stages
+    fields.update(g.log_fields)
+    level = logging.ERROR if response.status_code >= 500 else logging.INFO
+    get_logger().log(level, f"{request.method} {request.path} {response.status_code}",
+                     extra={"event": REQUEST_EVENT, "fields": fields, "trace_id": g.trace_id})
+    return response
+
+
+def install(app):
+    """Brancher le journal sur une application Flask"""
+    app.before_request(begin_request)
+    app.after_request(end_request)
+
+
+def stats():
+    get_logger()
+    return _handler.stats() if _handler is not None else {"enabled": False}
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Scoring partagé entre l'API (/predict) et les traitements en lot (/jobs)
+"""
+
+from datetime import datetime
+
+# Seuils de décision par défaut (probabilité de fraude strictement supérieure).
+# 'fraud' reproduit model.predict ; 'review' est la bande de risque modéré.
+# threshold_optimizer.py écrit des seuils calibrés dans les métadonnées.
+DEFAULT_THRESHOLDS = {"fraud": 0.5, "review": 0.3}
+
+
+class Thresholds(dict):
+    """Seuils globaux {"fraud", "review"} ; .segments : table par segment éventuelle
+
+    La table voyage avec les seuils globaux (un seul objet à remplacer au
+    rechargement) et reste hors de la sérialisation JSON du dict.
+    """
+
+    segments = None
+
+
+def resolve_thresholds(metadata):
+    """Seuils servis par l'API : ceux des métadonnées, sinon les défauts
+
+    Les seuils par segment (segment_thresholds.py) sont compilés dans .segments.
+    """
+    thresholds = Thresholds(DEFAULT_THRESHOLDS)
+    if metadata and metadata.get("decision_thresholds"):
+        configured = metadata["decision_thresholds"]
+        for key in DEFAULT_THRESHOLDS:
+            if key in configured:
+                thresholds[key] = float(configured[key])
+    if metadata and metadata.get("segment_thresholds"):
+        import segment_thresholds
+        thresholds.segments = segment_thresholds.load(metadata, thresholds)
+    return thresholds
+
+
+def risk_band(fraud_probability, thresholds=None):
+    """Bande de risque d'une probabilité de fraude : high, medium ou low"""
+    thresholds = thresholds or DEFAULT_THRESHOLDS
+    if fraud_probability > thresholds["fraud"]:
+        return "high"
+    if fraud_probability > thresholds["review"]:
+        return "medium"
+    return "low"
+
+
+def to_dataframe(data):
+    """Convertir un payload JSON (objet ou liste d'objets) en DataFrame"""
+    # Import différé : pandas n'est pas chargé au démarrage de l'API
+    import pandas as pd
+
+    if isinstance(data, dict):
+        return pd.DataFrame([data])
+    if isinstance(data, list):
+        return pd.DataFrame(data)
+    raise ValueError("Format de données invalide")
+
+
+def score_frame(model, df, offset=0, thresholds=None):
+    """Scorer un DataFrame et retourner les résultats au format de /predict"""
+    thresholds = thresholds or DEFAULT_THRESHOLDS
+
+    # Remettre les colonnes dans l'ordre vu à l'entraînement (fichiers CSV, JSON trié...)
+    if hasattr(model, 'feature_names_in_'):
+        df = df[list(model.feature_names_in_)]
+
+    # Un seul passage sur le modèle : la décision se déduit des probabilités
+    probabilities = None
+    row_cuts = None
+    if hasattr(model, 'predict_proba'):
+        probabilities = model.predict_proba(df)
+        table = getattr(thresholds, "segments", None)
+        if table is not None:
+            # Seuils par segment : un seul accès indexé pour tout le lot
+            fraud_cuts, review_cuts = table.lookup(df)
+            predictions = (probabilities[:, 1] > fraud_cuts).astype(int).tolist()
+            row_cuts = [{"fraud": f, "review": r} for f, r in zip(fraud_cuts.tolist(), review_cuts.tolist())]
+            probabilities = probabilities.tolist()
+        else:
+            probabilities = probabilities.tolist()
+            predictions = [int(p[1] > thresholds["fraud"]) for p in probabilities]
+    else:
+        predictions = model.predict(df)
+
+    results = []
+    for i, pred in enumerate(predictions):
+        result = {
+            "transaction_id": offset + i,
+            "prediction": int(pred),
+            "prediction_label": "fraud" if pred == 1 else "no_fraud",
+            "timestamp": datetime.now().isoformat()
+        }
+
+        if probabilities:
+            result["confidence"] = {
+                "no_fraud": float(probabilities[i][0]),
+                "fraud": float(probabilities[i][1])
+            }
+            if row_cuts is not None:
+                result["risk_band"] = risk_band(probabilities[i][1], row_cuts[i])
+                result["decision_threshold"] = row_cuts[i]["fraud"]
+            else:
+                result["risk_band"] = risk_band(probabilities[i][1], thresholds)
+
+        results.append(result)
+
+    return results
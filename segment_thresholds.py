@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Seuils de décision par segment (pays, produit, gros achat)
+
+L'économie de la fraude diffère selon TransactionCountry, ProductID et
+LargePurchase. threshold_optimizer.py --segments calibre un seuil de fraude et un
+seuil de revue par combinaison de ces colonnes, sur les données de test
+étiquetées, avec le même objectif que les seuils globaux. Ils sont écrits
+dans les métadonnées ("segment_thresholds").
+
+Au chargement, ils sont compilés en une table NumPy dense indexée par les
+codes des segments : une case de plus par colonne pour les valeurs inconnues.
+Les segments trop petits (SEGMENT_THRESHOLD_MIN_ROWS lignes,
+SEGMENT_THRESHOLD_MIN_FRAUDS fraudes) et les valeurs inconnues gardent les
+seuils globaux. Après le scoring, les seuils de tout le lot s'obtiennent par
+un seul accès indexé dans la table (lookup).
+"""
+
+import os
+from datetime import datetime
+
+import numpy as np
+
+# Configuration (surchargeable par variables d'environnement)
+SEGMENT_THRESHOLD_COLUMNS = tuple(
+    column.strip() for column in os.environ.get(
+        'SEGMENT_THRESHOLD_COLUMNS', 'TransactionCountry,ProductID,LargePurchase').split(',')
+    if column.strip())
+SEGMENT_THRESHOLD_MIN_ROWS = int(os.environ.get('SEGMENT_THRESHOLD_MIN_ROWS', 50))
+SEGMENT_THRESHOLD_MIN_FRAUDS = int(os.environ.get('SEGMENT_THRESHOLD_MIN_FRAUDS', 5))
+
+
+def _column_values(df, column):
+    """Colonne en float64 ; NaN (valeur inconnue) si absente ou non numérique"""
+    if column not in df.columns:
+        return np.full(len(df), np.nan)
+    values = df[column]
+    if values.dtype.kind not in "biuf":
+        import pandas as pd
+        values = pd.to_numeric(values, errors="coerce")
+    return values.to_numpy(dtype=np.float64)
+
+
+def segment_codes(df, columns, values):
+    """Indice à plat de chaque ligne dans la table (case "autre" si valeur inconnue)"""
+    flat = np.zeros(len(df), dtype=np.intp)
+    for column, known in zip(columns, values):
+        flat *= len(known) + 1
+        if not len(known):
+            flat += len(known)
+            continue
+        column_values = _column_values(df, column)
+        positions = np.searchsorted(known, column_values)
+        np.minimum(positions, len(known) - 1, out=positions)
+        flat += np.where(known[positions] == column_values, positions, len(known))
+    return flat
+
+
+class ThresholdTable:
+    """Table dense (segments x [fraude, revue]) compilée depuis les métadonnées"""
+
+    def __init__(self, columns, values, table):
+        self.columns = tuple(columns)
+        self.values = [np.asarray(known, dtype=np.float64) for known in values]
+        self.table = table
+
+    @classmethod
+    def compile(cls, entry, thresholds):
+        """Table prête à servir ; les cases vides (null) prennent les seuils globaux"""
+        table = np.column_stack([
+            np.array([np.nan if v is None else v for v in entry["fraud"]], dtype=np.float64),
+            np.array([np.nan if v is None else v for v in entry["review"]], dtype=np.float64)
+        ])
+        for j, key in enumerate(("fraud", "review")):
+            table[np.isnan(table[:, j]), j] = thresholds[key]
+        return cls(entry["columns"], entry["values"], np.ascontiguousarray(table))
+
+    def lookup(self, df):
+        """(seuils de fraude, seuils de revue) de chaque ligne du lot"""
+        cuts = self.table[segment_codes(df, self.columns, self.values)]
+        return cuts[:, 0], cuts[:, 1]
+
+    def __len__(self):
+        return len(self.table)
+
+
+def fit(X, y, scores, choose, columns=SEGMENT_THRESHOLD_COLUMNS,
+        min_rows=SEGMENT_THRESHOLD_MIN_ROWS, min_frauds=SEGMENT_THRESHOLD_MIN_FRAUDS):
+    """Entrée "segment_thresholds" des métadonnées
+
+    choose(y_segment, scores_segment) -> (seuil de fraude, seuil de revue, métriques),
+    le même critère que les seuils globaux.
+    """
+    columns = [column for column in columns if column in X.columns]
+    if not columns:
+        raise ValueError("Aucune colonne de segmentation dans les données de test")
+    values = [np.unique(_column_values(X, column)) for column in columns]
+    values = [known[~np.isnan(known)] for known in values]
+    shape = [len(known) + 1 for known in values]
+
+    y = np.asarray(y, dtype=bool)
+    scores = np.asarray(scores, dtype=np.float64)
+    codes = segment_codes(X, columns, values)
+    fraud = [None] * int(np.prod(shape))
+    review = [None] * len(fraud)
+    segments = []
+    for code in np.unique(codes):
+        rows = codes == code
+        n_rows, n_frauds = int(rows.sum()), int(y[rows].sum())
+        index = np.unravel_index(code, shape)
+        segment = {
+            "values": {column: known[i].item() if i < len(known) else None
+                       for column, known, i in zip(columns, values, index)},
+            "rows": n_rows,
+            "frauds": n_frauds
+        }
+        if n_rows >= min_rows and min_frauds <= n_frauds < n_rows:
+            fraud[code], review[code], metrics = choose(y[rows], scores[rows])
+            segment.update(fraud=fraud[code], review=review[code], metrics_at_fraud=metrics)
+        else:
+            segment["fallback"] = "global"
+        segments.append(segment)
+
+    return {
+        "columns": columns,
+        "values": [[v.item() for v in known] for known in values],
+        "fraud": fraud,
+        "review": review,
+        "segments": segments,
+        "min_rows": min_rows,
+        "min_frauds": min_frauds,
+        "computed_at": datetime.now().isoformat()
+    }
+
+
+def load(metadata, thresholds):
+    """Table compilée des métadonnées (None si aucun seuil par segment)"""
+    entry = (metadata or {}).get("segment_thresholds")
+    if not entry:
+        return None
+    return ThresholdTable.compile(entry, thresholds)
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Routeur de scoring réparti par compte (hachage cohérent)
+
+Un routeur frontal reçoit /predict et répartit les transactions sur N
+instances locales de app.py : chaque compte (AccountNo, à défaut CIF) est
+toujours servi par la même instance, qui peut donc porter son état.
+  - anneau de hachage cohérent (SHARD_VNODES points virtuels par instance) :
+    ajouter ou retirer une instance ne déplace qu'environ 1/N des comptes ;
+  - un lot est découpé par instance, les sous-lots sont scorés en parallèle
+    (FraudClient : connexions persistantes, nouvelles tentatives) et les
+    résultats sont remis dans l'ordre du lot d'origine (champ "shard" en plus) ;
+  - une instance en erreur fait échouer la requête avec son statut
+    (502 si elle est injoignable, coupe la connexion ou renvoie une
+    réponse sans une prédiction par transaction).
+
+Tout tient sur une machine : sans --backend, le routeur lance lui-même les
+instances (gunicorn, 1 worker gthread chacune) sur les ports suivants.
+
+Usage:
+    python shard_router.py --shards 4 --port 8080
+    python shard_router.py --port 8080 --backend http://10.0.0.1:8080 --backend http://10.0.0.2:8080
+"""
+
+import os
+import sys
+import json
+import time
+import bisect
+import hashlib
+import argparse
+import threading
+import http.client
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import model_store
+from fraud_client import APIError, FraudClient
+
+# Configuration (surchargeable par variables d'environnement)
+SHARD_KEYS = tuple(key.strip() for key in os.environ.get('SHARD_KEYS', 'AccountNo,CIF').split(',') if key.strip())
+SHARD_VNODES = int(os.environ.get('SHARD_VNODES', 128))
+SHARD_TIMEOUT = float(os.environ.get('SHARD_TIMEOUT', 30))
+SHARD_THREADS = int(os.environ.get('SHARD_THREADS', 8))
+SHARD_READY_TIMEOUT = float(os.environ.get('SHARD_READY_TIMEOUT', 120))
+SHARD_LOG_DIR = os.path.join(model_store.BASE_DIR, "logs")
+
+
+class InvalidShardResponse(Exception):
+    """Réponse 200 d'une instance sans une prédiction par transaction envoyée"""
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+def key_string(value):
+    """Forme canonique d'une clé de compte (12345, 12345.0 et "12345" sont le même compte)"""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+class HashRing:
+    """Anneau de hachage cohérent avec points virtuels"""
+
+    def __init__(self, nodes, vnodes=SHARD_VNODES):
+        if not nodes:
+            raise ValueError("Aucune instance dans l'anneau")
+        self.nodes = list(nodes)
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node_for(self, key):
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[index]
+
+
+class ShardRouter:
+    """Découpage des lots par compte, scoring parallèle, réassemblage dans l'ordre"""
+
+    def __init__(self, backends, key_columns=SHARD_KEYS, vnodes=SHARD_VNODES, timeout=SHARD_TIMEOUT):
+        self.backends = list(backends)
+        self.key_columns = key_columns
+        self.ring = HashRing(self.backends, vnodes)
+        self.clients = {url: FraudClient(url, timeout=timeout, pool_size=SHARD_THREADS)
+                        for url in self.backends}
+        self._executor = ThreadPoolExecutor(max_workers=len(self.backends) * SHARD_THREADS,
+                                            thread_name_prefix="shard-router")
+        self._lock = threading.Lock()
+        self.counters = {url: {"requests": 0, "rows": 0, "errors": 0, "seconds": 0.0} for url in self.backends}
+        self.unkeyed_rows = 0
+
+    def shard_of(self, record):
+        """Instance d'une transaction : première clé de compte présente, sinon la transaction entière"""
+        for column in self.key_columns:
+            value = record.get(column) if isinstance(record, dict) else None
+            if value is not None:
+                return self.ring.node_for(f"{column}:{key_string(value)}")
+        with self._lock:
+            self.unkeyed_rows += 1
+        return self.ring.node_for(json.dumps(record, sort_keys=True, default=str))
+
+    def split(self, records):
+        """{instance: indices des transactions du lot}, dans l'ordre du lot"""
+        shards = {}
+        for i, record in enumerate(records):
+            shards.setdefault(self.shard_of(record), []).append(i)
+        return shards
+
+    def _score_shard(self, url, records):
+        start = time.perf_counter()
+        try:
+            body = self.clients[url].request("POST", "/predict", records)
+            predictions = body.get("predictions") if isinstance(body, dict) else None
+            if not isinstance(predictions, list) or len(predictions) != len(records):
+                raise InvalidShardResponse(f"{len(records)} prédiction(s) attendue(s)")
+            return body
+        except Exception:
+            with self._lock:
+                self.counters[url]["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                counter = self.counters[url]
+                counter["requests"] += 1
+                counter["rows"] += len(records)
+                counter["seconds"] += time.perf_counter() - start
+
+    def predict(self, payload):
+        """(statut HTTP, réponse) d'un appel /predict réparti"""
+        records = [payload] if isinstance(payload, dict) else payload
+        if not isinstance(records, list) or not records:
+            return 400, {"error": "Aucune donnée fournie"}
+
+        shards = self.split(records)
+        if len(shards) == 1:
+            # Un seul compte ou une seule instance : pas de détour par le pool de threads
+            url = next(iter(shards))
+            calls = {url: _Done(lambda: self._score_shard(url, records))}
+        else:
+            calls = {url: self._executor.submit(self._score_shard, url, [records[i] for i in indices])
+                     for url, indices in shards.items()}
+
+        results = [None] * len(records)
+        response = None
+        degraded = False
+        for url, call in calls.items():
+            try:
+                body = call.result()
+            except APIError as e:
+                payload = e.payload if isinstance(e.payload, dict) else {"error": str(e)}
+                return e.status, dict(payload, shard=url)
+            except (OSError, http.client.HTTPException) as e:
+                return 502, {"error": f"Instance injoignable: {e!r}", "shard": url}
+            except InvalidShardResponse as e:
+                return 502, {"error": f"Réponse invalide de l'instance: {e}", "shard": url}
+            shard = self.backends.index(url)
+            for i, result in zip(shards[url], body["predictions"]):
+                results[i] = dict(result, transaction_id=i, shard=shard)
+            degraded = degraded or bool(body.get("degraded"))
+            response = response or body
+
+        response = {
+            "predictions": results,
+            "model_info": response.get("model_info"),
+            "timestamp": datetime.now().isoformat()
+        }
+        if degraded:
+            response["degraded"] = True
+        return 200, response
+
+    def health(self):
+        shards = {}
+        for url, client in self.clients.items():
+            try:
+                shards[url] = client.health()
+            except (APIError, OSError, http.client.HTTPException) as e:
+                shards[url] = {"status": "unreachable", "error": repr(e)}
+        healthy = all(shard.get("status") == "healthy" for shard in shards.values())
+        return {"status": "healthy" if healthy else "unhealthy", "shards": shards,
+                "timestamp": datetime.now().isoformat()}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "key_columns": list(self.key_columns),
+                "unkeyed_rows": self.unkeyed_rows,
+                "shards": [{"url": url, "index": i, **{k: round(v, 3) if isinstance(v, float) else v
+                                                        for k, v in self.counters[url].items()}}
+                           for i, url in enumerate(self.backends)]
+            }
+
+    def close(self):
+        self._executor.shutdown()
+        for client in self.clients.values():
+            client.close()
+
+
+class _Done:
+    """Appel exécuté dans le thread courant, avec l'interface d'un Future"""
+
+    def __init__(self, func):
+        self._func = func
+
+    def result(self):
+        return self._func()
+
+
+class LocalShards:
+    """Instances locales de app.py (gunicorn, un processus chacune)"""
+
+    def __init__(self, ports, threads=SHARD_THREADS, env=None):
+        self.ports = list(ports)
+        self.threads = threads
+        self.env = env or {}
+        self.processes = []
+
+    @property
+    def urls(self):
+        return [f"http://127.0.0.1:{port}" for port in self.ports]
+
+    def start(self, timeout=SHARD_READY_TIMEOUT):
+        os.makedirs(SHARD_LOG_DIR, exist_ok=True)
+        for i, port in enumerate(self.ports):
+            env = {**os.environ, "REQUEST_LOG_FILE": os.path.join(SHARD_LOG_DIR, f"shard_{i}.log"), **self.env}
+            self.processes.append(subprocess.Popen(
+                [sys.executable, "-m", "gunicorn", "app:app", "--bind", f"127.0.0.1:{port}",
+                 "--workers", "1", "--worker-class", "gthread", "--threads", str(self.threads),
+                 "--timeout", "120"],
+                cwd=model_store.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            ))
+        deadline = time.perf_counter() + timeout
+        for url in self.urls:
+            if not _wait_ready(url, deadline):
+                self.stop()
+                raise RuntimeError(f"Instance non prête: {url}")
+        return self
+
+    def stop(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.wait()
+        self.processes = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _wait_ready(url, deadline):
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/readyz", timeout=2) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def create_app(router):
+    """Application Flask du routeur (/predict, /health, /shards)"""
+    from flask import Flask, jsonify, request
+
+    app = Flask(__name__)
+
+    @app.route('/predict', methods=['POST'])
+    def predict():
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({"error": "Aucune donnée fournie"}), 400
+        status, body = router.predict(data)
+        return jsonify(body), status
+
+    @app.route('/health', methods=['GET'])
+    def health():
+        report = router.health()
+        return jsonify(report), 200 if report["status"] == "healthy" else 503
+
+    @app.route('/shards', methods=['GET'])
+    def shards():
+        return jsonify(router.stats())
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Routeur /predict réparti par compte sur plusieurs instances")
+    parser.add_argument("--shards", type=int, default=2, help="Instances locales à lancer (sans --backend)")
+    parser.add_argument("--backend", action="append", dest="backends",
+                        help="URL d'une instance existante (répétable)")
+    parser.add_argument("--port", type=int, default=int(os.environ.get('PORT', 8080)), help="Port du routeur")
+    parser.add_argument("--host", default=os.environ.get('HOST', '0.0.0.0'))
+    args = parser.parse_args(argv)
+
+    print("🔀 ROUTEUR RÉPARTI PAR COMPTE")
+    print("=" * 50)
+
+    local = None
+    backends = args.backends
+    if not backends:
+        local = LocalShards([args.port + 1 + i for i in range(max(1, args.shards))])
+        print(f"  Démarrage de {len(local.ports)} instance(s) locale(s)...")
+        try:
+            local.start()
+        except RuntimeError as e:
+            print(f" ❌ {e}")
+            return 1
+        backends = local.urls
+
+    router = ShardRouter(backends)
+    for i, url in enumerate(backends):
+        print(f"  Instance {i}: {url}")
+    print(f"  Clé de répartition: {' puis '.join(router.key_columns)}")
+    print(f"\n ✅ Routeur disponible sur: http://{args.host}:{args.port}")
+    try:
+        create_app(router).run(host=args.host, port=args.port, debug=False, threaded=True)
+    finally:
+        router.close()
+        if local is not None:
+            local.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,15 @@
 // Configuration
 // Détecter automatiquement l'URL de base (local ou production)
 const API_BASE_URL = window.location.origin;
-let transactionHistory = JSON.parse(localStorage.getItem('transactionHistory')) || [];
+
+// Historique paginé côté serveur (GET /history) : seule la page visible est en mémoire
+const HISTORY_PAGE_SIZE = 20;
+let historyPage = [];
+let historyCursors = [null];
+let historyPageIndex = 0;
+let historyNextCursor = null;
+// Première page modifiée localement (addToHistory) : son curseur serveur n'est plus à jour
+let historyPageStale = false;
 
 // DOM Elements
 const predictionForm = document.getElementById('predictionForm');
@@ -21,6 +29,8 @@ function initializeApp() {
     setDefaultValues();
     
     // Load transaction history
+    localStorage.removeItem('transactionHistory');
+    addHistoryEventListeners();
     loadTransactionHistory();
     
     // Add form event listeners
@@ -325,10 +335,11 @@ function displayResults(result, transactionData) {
     const prediction = result.predictions[0];
     const fraudProbability = prediction.confidence.fraud;
     const noFraudProbability = prediction.confidence.no_fraud;
+    const riskBand = prediction.risk_band;
     
     // Update result header
     const resultHeader = document.getElementById('resultHeader');
-    resultHeader.className = `card-header ${getRiskClass(fraudProbability)}`;
+    resultHeader.className = `card-header ${getRiskClass(riskBand)}`;
     
     // Update prediction text
     document.getElementById('predictionText').textContent = 
@@ -342,15 +353,15 @@ function displayResults(result, transactionData) {
     const riskBar = document.getElementById('riskBar');
     const riskPercentage = fraudProbability * 100;
     riskBar.style.width = `${riskPercentage}%`;
-    riskBar.className = `progress-bar ${getRiskBarClass(fraudProbability)}`;
+    riskBar.className = `progress-bar ${getRiskBarClass(riskBand)}`;
     
     // Update risk level
     const riskLevel = document.getElementById('riskLevel');
-    riskLevel.textContent = getRiskText(fraudProbability);
-    riskLevel.className = `risk-indicator ${getRiskClass(fraudProbability)}`;
+    riskLevel.textContent = getRiskText(riskBand);
+    riskLevel.className = `risk-indicator ${getRiskClass(riskBand)}`;
     
     // Update recommendations
-    updateRecommendations(fraudProbability, prediction);
+    updateRecommendations(prediction);
     
     // Show results section
     resultsSection.style.display = 'block';
@@ -360,25 +371,27 @@ function displayResults(result, transactionData) {
     resultsSection.classList.add('fade-in');
 }
 
-function getRiskClass(fraudProbability) {
-    if (fraudProbability > 0.5) return 'bg-danger text-white';
-    if (fraudProbability > 0.3) return 'bg-warning text-dark';
+// Les bandes de risque sont calculées par l'API avec les seuils calibrés
+// (voir threshold_optimizer.py) : high, medium ou low
+function getRiskClass(riskBand) {
+    if (riskBand === 'high') return 'bg-danger text-white';
+    if (riskBand === 'medium') return 'bg-warning text-dark';
     return 'bg-success text-white';
 }
 
-function getRiskBarClass(fraudProbability) {
-    if (fraudProbability > 0.5) return 'bg-danger';
-    if (fraudProbability > 0.3) return 'bg-warning';
+function getRiskBarClass(riskBand) {
+    if (riskBand === 'high') return 'bg-danger';
+    if (riskBand === 'medium') return 'bg-warning';
     return 'bg-success';
 }
 
-function getRiskText(fraudProbability) {
-    if (fraudProbability > 0.5) return '🔴 RISQUE ÉLEVÉ';
-    if (fraudProbability > 0.3) return '🟡 RISQUE MODÉRÉ';
+function getRiskText(riskBand) {
+    if (riskBand === 'high') return '🔴 RISQUE ÉLEVÉ';
+    if (riskBand === 'medium') return '🟡 RISQUE MODÉRÉ';
     return '🟢 RISQUE FAIBLE';
 }
 
-function updateRecommendations(fraudProbability, prediction) {
+function updateRecommendations(prediction) {
     const recommendationsDiv = document.getElementById('recommendations');
     let recommendations = '';
     
@@ -394,7 +407,7 @@ function updateRecommendations(fraudProbability, prediction) {
                 </ul>
             </div>
         `;
-    } else if (fraudProbability > 0.3) {
+    } else if (prediction.risk_band === 'medium') {
         recommendations = `
             <div class="alert alert-warning">
                 <h6><i class="bi bi-shield-exclamation"></i> Surveillance Renforcée</h6>
@@ -424,71 +437,174 @@ function updateRecommendations(fraudProbability, prediction) {
 }
 
 function addToHistory(result, transactionData) {
+    // La prédiction est enregistrée côté serveur de façon asynchrone :
+    // on l'insère directement en tête de la première page, sans recharger
+    if (historyPageIndex !== 0 || hasHistoryFilters()) {
+        return;
+    }
+    
     const prediction = result.predictions[0];
     const historyItem = {
-        id: Date.now(),
-        timestamp: new Date().toLocaleString('fr-FR'),
+        id: `local-${Date.now()}`,
+        timestamp: new Date().toISOString(),
         amount: transactionData.TransactionAmount,
         country: transactionData.TransactionCountry,
         prediction: prediction.prediction_label,
         risk: prediction.confidence.fraud,
+        risk_band: prediction.risk_band,
         data: transactionData
     };
     
-    transactionHistory.unshift(historyItem);
+    if (historyPage.length === 0) {
+        historyBody.innerHTML = '';
+    }
+    historyPage.unshift(historyItem);
+    historyBody.insertBefore(createHistoryRow(historyItem), historyBody.firstChild);
+    
+    // Garder une seule page dans le DOM
+    if (historyPage.length > HISTORY_PAGE_SIZE) {
+        historyPage.pop();
+        historyBody.lastElementChild.remove();
+        historyPageStale = true;
+        document.getElementById('historyNext').disabled = false;
+    }
+}
+
+function addHistoryEventListeners() {
+    const filters = document.getElementById('historyFilters');
+    if (filters) {
+        filters.addEventListener('submit', function(event) {
+            event.preventDefault();
+            historyCursors = [null];
+            historyPageIndex = 0;
+            loadTransactionHistory();
+        });
+    }
     
-    // Keep only last 50 transactions
-    if (transactionHistory.length > 50) {
-        transactionHistory = transactionHistory.slice(0, 50);
+    const prevButton = document.getElementById('historyPrev');
+    if (prevButton) {
+        prevButton.addEventListener('click', function() {
+            if (historyPageIndex > 0) {
+                historyPageIndex--;
+                loadTransactionHistory();
+            }
+        });
     }
     
-    // Save to localStorage
-    localStorage.setItem('transactionHistory', JSON.stringify(transactionHistory));
+    const nextButton = document.getElementById('historyNext');
+    if (nextButton) {
+        nextButton.addEventListener('click', async function() {
+            if (historyPageStale) {
+                // Recharger la première page pour repartir d'un curseur serveur
+                await loadTransactionHistory();
+            }
+            if (historyNextCursor) {
+                historyCursors[historyPageIndex + 1] = historyNextCursor;
+                historyPageIndex++;
+                loadTransactionHistory();
+            }
+        });
+    }
+}
+
+function getHistoryFilters() {
+    const filters = {};
+    const fields = {
+        risk_band: 'historyRiskBand',
+        country: 'historyCountry',
+        start: 'historyStart',
+        end: 'historyEnd'
+    };
     
-    // Update history display
-    loadTransactionHistory();
+    for (const [param, elementId] of Object.entries(fields)) {
+        const element = document.getElementById(elementId);
+        if (element && element.value) {
+            filters[param] = element.value;
+        }
+    }
+    return filters;
 }
 
-function loadTransactionHistory() {
-    if (historyBody) {
-        historyBody.innerHTML = '';
-        
-        if (transactionHistory.length === 0) {
-            historyBody.innerHTML = `
-                <tr>
-                    <td colspan="6" class="text-center text-muted">
-                        <i class="bi bi-inbox"></i> Aucune transaction analysée
-                    </td>
-                </tr>
-            `;
-            return;
+function hasHistoryFilters() {
+    return Object.keys(getHistoryFilters()).length > 0;
+}
+
+async function loadTransactionHistory() {
+    if (!historyBody) {
+        return;
+    }
+    
+    const params = new URLSearchParams(getHistoryFilters());
+    params.set('limit', HISTORY_PAGE_SIZE);
+    const cursor = historyCursors[historyPageIndex];
+    if (cursor) {
+        params.set('cursor', cursor);
+    }
+    
+    try {
+        const response = await fetch(`${API_BASE_URL}/history?${params.toString()}`);
+        const data = await response.json();
+        if (!response.ok) {
+            throw new Error(data.error || 'Erreur de chargement');
         }
         
-        transactionHistory.forEach(item => {
-            const row = document.createElement('tr');
-            row.innerHTML = `
-                <td>${item.timestamp}</td>
-                <td>${item.amount.toFixed(2)}€</td>
-                <td>${getCountryName(item.country)}</td>
-                <td>
-                    <span class="badge ${item.prediction === 'fraud' ? 'bg-danger' : 'bg-success'}">
-                        ${item.prediction === 'fraud' ? '🚨 Fraude' : '✅ Légitime'}
-                    </span>
-                </td>
-                <td>
-                    <span class="badge ${getRiskBadgeClass(item.risk)}">
-                        ${(item.risk * 100).toFixed(1)}%
-                    </span>
-                </td>
-                <td>
-                    <button class="btn btn-sm btn-outline-primary" onclick="viewTransactionDetails(${item.id})">
-                        <i class="bi bi-eye"></i>
-                    </button>
+        historyPage = data.items;
+        historyNextCursor = data.next_cursor;
+        historyPageStale = false;
+    } catch (error) {
+        console.error('Erreur historique:', error);
+        historyPage = [];
+        historyNextCursor = null;
+    }
+    
+    renderHistoryPage();
+}
+
+function renderHistoryPage() {
+    document.getElementById('historyPrev').disabled = historyPageIndex === 0;
+    document.getElementById('historyNext').disabled = !historyNextCursor;
+    document.getElementById('historyPageLabel').textContent = `Page ${historyPageIndex + 1}`;
+    
+    if (historyPage.length === 0) {
+        historyBody.innerHTML = `
+            <tr>
+                <td colspan="6" class="text-center text-muted">
+                    <i class="bi bi-inbox"></i> Aucune transaction analysée
                 </td>
-            `;
-            historyBody.appendChild(row);
-        });
+            </tr>
+        `;
+        return;
     }
+    
+    // Construire la page hors DOM puis l'insérer en une seule fois
+    const fragment = document.createDocumentFragment();
+    historyPage.forEach(item => fragment.appendChild(createHistoryRow(item)));
+    historyBody.replaceChildren(fragment);
+}
+
+function createHistoryRow(item) {
+    const row = document.createElement('tr');
+    row.innerHTML = `
+        <td>${new Date(item.timestamp).toLocaleString('fr-FR')}</td>
+        <td>${Number(item.amount).toFixed(2)}€</td>
+        <td>${getCountryName(item.country)}</td>
+        <td>
+            <span class="badge ${item.prediction === 'fraud' ? 'bg-danger' : 'bg-success'}">
+                ${item.prediction === 'fraud' ? '🚨 Fraude' : '✅ Légitime'}
+            </span>
+        </td>
+        <td>
+            <span class="badge ${getRiskBadgeClass(item.risk_band)}">
+                ${(item.risk * 100).toFixed(1)}%
+            </span>
+        </td>
+        <td>
+            <button class="btn btn-sm btn-outline-primary" onclick="viewTransactionDetails('${item.id}')">
+                <i class="bi bi-eye"></i>
+            </button>
+        </td>
+    `;
+    return row;
 }
 
 function getCountryName(countryCode) {
@@ -502,14 +618,12 @@ function getCountryName(countryCode) {
     return countries[countryCode] || 'Inconnu';
 }
 
-function getRiskBadgeClass(risk) {
-    if (risk > 0.5) return 'bg-danger';
-    if (risk > 0.3) return 'bg-warning';
-    return 'bg-success';
+function getRiskBadgeClass(riskBand) {
+    return getRiskBarClass(riskBand);
 }
 
 function viewTransactionDetails(transactionId) {
-    const transaction = transactionHistory.find(item => item.id === transactionId);
+    const transaction = historyPage.find(item => String(item.id) === String(transactionId));
     if (transaction) {
         // Create modal for transaction details
         const modalHtml = `
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Pages et fichiers statiques de l'interface web, préparés au démarrage
+
+Au lieu de rendre index.html et de relire static/ à chaque requête, tout
+est préparé une fois :
+  - chaque fichier de static/ est lu, haché (SHA-256) et précompressé en
+    gzip, et en brotli si le module `brotli` est installé ;
+  - il est servi sous une URL empreinte (static/js/app.<empreinte>.js),
+    cacheable indéfiniment (Cache-Control: immutable) ;
+  - index.html est rendu une seule fois, avec les URL empreintes, et servi
+    avec Cache-Control: no-cache (revalidation par ETag, réponse 304).
+
+Chaque représentation (identité, gzip, brotli) a son ETag fort. Les anciens
+chemins sans empreinte (static/css/style.css) restent servis, en no-cache.
+Une modification de static/ ou templates/ est prise en compte au redémarrage.
+"""
+
+import os
+import re
+import gzip
+import hashlib
+import mimetypes
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+FINGERPRINT_LENGTH = 12
+# Les petits fichiers ne gagnent rien à être compressés
+MIN_COMPRESS_SIZE = 1024
+
+
+class Asset:
+    """Contenu d'une ressource et ses représentations précompressées"""
+
+    def __init__(self, body, mimetype, cache_control):
+        digest = hashlib.sha256(body).hexdigest()
+        self.fingerprint = digest[:FINGERPRINT_LENGTH]
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+        # Encodage -> (corps, ETag) ; un ETag fort différent par représentation
+        self.representations = {None: (body, f'"{digest[:32]}"')}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            compressed = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(compressed) < len(body):
+                self.representations["gzip"] = (compressed, f'"{digest[:32]}-gz"')
+            if brotli is not None:
+                compressed = brotli.compress(body, quality=11)
+                if len(compressed) < len(body):
+                    self.representations["br"] = (compressed, f'"{digest[:32]}-br"')
+
+
+def accepted_encodings(header):
+    """Encodages acceptés par le client (q > 0)"""
+    accepted = set()
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        match = re.search(r"q=([0-9.]+)", params)
+        if name and (match is None or float(match.group(1)) > 0):
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def fingerprinted_name(path, fingerprint):
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{fingerprint}{ext}"
+
+
+class AssetCache:
+    """Fichiers de static/ et pages pré-rendues, servis depuis la mémoire"""
+
+    def __init__(self, static_dir):
+        self.static_dir = static_dir
+        self.assets = {}         # chemin relatif -> Asset
+        self.fingerprinted = {}  # chemin empreinte -> chemin relatif
+        self.pages = {}
+
+        for root, _, files in os.walk(static_dir):
+            for name in sorted(files):
+                full_path = os.path.join(root, name)
+                path = os.path.relpath(full_path, static_dir).replace(os.sep, "/")
+                with open(full_path, 'rb') as f:
+                    body = f.read()
+                mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                asset = Asset(body, mimetype, REVALIDATE_CACHE_CONTROL)
+                self.assets[path] = asset
+                self.fingerprinted[fingerprinted_name(path, asset.fingerprint)] = path
+
+    def asset_url(self, path):
+        """URL empreinte d'un fichier de static/ (relative, comme dans les gabarits)"""
+        asset = self.assets.get(path)
+        if asset is None:
+            return f"static/{path}"
+        return f"static/{fingerprinted_name(path, asset.fingerprint)}"
+
+    def add_page(self, name, template, **context):
+        """Rendre un gabarit Jinja une fois pour toutes"""
+        html = template.render(asset_url=self.asset_url, **context)
+        self.pages[name] = Asset(html.encode("utf-8"), "text/html", REVALIDATE_CACHE_CONTROL)
+
+    def lookup(self, path):
+        """(Asset, Cache-Control) d'un chemin de static/, ou (None, None)"""
+        if path in self.fingerprinted:
+            return self.assets[self.fingerprinted[path]], IMMUTABLE_CACHE_CONTROL
+        asset = self.assets.get(path)
+        return asset, asset.cache_control if asset else None
+
+    def respond(self, asset, request, cache_control=None):
+        """Réponse Flask : meilleure représentation acceptée, 304 si l'ETag correspond"""
+        from flask import Response
+
+        accepted = accepted_encodings(request.headers.get("Accept-Encoding"))
+        encoding = next((name for name in ("br", "gzip")
+                         if name in accepted and name in asset.representations), None)
+        body, etag = asset.representations[encoding]
+
+        headers = {
+            "ETag": etag,
+            "Cache-Control": cache_control or asset.cache_control,
+            "Vary": "Accept-Encoding"
+        }
+        if_none_match = request.headers.get("If-None-Match", "")
+        if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+            return Response(status=304, headers=headers)
+
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(body, mimetype=asset.mimetype, headers=headers)
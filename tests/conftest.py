@@ -0,0 +1,6 @@
+"""Modules du projet importables depuis les tests (fichiers à la racine)"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+from admission import ACCEPT, BATCH, DEGRADE, INTERACTIVE, SHED, AdmissionController, queued_seconds
+
+
+@pytest.fixture
+def controller():
+    # Estimations figées : 10 ms par requête interactive, 1 ms par ligne de lot
+    controller = AdmissionController(latency_budget_ms=100, batch_budget_ms=1000,
+                                     batch_rows=10, max_batches=1, cache_size=0)
+    controller.interactive_seconds = 0.01
+    controller.row_seconds = 0.001
+    return controller
+
+
+def test_idle_interactive_request_is_accepted(controller):
+    ticket = controller.admit(1)
+    assert ticket.kind == INTERACTIVE
+    assert ticket.decision == ACCEPT
+    assert controller.counters["accepted"] == 1
+
+
+def test_pending_work_past_budget_degrades(controller):
+    pending = controller.admit(1)
+    pending.estimate = 0.095  # travail restant d'une requête en cours
+
+    ticket = controller.admit(1)
+    assert ticket.decision == DEGRADE
+    assert ticket.retry_after is None
+    assert pending in controller._in_flight and ticket in controller._in_flight
+
+
+def test_queue_wait_past_budget_sheds_interactive(controller):
+    ticket = controller.admit(1, queued=2.4)
+    assert ticket.decision == SHED
+    assert ticket.retry_after == 2
+    assert controller.counters["shed_interactive"] == 1
+    assert not controller._in_flight
+
+
+def test_batch_is_shed_beyond_max_batches(controller):
+    first = controller.admit(100)
+    assert first.kind == BATCH
+    assert first.decision == ACCEPT
+
+    second = controller.admit(100)
+    assert second.decision == SHED
+    assert second.retry_after >= 1
+    assert controller.counters["shed_batch"] == 1
+
+
+def test_batch_over_budget_is_shed_with_retry_after(controller):
+    ticket = controller.admit(2000)  # 10 ms + 2000 x 1 ms > 1 s
+    assert ticket.decision == SHED
+    assert ticket.retry_after == 2
+    assert not controller._in_flight
+
+
+def test_release_updates_estimate_and_in_flight(controller):
+    ticket = controller.admit(1)
+    ticket.started = time.perf_counter() - 0.11
+    controller.release(ticket)
+
+    assert not controller._in_flight
+    assert controller.interactive_seconds == pytest.approx(0.01 + 0.2 * (0.11 - 0.01), abs=0.005)
+
+
+def test_release_of_degraded_ticket_counts_rows(controller):
+    controller.admit(1).estimate = 0.095
+    ticket = controller.admit(1)
+    controller.release(ticket, degraded_rows={"cache": 1})
+
+    assert controller.counters["degraded"] == 1
+    assert controller.counters["degraded_rows_cache"] == 1
+    assert controller.interactive_seconds == 0.01
+
+
+@pytest.mark.parametrize("header", [
+    "t=1700000000.5",        # secondes
+    "t=1700000000500",       # millisecondes
+    "1700000000500000",      # microsecondes, sans préfixe
+])
+def test_queued_seconds_units(header):
+    assert queued_seconds(header, now=1700000001.0) == pytest.approx(0.5)
+
+
+@pytest.mark.parametrize("header", [None, "", "t=abc", "t=1700000002"])
+def test_queued_seconds_missing_invalid_or_future(header):
+    assert queued_seconds(header, now=1700000001.0) == 0.0
@@ -0,0 +1,69 @@
+"""Sortie anticipée : mêmes décisions que la forêt complète"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+
+import early_exit
+import segment_thresholds
+
+
+@pytest.fixture(scope="module")
+def forest_and_data():
+    X, y = make_classification(n_samples=600, n_features=6, n_informative=4, random_state=0)
+    X = pd.DataFrame(X, columns=[f"f{i}" for i in range(6)])
+    X["ProductID"] = np.arange(len(X)) % 3
+    forest = RandomForestClassifier(n_estimators=40, max_depth=6, random_state=0).fit(X, y)
+    return forest, X
+
+
+@pytest.mark.parametrize("threshold", [0.3, 0.5, 0.7])
+def test_certain_exit_matches_full_forest(forest_and_data, threshold):
+    forest, X = forest_and_data
+    fast = early_exit.EarlyExitForest(forest, threshold, margin=None, chunk_trees=5)
+
+    fraud, trees_used = fast.fraud_scores(X)
+    full = forest.predict_proba(X)[:, 1]
+
+    np.testing.assert_array_equal(fraud > threshold, full > threshold)
+    # Lignes évaluées jusqu'au bout : probabilité exacte
+    complete = trees_used == len(forest.estimators_)
+    np.testing.assert_allclose(fraud[complete], full[complete])
+    assert (trees_used < len(forest.estimators_)).any()
+
+
+def test_default_threshold_predict_matches_forest(forest_and_data):
+    forest, X = forest_and_data
+    fast = early_exit.EarlyExitForest(forest, 0.5, margin=None)
+
+    np.testing.assert_array_equal(fast.predict(X), forest.predict(X))
+    np.testing.assert_array_equal(fast.predict_proba(X, exact=True), forest.predict_proba(X))
+
+
+def test_segment_thresholds_match_full_forest(forest_and_data):
+    forest, X = forest_and_data
+    entry = {"columns": ["ProductID"], "values": [[0, 1, 2]],
+             "fraud": [0.2, None, 0.8, None], "review": [0.1, None, 0.4, None]}
+    table = segment_thresholds.ThresholdTable.compile(entry, {"fraud": 0.5, "review": 0.3})
+    fast = early_exit.EarlyExitForest(forest, 0.5, margin=None, chunk_trees=4, segments=table)
+
+    cuts = table.lookup(X)[0]
+    expected = forest.predict_proba(X)[:, 1] > cuts
+    np.testing.assert_array_equal(fast.predict(X) == 1, expected)
+
+
+def test_margin_trades_trees_for_approximation(forest_and_data):
+    forest, X = forest_and_data
+    certain = early_exit.EarlyExitForest(forest, 0.5, margin=None, chunk_trees=5)
+    approx = early_exit.EarlyExitForest(forest, 0.5, margin=0.2, chunk_trees=5)
+
+    assert approx.fraud_scores(X)[1].mean() <= certain.fraud_scores(X)[1].mean()
+    assert approx.stats()["rows"] == len(X)
+
+
+def test_supports_only_binary_forests(forest_and_data):
+    forest, _ = forest_and_data
+    assert early_exit.supports(forest)
+    assert not early_exit.supports(object())
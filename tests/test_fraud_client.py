@@ -0,0 +1,92 @@
+"""Client : lots regroupés, transaction refusée isolée, 429 et Retry-After"""
+
+import json
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from fraud_client import APIError, FraudClient
+
+
+class FakeAPI(BaseHTTPRequestHandler):
+    """/predict : 400 si une transaction porte "bad", 429 pour les `busy` premiers appels"""
+
+    protocol_version = "HTTP/1.1"
+    busy = 0
+    batches = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        FakeAPI.batches.append(len(body))
+        headers = {}
+        if FakeAPI.busy:
+            FakeAPI.busy -= 1
+            status, payload, headers = 429, {"error": "Lot hors budget"}, {"Retry-After": "1"}
+        elif any(transaction.get("bad") for transaction in body):
+            status, payload = 400, {"error": "Transaction invalide"}
+        else:
+            status, payload = 200, {"predictions": [{"value": t["value"]} for t in body]}
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def api_url():
+    FakeAPI.busy = 0
+    FakeAPI.batches = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_rejected_transaction_fails_only_its_caller(api_url):
+    with FraudClient(api_url, backoff=0.001) as client:
+        futures = [Future() for _ in range(8)]
+        # Un lot regroupé tel que le batcher l'envoie (il compte le lot en cours)
+        client._in_flight = 1
+        client._send_batch([({"value": i, "bad": i == 5}, future) for i, future in enumerate(futures)])
+
+        for i, future in enumerate(futures):
+            if i == 5:
+                with pytest.raises(APIError) as error:
+                    future.result(1)
+                assert error.value.status == 400
+            else:
+                assert future.result(1)["value"] == i
+        assert FakeAPI.batches[0] == 8
+        assert client.stats()["split_batches"] > 0
+
+
+def test_busy_response_is_retried_after_retry_after(api_url):
+    FakeAPI.busy = 1
+    with FraudClient(api_url, backoff=0.001) as client:
+        start = time.monotonic()
+        assert client.predict([{"value": 1}]) == [{"value": 1}]
+        assert time.monotonic() - start >= 0.9
+        assert client.stats()["retries"] == 1
+
+
+def test_concurrent_scores_are_coalesced(api_url):
+    with FraudClient(api_url, max_wait_ms=50) as client:
+        futures = [client.submit({"value": i}) for i in range(20)]
+        assert [future.result(5)["value"] for future in futures] == list(range(20))
+        assert len(FakeAPI.batches) < 20
+
+
+@pytest.mark.parametrize("value, expected", [("2", 2.0), ("-1", 0.0), ("999", 30.0), (None, 0.0),
+                                             ("Wed, 21 Oct 2015 07:28:00 GMT", 0.0)])
+def test_retry_after_parsing(value, expected):
+    assert FraudClient._retry_after_seconds(value) == expected
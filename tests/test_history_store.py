@@ -0,0 +1,77 @@
+"""Historique : curseurs (keyset), ordre et filtres des pages"""
+
+import json
+from datetime import datetime
+
+import pytest
+
+import history_store
+
+
+@pytest.fixture
+def history_db(tmp_path):
+    db_path = str(tmp_path / "history.db")
+    # Horodatages en double : l'ordre doit départager par identifiant
+    timestamps = [100.0, 100.0, 101.5, 102.0, 102.0, 102.0, 103.25]
+    bands = ["low", "high", "high", "medium", "high", "low", "high"]
+    rows = [(ts, 10.0 * i, 1 + i % 2, int(band == "high"), 0.1, band, "m.joblib", json.dumps({"i": i}))
+            for i, (ts, band) in enumerate(zip(timestamps, bands))]
+    conn = history_store._reader(db_path)
+    conn.executemany(history_store.HistorySink.insert_sql, rows)
+    conn.commit()
+    return db_path
+
+
+def all_pages(db_path, **filters):
+    ids, cursor, pages = [], None, 0
+    while True:
+        page = history_store.query(cursor=cursor, db_path=db_path, **filters)
+        ids.extend(item["id"] for item in page["items"])
+        pages += 1
+        if not page["has_more"]:
+            assert page["next_cursor"] is None
+            return ids, pages
+        cursor = page["next_cursor"]
+
+
+def test_cursor_round_trip():
+    cursor = history_store.encode_cursor(1729000000.123456, 42)
+    assert history_store.decode_cursor(cursor) == (1729000000.123456, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "abc", "1.5", "1.5_x", None])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        history_store.decode_cursor(cursor)
+
+
+def test_pages_cover_history_newest_first(history_db):
+    ids, pages = all_pages(history_db, limit=3)
+
+    conn = history_store._reader(history_db)
+    expected = [row["id"] for row in conn.execute("SELECT id FROM history ORDER BY scored_at DESC, id DESC")]
+    assert ids == expected
+    assert len(set(ids)) == 7
+    assert pages == 3
+
+
+def test_filtered_pages_keep_the_filter(history_db):
+    ids, _ = all_pages(history_db, risk_band="high", limit=2)
+
+    conn = history_store._reader(history_db)
+    expected = [row["id"] for row in conn.execute(
+        "SELECT id FROM history WHERE risk_band = 'high' ORDER BY scored_at DESC, id DESC")]
+    assert ids == expected == [7, 5, 3, 2]
+
+
+def test_time_window_excludes_end(history_db):
+    start = datetime.fromtimestamp(100.0).isoformat()
+    end = datetime.fromtimestamp(102.0).isoformat()
+    page = history_store.query(start=start, end=end, db_path=history_db)
+
+    assert [item["id"] for item in page["items"]] == [3, 2, 1]
+
+
+def test_unknown_risk_band_is_rejected(history_db):
+    with pytest.raises(ValueError):
+        history_store.query(risk_band="urgent", db_path=history_db)
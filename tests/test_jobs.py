@@ -0,0 +1,70 @@
+"""File de jobs : identifiants idempotents et baux de réservation"""
+
+import time
+
+import pytest
+
+import jobs
+
+
+@pytest.fixture
+def job_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOBS_DIR", str(tmp_path))
+    monkeypatch.setattr(jobs, "JOBS_DB_PATH", str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(jobs, "JOBS_PAYLOAD_DIR", str(tmp_path / "payloads"))
+    monkeypatch.setattr(jobs, "_schema_ready", False)
+    return tmp_path
+
+
+def test_idempotency_key_returns_the_same_job(job_db):
+    first = jobs.submit_records([{"a": 1}], idempotency_key="client-42")
+    again = jobs.submit_records([{"a": 2}], idempotency_key="client-42")
+    other = jobs.submit_records([{"a": 1}])
+
+    assert again["job_id"] == first["job_id"]
+    assert other["job_id"] != first["job_id"]
+
+
+def test_idempotency_key_is_validated(job_db):
+    with pytest.raises(ValueError):
+        jobs.submit_records([{"a": 1}], idempotency_key="x" * 201)
+
+
+def test_claimed_job_is_leased_to_one_owner(job_db):
+    job = jobs.submit_records([{"a": 1}])
+
+    claimed = jobs._claim_next_job("worker-a")
+    assert claimed["id"] == job["job_id"]
+    assert jobs._claim_next_job("worker-b") is None
+    assert jobs._update_job(job["job_id"], "worker-a", processed_rows=0)
+    assert not jobs._update_job(job["job_id"], "worker-b", processed_rows=0)
+
+
+def test_expired_lease_is_taken_over(job_db):
+    job = jobs.submit_records([{"a": 1}])
+    jobs._claim_next_job("worker-a")
+
+    # Bail expiré : le job est repris, l'ancien propriétaire ne peut plus écrire
+    conn = jobs._connect()
+    conn.execute("UPDATE jobs SET lease_expires = ? WHERE id = ?", (time.time() - 1, job["job_id"]))
+    conn.close()
+    assert jobs._claim_next_job("worker-b")["id"] == job["job_id"]
+    assert not jobs._save_chunk(job["job_id"], "worker-a", 0, [{"prediction": 0}])
+    assert jobs._save_chunk(job["job_id"], "worker-b", 0, [{"prediction": 1}], "model_v2.joblib")
+
+    status = jobs.get_job(job["job_id"])
+    assert status["processed_rows"] == 1
+    assert status["model_versions"] == ["model_v2.joblib"]
+    assert jobs.get_results(job["job_id"]) == [{"prediction": 1}]
+
+
+def test_results_are_paged_across_chunks(job_db, monkeypatch):
+    monkeypatch.setattr(jobs, "JOBS_CHUNK_SIZE", 2)
+    job = jobs.submit_records([{"a": i} for i in range(5)])
+    jobs._claim_next_job("worker-a")
+    for index in range(3):
+        rows = [{"row": i} for i in range(index * 2, min(index * 2 + 2, 5))]
+        assert jobs._save_chunk(job["job_id"], "worker-a", index, rows)
+
+    assert [r["row"] for r in jobs.get_results(job["job_id"])] == [0, 1, 2, 3, 4]
+    assert [r["row"] for r in jobs.get_results(job["job_id"], offset=1, limit=3)] == [1, 2, 3]
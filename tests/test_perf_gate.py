@@ -0,0 +1,91 @@
+import pytest
+
+import model_store
+import perf_gate
+from perf_gate import PerformanceRegression, check, compare
+
+REFERENCE = {
+    "load_seconds": 1.0,
+    "model_rss_mb": 100.0,
+    "single_row_p50_ms": 10.0,
+    "batch_1k_rows_per_second": 50000.0,
+    "batch_10k_rows_per_second": 80000.0,
+}
+
+
+def metrics(**changes):
+    return dict(REFERENCE, **changes)
+
+
+def test_identical_metrics_pass():
+    assert compare(metrics(), REFERENCE) == []
+
+
+def test_within_tolerance_passes():
+    assert compare(metrics(load_seconds=1.2, batch_1k_rows_per_second=40000.0), REFERENCE, 0.25) == []
+
+
+def test_lower_is_better_regression():
+    (regression,) = compare(metrics(single_row_p50_ms=15.0), REFERENCE, 0.25)
+    assert regression["metric"] == "single_row_p50_ms"
+    assert regression["change"] == 0.5
+
+
+def test_higher_is_better_regression():
+    (regression,) = compare(metrics(batch_10k_rows_per_second=40000.0), REFERENCE, 0.25)
+    assert regression["metric"] == "batch_10k_rows_per_second"
+    assert regression["change"] == -0.5
+
+
+def test_improvements_never_regress():
+    assert compare(metrics(load_seconds=0.1, batch_1k_rows_per_second=500000.0), REFERENCE, 0.25) == []
+
+
+def test_noise_floor_ignores_small_absolute_changes():
+    reference = metrics(load_seconds=0.01, model_rss_mb=2.0)
+    # +300 % mais sous le bruit de mesure (0.05 s, 5 Mo)
+    assert compare(metrics(load_seconds=0.04, model_rss_mb=6.0), reference, 0.25) == []
+
+
+def test_missing_metrics_are_skipped():
+    assert compare({"load_seconds": 10.0}, {"model_rss_mb": 100.0}) == []
+
+
+@pytest.fixture
+def unmeasured_reference(tmp_path, monkeypatch):
+    reference = tmp_path / "best_model_ref_20240101_000000.joblib"
+    reference.write_bytes(b"")
+
+    def measure(model_path, test_data_path):
+        if model_path == str(reference):
+            raise EOFError()
+        return dict(REFERENCE)
+
+    monkeypatch.setattr(perf_gate, "measure", measure)
+    monkeypatch.setattr(perf_gate, "REPORT_DIR", str(tmp_path / "reports"))
+    return str(reference)
+
+
+def test_unmeasured_reference_refuses_promotion(unmeasured_reference):
+    with pytest.raises(PerformanceRegression) as error:
+        check("candidate.joblib", "test_data.joblib", unmeasured_reference)
+    (regression,) = error.value.report["regressions"]
+    assert regression["metric"] == "reference"
+    assert regression["error"] == "EOFError()"
+
+
+def test_unmeasured_reference_can_be_allowed(unmeasured_reference):
+    report = check("candidate.joblib", "test_data.joblib", unmeasured_reference,
+                   allow_unmeasured_reference=True)
+    assert report["regressions"] == []
+    assert report["reference_error"] == "EOFError()"
+
+
+def test_latest_model_is_picked_by_timestamp(tmp_path):
+    for name in ("best_model_xgboost_20240101_000000.joblib",
+                 "best_model_random_forest_20240301_000000.joblib",
+                 "best_model_gradient_boosting_20240201_000000.joblib"):
+        (tmp_path / name).write_bytes(b"")
+
+    latest = model_store.latest_model_path(str(tmp_path))
+    assert latest.endswith("best_model_random_forest_20240301_000000.joblib")
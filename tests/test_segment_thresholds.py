@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import scoring
+import segment_thresholds
+from segment_thresholds import ThresholdTable
+
+GLOBAL = {"fraud": 0.5, "review": 0.3}
+
+# ProductID connus [1, 2], LargePurchase connus [0, 1] : table 3 x 3 (case "autre" en dernier)
+ENTRY = {
+    "columns": ["ProductID", "LargePurchase"],
+    "values": [[1, 2], [0, 1]],
+    "fraud": [0.6, 0.7, None, 0.8, None, None, None, None, None],
+    "review": [0.2, None, None, 0.4, None, None, None, None, None],
+}
+
+
+@pytest.fixture
+def table():
+    return ThresholdTable.compile(ENTRY, GLOBAL)
+
+
+def test_empty_cells_take_global_thresholds(table):
+    assert len(table) == 9
+    assert table.table[1].tolist() == [0.7, 0.3]
+    assert table.table[8].tolist() == [0.5, 0.3]
+    assert not np.isnan(table.table).any()
+
+
+def test_lookup_known_values(table):
+    df = pd.DataFrame({"ProductID": [1, 1, 2], "LargePurchase": [0, 1, 0]})
+    fraud, review = table.lookup(df)
+    assert fraud.tolist() == [0.6, 0.7, 0.8]
+    assert review.tolist() == [0.2, 0.3, 0.4]
+
+
+def test_lookup_unknown_and_missing_values_fall_back(table):
+    df = pd.DataFrame({"ProductID": [3, np.nan, 1, 2], "LargePurchase": [0, 0, np.nan, 7]})
+    fraud, review = table.lookup(df)
+    assert fraud.tolist() == [0.5, 0.5, 0.5, 0.5]
+    assert review.tolist() == [0.3, 0.3, 0.3, 0.3]
+
+
+def test_lookup_missing_column_falls_back(table):
+    fraud, review = table.lookup(pd.DataFrame({"ProductID": [1, 2]}))
+    assert fraud.tolist() == [0.5, 0.5]
+    assert review.tolist() == [0.3, 0.3]
+
+
+def test_lookup_non_numeric_column(table):
+    fraud, _ = table.lookup(pd.DataFrame({"ProductID": ["1", "W"], "LargePurchase": [0, 0]}))
+    assert fraud.tolist() == [0.6, 0.5]
+
+
+def test_fit_then_lookup_round_trip():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({"ProductID": np.repeat([1, 2], 100), "LargePurchase": np.tile([0, 1], 100)})
+    y = rng.random(200) < 0.2
+    y[:10] = True
+    scores = rng.random(200)
+
+    def choose(y_segment, scores_segment):
+        return 0.9, 0.1, {"rows": len(y_segment)}
+
+    entry = segment_thresholds.fit(X, y, scores, choose, columns=("ProductID", "LargePurchase", "Absent"),
+                                   min_rows=50, min_frauds=1)
+    assert entry["columns"] == ["ProductID", "LargePurchase"]
+
+    table = ThresholdTable.compile(entry, GLOBAL)
+    fraud, review = table.lookup(X)
+    assert set(fraud.tolist()) == {0.9}
+    assert set(review.tolist()) == {0.1}
+
+
+def test_resolve_thresholds_compiles_segments():
+    metadata = {"decision_thresholds": {"fraud": 0.55, "review": 0.25}, "segment_thresholds": ENTRY}
+    thresholds = scoring.resolve_thresholds(metadata)
+
+    assert thresholds == {"fraud": 0.55, "review": 0.25}
+    assert isinstance(thresholds.segments, ThresholdTable)
+    fraud, review = thresholds.segments.lookup(pd.DataFrame({"ProductID": [1, 9], "LargePurchase": [0, 0]}))
+    assert fraud.tolist() == [0.6, 0.55]
+    assert review.tolist() == [0.2, 0.25]
+
+
+def test_resolve_thresholds_without_segments():
+    assert getattr(scoring.resolve_thresholds({}), "segments", None) is None
@@ -0,0 +1,100 @@
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from shard_router import HashRing, ShardRouter, key_string
+
+NODES = [f"http://127.0.0.1:{8001 + i}" for i in range(4)]
+KEYS = [f"AccountNo:{i}" for i in range(5000)]
+
+
+@pytest.mark.parametrize("value", [12345, 12345.0, "12345", " 12345 "])
+def test_key_string_canonical_forms(value):
+    assert key_string(value) == "12345"
+
+
+def test_key_string_keeps_fractional_values():
+    assert key_string(12345.5) == "12345.5"
+
+
+def test_ring_is_deterministic():
+    first, second = HashRing(NODES), HashRing(list(NODES))
+    assert [first.node_for(key) for key in KEYS] == [second.node_for(key) for key in KEYS]
+    assert set(first.node_for(key) for key in KEYS) == set(NODES)
+
+
+def test_adding_a_node_moves_about_one_nth_of_keys():
+    before = HashRing(NODES)
+    after = HashRing(NODES + ["http://127.0.0.1:8005"])
+    moved = [key for key in KEYS if before.node_for(key) != after.node_for(key)]
+
+    # Seules les clés reprises par la nouvelle instance changent de place
+    assert all(after.node_for(key) == "http://127.0.0.1:8005" for key in moved)
+    assert 0.1 < len(moved) / len(KEYS) < 0.3
+
+
+def test_empty_ring_is_rejected():
+    with pytest.raises(ValueError):
+        HashRing([])
+
+
+def test_split_keeps_batch_order_and_groups_accounts():
+    router = ShardRouter(NODES)
+    try:
+        records = [{"AccountNo": i % 7, "TransactionAmt": i} for i in range(50)]
+        shards = router.split(records)
+
+        assert sorted(i for indices in shards.values() for i in indices) == list(range(50))
+        for indices in shards.values():
+            assert indices == sorted(indices)
+        for i, record in enumerate(records):
+            assert i in shards[router.shard_of({"AccountNo": float(record["AccountNo"])})]
+    finally:
+        router.close()
+
+
+class ShortAnswer(BaseHTTPRequestHandler):
+    """Instance qui répond 200 sans une prédiction par transaction"""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps({"predictions": []}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_invalid_shard_response_is_a_502():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ShortAnswer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    router = ShardRouter([f"http://127.0.0.1:{server.server_port}"])
+    try:
+        status, body = router.predict([{"AccountNo": 1}, {"AccountNo": 2}])
+        assert status == 502
+        assert "shard" in body
+        assert router.stats()["shards"][0]["errors"] == 1
+    finally:
+        router.close()
+        server.shutdown()
+        server.server_close()
+
+
+def test_unreachable_shard_is_a_502():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    router = ShardRouter([f"http://127.0.0.1:{port}"], timeout=1)
+    try:
+        status, body = router.predict({"AccountNo": 1})
+        assert status == 502
+        assert body["error"].startswith("Instance injoignable")
+    finally:
+        router.close()
@@ -0,0 +1,82 @@
+import math
+
+import numpy as np
+import pytest
+
+from traffic_capture import TrafficRecorder, capture_files, encode_request, read_capture, write_header
+
+FEATURES = ("TransactionAmt", "card1", "dist1")
+RECORDS = [
+    {"TransactionAmt": 12.5, "card1": 1000, "dist1": 3.0},
+    {"TransactionAmt": 99.0, "card1": None},
+]
+RESULTS = [
+    {"prediction": 1, "confidence": {"fraud": 0.75, "legitimate": 0.25}},
+    {"error": "échec du scoring"},
+]
+
+
+def write_capture(path, requests):
+    with open(path, 'wb') as f:
+        write_header(f, FEATURES, model_version="fraud_model_20240101_000000.pkl")
+        for timestamp, records, results in requests:
+            f.write(encode_request(timestamp, FEATURES, records, results))
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "capture.bin"
+    write_capture(path, [(1700000000.25, RECORDS, RESULTS), (1700000001.5, RECORDS[:1], RESULTS[:1])])
+
+    header, requests = read_capture(path)
+    assert header["features"] == list(FEATURES)
+    assert header["model_version"] == "fraud_model_20240101_000000.pkl"
+
+    requests = list(requests)
+    assert [timestamp for timestamp, *_ in requests] == [1700000000.25, 1700000001.5]
+
+    _, X, probabilities, predictions = requests[0]
+    assert X[0].tolist() == [12.5, 1000.0, 3.0]
+    assert X[1][0] == 99.0
+    assert math.isnan(X[1][1]) and math.isnan(X[1][2])
+    assert probabilities[0] == pytest.approx(0.75)
+    assert math.isnan(probabilities[1])
+    assert predictions.tolist() == [1, 255]
+    assert requests[1][1].shape == (1, 3)
+
+
+def test_truncated_last_request_is_ignored(tmp_path):
+    path = tmp_path / "capture.bin"
+    write_capture(path, [(1.0, RECORDS, RESULTS), (2.0, RECORDS, RESULTS)])
+    path.write_bytes(path.read_bytes()[:-7])
+
+    _, requests = read_capture(path)
+    assert [timestamp for timestamp, *_ in requests] == [1.0]
+
+
+def test_invalid_magic_is_rejected(tmp_path):
+    path = tmp_path / "capture.bin"
+    path.write_bytes(b"NOTATRAFFICFILE")
+    with pytest.raises(ValueError):
+        read_capture(path)
+
+
+def test_non_numeric_feature_is_rejected():
+    with pytest.raises(ValueError):
+        encode_request(0.0, FEATURES, [{"TransactionAmt": "beaucoup"}], [{}])
+
+
+def test_recorder_writes_readable_file(tmp_path):
+    recorder = TrafficRecorder(capture_dir=str(tmp_path), sample_rate=1.0).start()
+    assert recorder.record(RECORDS, RESULTS, FEATURES, model_version="m.pkl")
+    assert recorder.record([{"TransactionAmt": "x"}], [{}], FEATURES)
+    recorder.stop()
+
+    stats = recorder.stats()
+    assert stats["written"] == 1 and stats["skipped"] == 1 and stats["files"] == 1
+
+    (path,) = capture_files([str(tmp_path)])
+    header, requests = read_capture(path)
+    assert header["model_version"] == "m.pkl"
+    (_, X, _, predictions), = list(requests)
+    np.testing.assert_array_equal(X[0], [12.5, 1000.0, 3.0])
+    assert predictions.tolist() == [1, 255]
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Optimisation des seuils de décision sur les données de test sauvegardées
+
+Charge test_data_*.joblib, score le jeu une seule fois, puis balaie tous les
+seuils en un passage vectorisé : les probabilités sont réparties dans une
+grille (un seul np.bincount sur le couple case/classe) et les comptes TP/FP/FN de chaque seuil
+s'obtiennent par somme cumulée. Le coût est O(n) + O(résolution), sans tri.
+
+Les seuils retenus sont écrits dans model_metadata_*.json
+("decision_thresholds") et servis par l'API :
+  - fraud  : seuil de décision (prédiction "fraud" si probabilité > seuil)
+  - review : bande de risque modéré, au rappel cible
+
+Avec --segments, les mêmes seuils sont aussi calibrés par segment
+(TransactionCountry, ProductID, LargePurchase : voir segment_thresholds.py)
+et écrits dans "segment_thresholds".
+
+Usage:
+    python threshold_optimizer.py                       # maximise le F1
+    python threshold_optimizer.py --objective cost --cost-fp 1 --cost-fn 20
+    python threshold_optimizer.py --curves-out curves.csv --dry-run
+    python threshold_optimizer.py --segments            # seuils par segment en plus
+    python threshold_optimizer.py --source creditcarddata.csv     # jeu de test du cache préparé
+"""
+
+import os
+import sys
+import time
+import argparse
+import warnings
+from datetime import datetime
+
+import numpy as np
+
+import model_store
+
+DEFAULT_RESOLUTION = 1000
+
+
+def sweep_thresholds(y_true, scores, resolution=DEFAULT_RESOLUTION, cost_fp=1.0, cost_fn=1.0):
+    """Courbes précision / rappel / F1 / coût pour les seuils k/resolution
+
+    La règle de décision est "fraude si score > seuil", comme dans scoring.py.
+    """
+    y_true = np.asarray(y_true, dtype=bool)
+    scores = np.asarray(scores, dtype=np.float64)
+
+    # Case 0 : score <= 0 ; case k : score dans ((k-1)/R, k/R]
+    # La tolérance absorbe les erreurs d'arrondi (0.29 * 1000 = 290.00000000000006)
+    bins = scores * resolution
+    bins -= 1e-9
+    np.ceil(bins, out=bins)
+    np.clip(bins, 0, resolution, out=bins)
+
+    # Un seul bincount pour les deux classes : indice = 2 * case + label
+    keys = bins.astype(np.int64)
+    keys *= 2
+    keys += y_true
+    hist = np.bincount(keys, minlength=2 * (resolution + 1)).reshape(-1, 2)
+    neg_hist, pos_hist = hist[:, 0], hist[:, 1]
+
+    # Score > k/R  <=>  case >= k+1 : sommes cumulées depuis le haut de la grille
+    tp = np.concatenate([np.cumsum(pos_hist[::-1])[::-1][1:], [0]])
+    fp = np.concatenate([np.cumsum(neg_hist[::-1])[::-1][1:], [0]])
+    n_pos = int(y_true.sum())
+    n_neg = len(y_true) - n_pos
+    fn = n_pos - tp
+    tn = n_neg - fp
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 1.0)
+        recall = tp / n_pos if n_pos else np.zeros_like(tp, dtype=float)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+
+    return {
+        "threshold": np.arange(resolution + 1) / resolution,
+        "tp": tp, "fp": fp, "fn": fn, "tn": tn,
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "accuracy": (tp + tn) / len(y_true),
+        "cost": cost_fp * fp + cost_fn * fn
+    }
+
+
+def choose_thresholds(curves, objective="f1", review_recall=0.99):
+    """Seuil de fraude optimal et seuil de revue au rappel cible"""
+    if objective == "cost":
+        # À coût égal, préférer le seuil le plus haut (moins d'alertes)
+        fraud_index = len(curves["cost"]) - 1 - int(np.argmin(curves["cost"][::-1]))
+    else:
+        fraud_index = int(np.argmax(curves["f1"]))
+
+    # Plus haut seuil atteignant le rappel cible, sans dépasser le seuil de fraude
+    eligible = np.flatnonzero(curves["recall"][:fraud_index + 1] >= review_recall)
+    review_index = int(eligible[-1]) if len(eligible) else 0
+
+    return fraud_index, review_index
+
+
+def _metrics_at(curves, index):
+    return {key: round(float(curves[key][index]), 6)
+            for key in ("threshold", "precision", "recall", "f1", "accuracy", "cost")}
+
+
+def write_curves(curves, path):
+    """Exporter les courbes en CSV"""
+    keys = ["threshold", "tp", "fp", "fn", "tn", "precision", "recall", "f1", "accuracy", "cost"]
+    table = np.column_stack([curves[key] for key in keys])
+    np.savetxt(path, table, delimiter=",", header=",".join(keys), comments="", fmt="%.6g")
+
+
+def fit_segments(X_test, y_test, scores, args):
+    """Seuils par segment avec le même objectif que les seuils globaux (None si impossible)"""
+    import segment_thresholds
+
+    def choose(y_segment, scores_segment):
+        curves = sweep_thresholds(y_segment, scores_segment, args.resolution, args.cost_fp, args.cost_fn)
+        fraud_index, review_index = choose_thresholds(curves, args.objective, args.review_recall)
+        metrics = _metrics_at(curves, fraud_index)
+        return metrics["threshold"], _metrics_at(curves, review_index)["threshold"], metrics
+
+    try:
+        entry = segment_thresholds.fit(X_test, y_test.to_numpy(), scores, choose)
+    except ValueError as e:
+        print(f" ❌ {e}")
+        return None
+
+    print(f"\n  Seuils par segment ({', '.join(entry['columns'])}) :")
+    print(f"  {'Segment':<34}{'Lignes':>8}{'Fraudes':>9}{'Fraude':>9}{'Revue':>8}")
+    for segment in entry["segments"]:
+        label = ", ".join(f"{value:g}" if value is not None else "autre"
+                          for value in segment["values"].values())
+        if "fallback" in segment:
+            cuts = f"{'global':>17}"
+        else:
+            cuts = f"{segment['fraud']:>9.3f}{segment['review']:>8.3f}"
+        print(f"  {label:<34}{segment['rows']:>8}{segment['frauds']:>9}{cuts}")
+    calibrated = sum("fallback" not in segment for segment in entry["segments"])
+    print(f"  {calibrated}/{len(entry['segments'])} segment(s) calibré(s), "
+          f"les autres gardent les seuils globaux")
+    return entry
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Optimisation des seuils de décision")
+    parser.add_argument("--model", help="Chemin du modèle (défaut: le plus récent)")
+    parser.add_argument("--test-data", help="Chemin des données de test (défaut: celles du modèle)")
+    parser.add_argument("--source", help="CSV source : jeu de test pris dans le cache préparé")
+    parser.add_argument("--objective", choices=["f1", "cost"], default="f1")
+    parser.add_argument("--cost-fp", type=float, default=1.0, help="Coût d'une fausse alerte")
+    parser.add_argument("--cost-fn", type=float, default=10.0, help="Coût d'une fraude manquée")
+    parser.add_argument("--review-recall", type=float, default=0.99,
+                        help="Rappel visé par la bande de risque modéré")
+    parser.add_argument("--resolution", type=int, default=DEFAULT_RESOLUTION)
+    parser.add_argument("--curves-out", help="Fichier CSV des courbes")
+    parser.add_argument("--segments", action="store_true",
+                        help="Calibrer aussi des seuils par segment (segment_thresholds.py)")
+    parser.add_argument("--dry-run", action="store_true", help="Ne pas modifier les métadonnées")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings('ignore')
+    print("🎯 OPTIMISATION DES SEUILS DE DÉCISION")
+    print("=" * 50)
+
+    model_path = args.model or model_store.latest_model_path()
+    if model_path is None:
+        print(" ❌ Aucun modèle trouvé")
+        return 1
+    test_data_path = args.test_data or model_store.test_data_path_for(model_path) \
+        or model_store.latest_test_data_path()
+
+    model = model_store.load_model(model_path)
+    if args.source:
+        import dataset_cache
+
+        dataset = dataset_cache.get_dataset(args.source)
+        X_test, y_test = dataset.test_set()
+        test_data_name = f"{os.path.basename(args.source)} (cache {dataset.source_sha256[:16]})"
+    else:
+        test_data = model_store.load_test_data(test_data_path)
+        X_test, y_test = test_data['X_test'], test_data['y_test']
+        test_data_name = os.path.basename(test_data_path)
+    print(f"  Modèle: {os.path.basename(model_path)}")
+    print(f"  Données de test: {test_data_name} ({len(y_test)} lignes)")
+
+    # Scorer une seule fois
+    if hasattr(model, 'feature_names_in_'):
+        X_test = X_test[list(model.feature_names_in_)]
+    scores = model.predict_proba(X_test)[:, 1]
+
+    start = time.perf_counter()
+    curves = sweep_thresholds(y_test.to_numpy(), scores, args.resolution,
+                              args.cost_fp, args.cost_fn)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"  Balayage de {args.resolution + 1} seuils en {elapsed_ms:.2f} ms")
+
+    fraud_index, review_index = choose_thresholds(curves, args.objective, args.review_recall)
+    default_index = args.resolution // 2
+    fraud_metrics = _metrics_at(curves, fraud_index)
+    review_metrics = _metrics_at(curves, review_index)
+
+    print(f"\n  {'':<18}{'Seuil':>8}{'Précision':>11}{'Rappel':>9}{'F1':>8}{'Coût':>10}")
+    for label, metrics in [("Défaut (0.5)", _metrics_at(curves, default_index)),
+                           (f"Fraude ({args.objective})", fraud_metrics),
+                           ("Revue", review_metrics)]:
+        print(f"  {label:<18}{metrics['threshold']:>8.3f}{metrics['precision']:>11.4f}"
+              f"{metrics['recall']:>9.4f}{metrics['f1']:>8.4f}{metrics['cost']:>10.0f}")
+
+    segment_entry = None
+    if args.segments:
+        segment_entry = fit_segments(X_test, y_test, scores, args)
+        if segment_entry is None:
+            return 1
+
+    if args.curves_out:
+        write_curves(curves, args.curves_out)
+        print(f"\n ✅ Courbes exportées: {args.curves_out}")
+
+    if args.dry_run:
+        print("\n  Mode --dry-run : métadonnées inchangées")
+        return 0
+
+    metadata_path = model_store.metadata_path_for(model_path)
+    if metadata_path is None:
+        print(" ❌ Aucune métadonnée associée au modèle")
+        return 1
+
+    metadata = model_store.load_metadata(metadata_path)
+    metadata["decision_thresholds"] = {
+        "fraud": fraud_metrics["threshold"],
+        "review": review_metrics["threshold"],
+        "objective": args.objective,
+        "cost_fp": args.cost_fp,
+        "cost_fn": args.cost_fn,
+        "review_recall_target": args.review_recall,
+        "metrics_at_fraud": fraud_metrics,
+        "metrics_at_review": review_metrics,
+        "test_data": test_data_name,
+        "computed_at": datetime.now().isoformat()
+    }
+    if segment_entry is not None:
+        metadata["segment_thresholds"] = dict(segment_entry, objective=args.objective,
+                                              test_data=test_data_name)
+    model_store.save_metadata(metadata, metadata_path)
+    print(f"\n ✅ Seuils écrits dans: {os.path.basename(metadata_path)}")
+    print("  Redémarrez l'API pour servir les nouveaux seuils")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Capture échantillonnée du trafic de /predict dans un journal binaire compact
+
+Activée par TRAFFIC_CAPTURE_ENABLED=1. Une fraction des requêtes
+(TRAFFIC_CAPTURE_SAMPLE_RATE) est déposée dans une file mémoire bornée ; un
+thread d'arrière-plan les encode et les ajoute au fichier courant de
+traffic/ (un fichier par processus, nouveau fichier au-delà de
+TRAFFIC_CAPTURE_MAX_MB). Comme pour le journal d'audit, une file pleine
+fait perdre (et compter) l'échantillon plutôt que de bloquer /predict.
+
+Format d'un fichier capture_<horodatage>_<pid>_<n>.bin :
+    MAGIC (8 octets) | longueur de l'en-tête (uint32) | en-tête JSON
+    puis, par requête :
+    horodatage (float64) | lignes n (uint32)
+    | features n x f (float64, ordre de l'en-tête, NaN si absente)
+    | probabilité de fraude servie n (float32, NaN si absente)
+    | décision servie n (uint8, 255 si absente)
+
+Les requêtes sont rejouées à l'identique (mêmes lots) par traffic_replay.py.
+"""
+
+import os
+import json
+import time
+import queue
+import atexit
+import random
+import struct
+import threading
+from datetime import datetime
+
+import model_store
+
+# Configuration (surchargeable par variables d'environnement)
+CAPTURE_ENABLED = os.environ.get('TRAFFIC_CAPTURE_ENABLED', '0') == '1'
+CAPTURE_DIR = os.environ.get('TRAFFIC_CAPTURE_DIR', os.path.join(model_store.BASE_DIR, "traffic"))
+CAPTURE_SAMPLE_RATE = float(os.environ.get('TRAFFIC_CAPTURE_SAMPLE_RATE', 0.1))
+CAPTURE_MAX_MB = float(os.environ.get('TRAFFIC_CAPTURE_MAX_MB', 256))
+CAPTURE_QUEUE_SIZE = int(os.environ.get('TRAFFIC_CAPTURE_QUEUE_SIZE', 1000))
+
+MAGIC = b"FRDTRAF1"
+FORMAT_VERSION = 1
+_HEADER_LENGTH = struct.Struct("<I")
+_REQUEST = struct.Struct("<dI")
+
+
+def encode_request(timestamp, features, records, results):
+    """Octets d'une requête ; ValueError si une feature n'est pas numérique"""
+    import numpy as np
+
+    nan = float("nan")
+    try:
+        X = np.array([[nan if record.get(name) is None else record[name] for name in features]
+                      for record in records], dtype=np.float64)
+    except (TypeError, ValueError, AttributeError) as e:
+        raise ValueError(f"Requête non capturable: {e}")
+    probabilities = np.array([result["confidence"]["fraud"] if "confidence" in result else nan
+                              for result in results], dtype=np.float32)
+    predictions = np.array([result.get("prediction", 255) for result in results], dtype=np.uint8)
+    return _REQUEST.pack(timestamp, len(records)) + X.reshape(len(records), len(features)).tobytes() \
+        + probabilities.tobytes() + predictions.tobytes()
+
+
+def write_header(f, features, model_version=None):
+    header = json.dumps({
+        "version": FORMAT_VERSION,
+        "features": list(features),
+        "model_version": model_version,
+        "created_at": datetime.now().isoformat(),
+        "pid": os.getpid()
+    }).encode()
+    f.write(MAGIC + _HEADER_LENGTH.pack(len(header)) + header)
+
+
+def read_capture(path):
+    """En-tête et générateur de (horodatage, X, probabilités, décisions servies) d'un fichier
+
+    Une dernière requête tronquée (arrêt brutal pendant l'écriture) est ignorée.
+    """
+    import numpy as np
+
+    f = open(path, 'rb')
+    if f.read(len(MAGIC)) != MAGIC:
+        f.close()
+        raise ValueError(f"Fichier de capture invalide: {path}")
+    (length,) = _HEADER_LENGTH.unpack(f.read(_HEADER_LENGTH.size))
+    header = json.loads(f.read(length))
+    n_features = len(header["features"])
+
+    def requests():
+        with f:
+            while True:
+                prefix = f.read(_REQUEST.size)
+                if len(prefix) < _REQUEST.size:
+                    return
+                timestamp, n_rows = _REQUEST.unpack(prefix)
+                size = n_rows * (n_features * 8 + 5)
+                body = f.read(size)
+                if len(body) < size:
+                    return
+                offset = n_rows * n_features * 8
+                X = np.frombuffer(body, dtype=np.float64, count=n_rows * n_features).reshape(n_rows, n_features)
+                probabilities = np.frombuffer(body, dtype=np.float32, count=n_rows, offset=offset)
+                predictions = np.frombuffer(body, dtype=np.uint8, count=n_rows, offset=offset + n_rows * 4)
+                yield timestamp, X, probabilities, predictions
+
+    return header, requests()
+
+
+def capture_files(paths):
+    """Fichiers de capture désignés par des chemins de fichiers ou de dossiers"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.startswith("capture_") and name.endswith(".bin"))
+        else:
+            files.append(path)
+    return files
+
+
+class TrafficRecorder:
+    """File mémoire + thread d'écriture des requêtes échantillonnées"""
+
+    def __init__(self, capture_dir=CAPTURE_DIR, sample_rate=CAPTURE_SAMPLE_RATE,
+                 max_mb=CAPTURE_MAX_MB, queue_size=CAPTURE_QUEUE_SIZE):
+        self.capture_dir = capture_dir
+        self.sample_rate = sample_rate
+        self.max_bytes = int(max_mb * 1024 * 1024)
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._file = None
+        self._features = None
+
+        self.sampled = 0
+        self.written = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.files = 0
+        self.bytes_written = 0
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        """Arrêter le thread après avoir vidé la file"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def record(self, records, results, features, model_version=None):
+        """Échantillonner une requête scorée (non bloquant)"""
+        if random.random() >= self.sample_rate:
+            return False
+        item = (time.time(), tuple(features), model_version, records, results)
+        try:
+            self._queue.put_nowait(item)
+            accepted = True
+        except queue.Full:
+            accepted = False
+        with self._lock:
+            if accepted:
+                self.sampled += 1
+            else:
+                self.dropped += 1
+        return accepted
+
+    def _open(self, features, model_version):
+        if self._file is not None:
+            self._file.close()
+        os.makedirs(self.capture_dir, exist_ok=True)
+        name = f"capture_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{self.files}.bin"
+        self._file = open(os.path.join(self.capture_dir, name), 'ab')
+        write_header(self._file, features, model_version)
+        self._features = features
+        self.files += 1
+
+    def _run(self):
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=0.5)
+                except queue.Empty:
+                    if self._stop.is_set():
+                        break
+                    continue
+                self._write(*item)
+        finally:
+            if self._file is not None:
+                self._file.close()
+
+    def _write(self, timestamp, features, model_version, records, results):
+        try:
+            data = encode_request(timestamp, features, records, results)
+        except ValueError:
+            with self._lock:
+                self.skipped += 1
+            return
+
+        # Nouveau fichier : premier échantillon, changement de schéma ou taille maximale
+        if self._file is None or features != self._features or self._file.tell() >= self.max_bytes:
+            self._open(features, model_version)
+        self._file.write(data)
+        if self._queue.empty():
+            self._file.flush()
+        with self._lock:
+            self.written += 1
+            self.bytes_written += len(data)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": True,
+                "sample_rate": self.sample_rate,
+                "sampled": self.sampled,
+                "written": self.written,
+                "dropped": self.dropped,
+                "skipped": self.skipped,
+                "files": self.files,
+                "bytes_written": self.bytes_written
+            }
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_recorder():
+    """Enregistreur partagé du processus (None si la capture est désactivée)"""
+    global _recorder
+    if not CAPTURE_ENABLED:
+        return None
+    with _recorder_lock:
+        if _recorder is None:
+            _recorder = TrafficRecorder().start()
+            atexit.register(_recorder.stop)
+    return _recorder
+
+
+def record(records, results, features, model_version=None):
+    """Raccourci : échantillonner une requête si la capture est activée"""
+    recorder = get_recorder()
+    if recorder is not None:
+        recorder.record(records, results, features, model_version)
+
+
+def stats():
+    recorder = get_recorder()
+    return recorder.stats() if recorder is not None else {"enabled": False}
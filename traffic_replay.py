@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Rejeu du trafic capturé (traffic_capture.py) sur des versions de modèle
+
+Chaque requête capturée est rejouée telle quelle (même lot, même ordre)
+sur chaque modèle, à pleine vitesse et en parallèle : les requêtes sont
+réparties en tranches contiguës sur un pool de processus. Pour chaque
+modèle, le rapport donne :
+  - le débit (lignes/s, requêtes/s) et la distribution de latence par requête ;
+  - la part de fraudes décidées (seuils de ses métadonnées, par segment
+    comme scoring.score_frame s'il en a) ;
+  - les décisions qui changent par rapport au premier modèle et par rapport
+    aux décisions servies en production au moment de la capture.
+
+Usage:
+    python traffic_replay.py traffic/
+    python traffic_replay.py traffic/ --model saved_models/best_model_A.joblib \\
+                                      --model saved_models/best_model_B.joblib --workers 4
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import warnings
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+import model_store
+import scoring
+import traffic_capture
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+PERCENTILES = (50, 95, 99)
+# Attente maximale du démarrage de tous les workers (secondes)
+POOL_START_TIMEOUT = 600
+
+_worker_requests = None
+_worker_features = None
+_worker_models = {}
+_worker_barrier = None
+
+
+def load_requests(paths):
+    """Features, requêtes (matrices X) et décisions servies de tous les fichiers"""
+    features = None
+    requests, served = [], []
+    for path in traffic_capture.capture_files(paths):
+        header, file_requests = traffic_capture.read_capture(path)
+        if features is None:
+            features = header["features"]
+        elif header["features"] != features:
+            raise ValueError(f"Schéma différent dans {os.path.basename(path)}")
+        for _, X, _, predictions in file_requests:
+            requests.append(X)
+            served.append(predictions)
+    return features, requests, served
+
+
+def _init_worker(paths, model_paths, barrier):
+    """Charger la capture et les modèles une seule fois par processus du pool"""
+    global _worker_requests, _worker_features, _worker_barrier
+    warnings.filterwarnings('ignore')
+    _worker_features, _worker_requests, _ = load_requests(paths)
+    for model_path in model_paths:
+        _worker_models[model_path] = model_store.load_model(model_path)
+    _worker_barrier = barrier
+
+
+def _wait_started(_):
+    """Tâche de démarrage : bloque jusqu'à ce que tous les workers l'exécutent"""
+    _worker_barrier.wait(POOL_START_TIMEOUT)
+    return os.getpid()
+
+
+def _replay_shard(model_path, start, end):
+    """Rejouer les requêtes [start, end) : probabilités de fraude et latences"""
+    import pandas as pd
+
+    model = _worker_models[model_path]
+    columns = list(getattr(model, 'feature_names_in_', _worker_features))
+
+    probabilities, latencies = [], []
+    for X in _worker_requests[start:end]:
+        df = pd.DataFrame(X, columns=_worker_features)[columns]
+        request_start = time.perf_counter()
+        proba = model.predict_proba(df)
+        latencies.append(time.perf_counter() - request_start)
+        probabilities.append(proba[:, 1])
+    return (np.concatenate(probabilities) if probabilities else np.empty(0),
+            np.asarray(latencies))
+
+
+def fraud_cutoffs(thresholds, features, requests):
+    """Seuil de fraude de chaque ligne rejouée : table par segment, sinon seuil global"""
+    if thresholds.segments is None:
+        return thresholds["fraud"]
+    import pandas as pd
+
+    X = pd.DataFrame(np.concatenate(requests), columns=features)
+    return thresholds.segments.lookup(X)[0]
+
+
+def shards(n_requests, n_workers):
+    """Tranches contiguës de requêtes, plusieurs par worker pour équilibrer la charge"""
+    bounds = np.linspace(0, n_requests, min(n_requests, n_workers * 4) + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def decision_diff(decisions, reference, valid=None):
+    """Décisions qui changent par rapport à une référence (lignes `valid` seulement)"""
+    if valid is not None:
+        decisions, reference = decisions[valid], reference[valid]
+    changed = decisions != reference
+    return {
+        "compared": int(len(decisions)),
+        "changed": int(changed.sum()),
+        "legit_to_fraud": int((decisions & ~reference).sum()),
+        "fraud_to_legit": int((~decisions & reference).sum()),
+        "changed_rate": round(float(changed.mean()), 6) if len(decisions) else None
+    }
+
+
+def replay(paths, model_paths, workers=DEFAULT_WORKERS, verbose=True):
+    """Rapport de rejeu de la capture sur chaque modèle (le premier sert de référence)"""
+    features, requests, served = load_requests(paths)
+    if not requests:
+        raise ValueError("Aucune requête capturée")
+    n_rows = sum(len(X) for X in requests)
+    served = np.concatenate(served)
+    # 255 : décision absente de la réponse servie
+    served_valid = served != 255
+    served = served == 1
+    if verbose:
+        print(f"  Capture: {len(requests):,} requêtes, {n_rows:,} lignes, {len(features)} features")
+        print(f"  Workers: {workers}\n")
+
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "captures": traffic_capture.capture_files(paths),
+        "requests": len(requests),
+        "rows": n_rows,
+        "workers": workers,
+        "models": []
+    }
+    baseline = None
+    tasks = shards(len(requests), workers)
+    context = multiprocessing.get_context("spawn")
+    # La barrière ne peut être transmise qu'au démarrage des processus (initargs)
+    barrier = context.Barrier(workers)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(list(paths), list(model_paths), barrier)) as pool:
+        # Démarrer tous les workers (capture et modèles chargés) avant la mesure : aucune
+        # tâche ne se termine avant que tous l'exécutent, chaque soumission démarre un processus
+        started = set(pool.map(_wait_started, range(workers)))
+        if len(started) != workers:
+            raise RuntimeError(f"{len(started)}/{workers} workers démarrés")
+
+        for model_path in model_paths:
+            metadata_path = model_store.metadata_path_for(model_path)
+            thresholds = scoring.resolve_thresholds(
+                model_store.load_metadata(metadata_path) if metadata_path else None)
+
+            start = time.perf_counter()
+            results = list(pool.map(_replay_shard, [model_path] * len(tasks),
+                                    [a for a, _ in tasks], [b for _, b in tasks]))
+            wall = time.perf_counter() - start
+
+            probabilities = np.concatenate([proba for proba, _ in results])
+            latencies = np.concatenate([latency for _, latency in results]) * 1000
+            # Même règle de décision que /predict, y compris les seuils par segment
+            decisions = probabilities > fraud_cutoffs(thresholds, features, requests)
+            entry = {
+                "model": os.path.basename(model_path),
+                "thresholds": thresholds,
+                "wall_seconds": round(wall, 3),
+                "rows_per_second": round(n_rows / wall, 1),
+                "requests_per_second": round(len(requests) / wall, 1),
+                "latency_ms": {f"p{p}": round(float(np.percentile(latencies, p)), 3) for p in PERCENTILES},
+                "fraud_rate": round(float(decisions.mean()), 6),
+                "vs_production": decision_diff(decisions, served, served_valid)
+            }
+            entry["latency_ms"]["max"] = round(float(latencies.max()), 3)
+            if baseline is None:
+                baseline = (decisions, probabilities)
+            else:
+                entry["vs_baseline"] = decision_diff(decisions, baseline[0])
+                entry["vs_baseline"]["max_probability_delta"] = round(
+                    float(np.abs(probabilities - baseline[1]).max()), 6)
+            report["models"].append(entry)
+
+            if verbose:
+                latency = entry["latency_ms"]
+                print(f"  {entry['model']}")
+                print(f"    Débit: {entry['rows_per_second']:,.0f} lignes/s "
+                      f"({entry['requests_per_second']:,.0f} requêtes/s)")
+                print(f"    Latence (ms): p50 {latency['p50']:.2f} | p95 {latency['p95']:.2f} | "
+                      f"p99 {latency['p99']:.2f} | max {latency['max']:.2f}")
+                print(f"    Fraudes: {entry['fraud_rate']:.2%} | vs production: "
+                      f"{entry['vs_production']['changed']:,} décision(s) changée(s)")
+                if "vs_baseline" in entry:
+                    diff = entry["vs_baseline"]
+                    print(f"    vs {report['models'][0]['model']}: {diff['changed']:,} changée(s) "
+                          f"(+{diff['legit_to_fraud']:,} fraudes, -{diff['fraud_to_legit']:,})")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rejeu du trafic capturé sur des versions de modèle")
+    parser.add_argument("captures", nargs="*", default=[traffic_capture.CAPTURE_DIR],
+                        help="Fichiers ou dossiers de capture (défaut: traffic/)")
+    parser.add_argument("--model", action="append", dest="models",
+                        help="Modèle à rejouer (répétable ; défaut: le plus récent)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Processus parallèles")
+    parser.add_argument("--output", help="Rapport JSON")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings('ignore')
+    print("🔁 REJEU DU TRAFIC CAPTURÉ")
+    print("=" * 50)
+
+    model_paths = args.models or [model_store.latest_model_path()]
+    missing = [path for path in model_paths if not path or not os.path.exists(path)]
+    if missing:
+        print(f" ❌ Modèle introuvable: {', '.join(str(path) for path in missing)}")
+        return 1
+
+    try:
+        report = replay(args.captures, model_paths, max(1, args.workers))
+    except (OSError, ValueError) as e:
+        print(f" ❌ {e}")
+        return 1
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n ✅ Rapport: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
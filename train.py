@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Entraînement des modèles candidats hors notebook
+
+Reprend les tâches 4 à 9 du notebook sur le jeu préparé en cache
+(dataset_cache.py) : entraînement des six modèles, validation croisée,
+sélection du meilleur F1 et sauvegarde dans saved_models/ (modèle,
+métadonnées et données de test, mêmes noms de fichiers que le notebook).
+
+Deux stratégies de rééquilibrage des classes :
+  - upsample : sur-échantillonnage de la classe minoritaire avant la division,
+    comme le notebook (les lignes dupliquées sont matérialisées à l'entraînement) ;
+  - weights  : lignes uniques, classes pondérées (class_weight="balanced",
+    priors égaux pour Naive Bayes), sans aucune copie de ligne.
+
+Usage:
+    python train.py --source creditcarddata.csv
+    python train.py --source creditcarddata.csv --balancing weights
+    python train.py --source creditcarddata.csv --models forest,nb --dry-run
+"""
+
+import os
+import sys
+import time
+import argparse
+import warnings
+from datetime import datetime
+
+import numpy as np
+
+import data_prep
+import model_store
+import perf_gate
+
+BALANCING_STRATEGIES = ("upsample", "weights")
+DEFAULT_BALANCING = "upsample"
+CV_FOLDS = 5
+RANDOM_STATE = 42
+
+# Clé courte -> nom affiché (celui du notebook et des fichiers sauvegardés)
+MODEL_NAMES = {
+    "logreg": "Régression Logistique",
+    "tree": "Arbre de Décision",
+    "forest": "Forêt Aléatoire",
+    "svm": "SVM",
+    "nb": "Naive Bayes",
+    "knn": "k-NN",
+}
+
+
+def candidate_models(balancing=DEFAULT_BALANCING, keys=None):
+    """Modèles du notebook, pondérés si balancing == "weights"
+
+    k-NN n'accepte ni poids de classe ni poids d'échantillon : il est
+    entraîné sans rééquilibrage dans le mode "weights".
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.naive_bayes import GaussianNB
+    from sklearn.neighbors import KNeighborsClassifier
+    from sklearn.svm import SVC
+    from sklearn.tree import DecisionTreeClassifier
+
+    class_weight = "balanced" if balancing == "weights" else None
+    # Pour Naive Bayes, des poids de classe équilibrés reviennent à des priors égaux
+    priors = [0.5, 0.5] if balancing == "weights" else None
+
+    factories = {
+        "logreg": lambda: LogisticRegression(random_state=RANDOM_STATE, max_iter=1000,
+                                             class_weight=class_weight),
+        "tree": lambda: DecisionTreeClassifier(random_state=RANDOM_STATE, class_weight=class_weight),
+        "forest": lambda: RandomForestClassifier(random_state=RANDOM_STATE, n_estimators=100,
+                                                 class_weight=class_weight),
+        "svm": lambda: SVC(random_state=RANDOM_STATE, probability=True, class_weight=class_weight),
+        "nb": lambda: GaussianNB(priors=priors),
+        "knn": lambda: KNeighborsClassifier(n_neighbors=5),
+    }
+    keys = keys or list(MODEL_NAMES)
+    return {MODEL_NAMES[key]: factories[key]() for key in keys}
+
+
+def split_balance(balancing):
+    """Division du cache utilisée par une stratégie de rééquilibrage"""
+    return "upsample" if balancing == "upsample" else "none"
+
+
+def load_split(source, balancing=DEFAULT_BALANCING):
+    """X_train, X_test, y_train, y_test et le jeu en cache"""
+    import dataset_cache
+
+    dataset = dataset_cache.get_dataset(source)
+    return dataset.train_test(split_balance(balancing)), dataset
+
+
+def fit_candidates(models, X_train, y_train, X_test, y_test, cv=CV_FOLDS, verbose=True,
+                   cv_cache=None, data_hash=None):
+    """Entraîner, valider et tester chaque modèle (résultats au format du notebook)
+
+    cv_cache : CrossValidationCache (cv_cache.py) pour ne recalculer que les
+    validations croisées des modèles ou données modifiés.
+    """
+    from sklearn.metrics import accuracy_score, f1_score
+    from sklearn.model_selection import cross_val_score
+
+    results = {}
+    for name, model in models.items():
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+
+        y_pred = model.predict(X_test)
+        if not cv:
+            cv_scores = np.array([np.nan])
+        elif cv_cache is not None:
+            cv_scores = cv_cache.cross_val_score(model, X_train, y_train, cv=cv,
+                                                 data_hash=data_hash, seed=RANDOM_STATE)
+        else:
+            cv_scores = cross_val_score(model, X_train, y_train, cv=cv)
+        results[name] = {
+            'model': model,
+            'accuracy': accuracy_score(y_test, y_pred),
+            'f1_score': f1_score(y_test, y_pred),
+            'cv_mean': cv_scores.mean(),
+            'cv_std': cv_scores.std(),
+            'fit_seconds': fit_seconds,
+            'predictions': y_pred
+        }
+        if verbose:
+            print(f"  {name:<24} F1: {results[name]['f1_score']:.4f} | "
+                  f"Accuracy: {results[name]['accuracy']:.4f} | "
+                  f"CV: {results[name]['cv_mean']:.4f} (+/- {results[name]['cv_std'] * 2:.4f}) | "
+                  f"fit: {fit_seconds:.2f}s")
+    return results
+
+
+def balancing_info(balancing, y_train):
+    """Stratégie de rééquilibrage enregistrée dans les métadonnées"""
+    labels, counts = np.unique(np.asarray(y_train), return_counts=True)
+    info = {
+        "strategy": balancing,
+        "train_class_counts": {str(label): int(count) for label, count in zip(labels, counts)},
+    }
+    if balancing == "weights":
+        info["class_weight"] = "balanced"
+        info["unweighted_models"] = [MODEL_NAMES["knn"]]
+    else:
+        info["method"] = "resample(minority, replace=True, random_state=42) avant la division"
+    return info
+
+
+def save_best(results, X_train, X_test, y_test, extra_metadata=None, save_dir=model_store.MODEL_DIR,
+              check_performance=None):
+    """Sauvegarder le meilleur modèle (F1) comme la tâche 9 du notebook
+
+    Le coût de service est mesuré avant la promotion (model_store.publish_model,
+    perf_gate.py) : PerformanceRegression si le modèle se dégrade par rapport
+    au modèle servi, auquel cas rien n'est publié dans save_dir.
+    """
+    best_name = max(results, key=lambda name: results[name]['f1_score'])
+    best = results[best_name]
+
+    metadata = {
+        'model_name': best_name,
+        'model_type': type(best['model']).__name__,
+        'f1_score': best['f1_score'],
+        'accuracy': best['accuracy'],
+        'cv_mean': best['cv_mean'],
+        'cv_std': best['cv_std'],
+        'training_date': datetime.now().isoformat(),
+        'dataset_shape': list(X_train.shape),
+        'features': list(X_train.columns),
+        'target_column': data_prep.TARGET_COLUMN
+    }
+    metadata.update(extra_metadata or {})
+
+    model_path, metadata_path = model_store.publish_model(best['model'], best_name, metadata, X_test, y_test,
+                                                          save_dir=save_dir, check_performance=check_performance)
+    return best_name, model_path, metadata_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Entraînement des modèles de détection de fraude")
+    parser.add_argument("--source", default=data_prep.DEFAULT_INPUT, help="Fichier CSV source")
+    parser.add_argument("--balancing", choices=BALANCING_STRATEGIES, default=DEFAULT_BALANCING,
+                        help="Rééquilibrage des classes")
+    parser.add_argument("--models", help=f"Sous-ensemble de modèles ({','.join(MODEL_NAMES)})")
+    parser.add_argument("--cv", type=int, default=CV_FOLDS, help="Nombre de plis (0 : sans validation croisée)")
+    parser.add_argument("--no-cv-cache", action="store_true", help="Recalculer toutes les validations croisées")
+    parser.add_argument("--dry-run", action="store_true", help="Ne rien sauvegarder")
+    parser.add_argument("--skip-perf-gate", action="store_true",
+                        help="Promouvoir sans contrôle de performance (perf_gate.py)")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings('ignore')
+    print("🏋️  ENTRAÎNEMENT DES MODÈLES")
+    print("=" * 50)
+
+    keys = args.models.split(",") if args.models else None
+    unknown = [key for key in keys or [] if key not in MODEL_NAMES]
+    if unknown:
+        print(f" ❌ Modèles inconnus: {', '.join(unknown)}")
+        return 1
+
+    (X_train, X_test, y_train, y_test), dataset = load_split(args.source, args.balancing)
+    print(f"  Source: {os.path.basename(args.source)} (cache {dataset.source_sha256[:16]})")
+    print(f"  Rééquilibrage: {args.balancing} | train: {len(X_train):,} | test: {len(X_test):,}\n")
+
+    models = candidate_models(args.balancing, keys)
+    cache = None
+    if not args.no_cv_cache:
+        from cv_cache import CrossValidationCache
+        cache = CrossValidationCache()
+    results = fit_candidates(models, X_train, y_train, X_test, y_test, cv=args.cv,
+                             cv_cache=cache, data_hash=dataset.split_key(split_balance(args.balancing)))
+    if cache is not None:
+        stats = cache.stats()
+        print(f"\n  Cache de validation croisée: {stats['hits']} succès, {stats['misses']} calculs, "
+              f"{stats['saved_seconds']:.2f}s économisées")
+
+    if args.dry_run:
+        print("\n  Mode --dry-run : aucun modèle sauvegardé")
+        return 0
+
+    extra = {
+        'balancing': balancing_info(args.balancing, y_train),
+        'source_sha256': dataset.source_sha256
+    }
+    try:
+        best_name, model_path, metadata_path = save_best(results, X_train, X_test, y_test, extra,
+                                                         check_performance=not args.skip_perf_gate)
+    except perf_gate.PerformanceRegression as e:
+        print(f"\n ❌ {e} : modèle non promu (rapport {e.report['report_path']})")
+        for regression in e.report["regressions"]:
+            print(f"   {regression['metric']}: {regression['reference']:,} → {regression['candidate']:,} "
+                  f"({regression['change']:+.1%})")
+        return 1
+    print(f"\n ✅ Meilleur modèle: {best_name} (F1 {results[best_name]['f1_score']:.4f})")
+    print(f"  Modèle: {os.path.basename(model_path)}")
+    print(f"  Métadonnées: {os.path.basename(metadata_path)}")
+    performance = model_store.load_metadata(metadata_path).get('performance')
+    if performance:
+        candidate = performance['candidate']
+        print(f"  Service: 1 ligne p50 {candidate['single_row_p50_ms']:.2f} ms | "
+              f"10k lignes {candidate['batch_10k_rows_per_second']:,.0f}/s | "
+              f"chargement {candidate['load_seconds']:.2f}s | +{candidate['model_rss_mb']:.0f} Mo")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())